@@ -0,0 +1,49 @@
+"""Add expiry and settings variant to prediction_cache
+
+Revision ID: a3b4c5d6e7f8
+Revises: f2a3b4c5d6e7
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+revision: str = "a3b4c5d6e7f8"
+down_revision: Union[str, None] = "f2a3b4c5d6e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create(with_expiry: bool) -> None:
+    columns = [
+        sa.Column("image_hash", sa.String(64), primary_key=True),
+        sa.Column("model_version", sa.String(), primary_key=True),
+    ]
+    if with_expiry:
+        columns.append(sa.Column("variant", sa.String(32), primary_key=True, server_default=""))
+    columns += [
+        sa.Column("result", JSONB(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    ]
+    if with_expiry:
+        columns.append(sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False))
+    op.create_table("prediction_cache", *columns)
+    if with_expiry:
+        op.create_index("ix_prediction_cache_expires_at", "prediction_cache", ["expires_at"])
+
+
+def upgrade() -> None:
+    # Existing rows were keyed without the inference settings, so they can't be
+    # trusted under the new key; it is a cache, so start it empty.
+    op.drop_table("prediction_cache")
+    _create(with_expiry=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_prediction_cache_expires_at", table_name="prediction_cache")
+    op.drop_table("prediction_cache")
+    _create(with_expiry=False)
@@ -0,0 +1,25 @@
+"""Add model_version to images
+
+Revision ID: a7b8c9d0e1f2
+Revises: f5a6b7c8d9e0
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a7b8c9d0e1f2"
+down_revision: Union[str, None] = "f5a6b7c8d9e0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("images", sa.Column("model_version", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("images", "model_version")
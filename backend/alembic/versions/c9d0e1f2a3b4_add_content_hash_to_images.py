@@ -0,0 +1,27 @@
+"""Add content_hash to images
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c9d0e1f2a3b4"
+down_revision: Union[str, None] = "b8c9d0e1f2a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("images", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    op.create_index("ix_images_content_hash", "images", ["content_hash"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_images_content_hash", table_name="images")
+    op.drop_column("images", "content_hash")
@@ -0,0 +1,31 @@
+"""Add thumbnail and preview derivatives to images
+
+Revision ID: f2a3b4c5d6e7
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f2a3b4c5d6e7"
+down_revision: Union[str, None] = "e1f2a3b4c5d6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("images", sa.Column("thumbnail_url", sa.String(), nullable=True))
+    op.add_column("images", sa.Column("thumbnail_key", sa.String(), nullable=True))
+    op.add_column("images", sa.Column("preview_url", sa.String(), nullable=True))
+    op.add_column("images", sa.Column("preview_key", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("images", "preview_key")
+    op.drop_column("images", "preview_url")
+    op.drop_column("images", "thumbnail_key")
+    op.drop_column("images", "thumbnail_url")
@@ -8,9 +8,23 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Image storage: cloudinary | local | s3 (see app/services/storage_backends.py)
+    STORAGE_BACKEND: str = "cloudinary"
     CLOUDINARY_CLOUD_NAME: str = ""
     CLOUDINARY_API_KEY: str = ""
     CLOUDINARY_API_SECRET: str = ""
+    # Local, content-addressed storage; "" = <repo>/media. The API serves the files
+    # at the path of STORAGE_LOCAL_URL, which must be the URL clients reach it on.
+    STORAGE_LOCAL_DIR: str = ""
+    STORAGE_LOCAL_URL: str = "http://localhost:8000/media"
+    # S3-compatible storage (AWS, MinIO, R2, ...); endpoint "" = AWS. Objects are
+    # linked as S3_PUBLIC_URL/<key>, so the bucket (or a CDN in front) must be readable.
+    S3_BUCKET: str = ""
+    S3_PUBLIC_URL: str = ""
+    S3_ENDPOINT_URL: str = ""
+    S3_REGION: str = ""
+    S3_ACCESS_KEY_ID: str = ""
+    S3_SECRET_ACCESS_KEY: str = ""
 
     CORS_ORIGINS: list[str] = ["http://localhost:3000"]
 
@@ -19,6 +33,128 @@ class Settings(BaseSettings):
     LIVEKIT_API_SECRET: str = ""
     LIVEKIT_URL: str = "ws://localhost:7880"
       
+    # ML inference backend: keras | tflite | onnx (see app/services/inference_backends.py)
+    INFERENCE_BACKEND: str = "keras"
+    INFERENCE_TFLITE_QUANTIZATION: str = "float16"  # float16 | int8
+    INFERENCE_THREADS: int = 0  # TFLite/ONNX intra-op threads; 0 = runtime default
+
+    # ML inference: dedicated thread pool and dynamic micro-batching of concurrent scans
+    INFERENCE_WORKERS: int = 2
+    INFERENCE_MAX_QUEUE: int = 64
+    # Background jobs (explanations, bulk re-scoring) running at once; 0 = workers - 1.
+    # With one worker they get their own thread, so scans never queue behind them.
+    INFERENCE_MAX_BACKGROUND: int = 0
+    INFERENCE_MAX_BATCH_SIZE: int = 8
+    INFERENCE_MAX_WAIT_MS: float = 10.0
+    # Multi-process mode: > 0 sends forward passes to this many inference worker
+    # processes (python -m app.services.inference_server) over a Unix socket
+    INFERENCE_PROCESSES: int = 0
+    INFERENCE_SOCKET: str = "/tmp/dermoai-inference.sock"
+    INFERENCE_SERVER_TIMEOUT_SECONDS: float = 60.0
+    # How long startup waits for the inference server to answer before giving up,
+    # and how long the server waits for a replacement worker to load a new model
+    INFERENCE_SERVER_STARTUP_TIMEOUT_SECONDS: float = 120.0
+    # How often each API process checks models/versions/ACTIVE for a version
+    # activated elsewhere (another worker, the inference server)
+    MODEL_POINTER_POLL_SECONDS: float = 2.0
+    # Decode JPEGs at reduced resolution (DCT-domain downscale) before resizing
+    INFERENCE_FAST_DECODE: bool = True
+    # Batch sizes traced at startup before /health reports model_ready
+    INFERENCE_WARMUP_BATCH_SIZES: list[int] = [1, 8]
+
+    # Test-time augmentation: flips + these rotations (degrees), averaged in one
+    # batched pass, only for first-pass results below the low-confidence threshold
+    INFERENCE_TTA_ENABLED: bool = False
+    INFERENCE_TTA_ROTATIONS: list[float] = [-10.0, 10.0]
+
+    # Two-stage cascade: a screening model answers confident non-urgent scans and
+    # escalates the rest to the full model. Needs cascade_config.json next to the
+    # active model (src/models/cascade.py); without it every scan uses the full model.
+    INFERENCE_CASCADE_ENABLED: bool = False
+
+    # Image-quality gate on live scans (see app/services/quality_gate.py): images
+    # below these get a 422 retake response instead of a prediction. Sharpness is
+    # the Laplacian variance of luma on a 112x112 grid; fractions are of all pixels.
+    # Off by default: calibrate the thresholds on the val split first
+    # (src/models/quality_calibration.py) and check the per-FST false-reject rate.
+    QUALITY_GATE_ENABLED: bool = False
+    QUALITY_MIN_SHARPNESS: float = 20.0
+    QUALITY_MAX_CLIPPED_FRACTION: float = 0.5
+    QUALITY_MIN_SKIN_FRACTION: float = 0.15
+    QUALITY_SKIN_CR: list[float] = [128.0, 173.0]
+    QUALITY_SKIN_CB: list[float] = [77.0, 127.0]
+
+    # Prediction cache keyed by image SHA-256 + model version + the inference
+    # settings (backend, decode, TTA, cascade). MODEL_VERSION defaults to the
+    # model file name + content hash when left empty. Persisted rows expire after
+    # PREDICTION_CACHE_PERSIST_TTL_SECONDS and are purged at most once per interval.
+    MODEL_VERSION: str = ""
+    PREDICTION_CACHE_SIZE: int = 1024
+    PREDICTION_CACHE_TTL_SECONDS: float = 3600.0
+    PREDICTION_CACHE_PERSIST: bool = False
+    PREDICTION_CACHE_PERSIST_TTL_SECONDS: float = 604800.0
+    PREDICTION_CACHE_PURGE_INTERVAL_SECONDS: float = 3600.0
+
+    # Grad-CAM explanation overlays: in-memory tier in front of the
+    # image_explanations table (keyed by image SHA-256 + model version + condition)
+    EXPLANATION_CACHE_SIZE: int = 256
+    EXPLANATION_CACHE_TTL_SECONDS: float = 86400.0
+
+    # Remote image fetching (re-scoring stored URLs): pooled client, per-host cap, size cap
+    HTTP_MAX_CONNECTIONS: int = 32
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 8
+    HTTP_TIMEOUT_SECONDS: float = 30.0
+    REMOTE_IMAGE_MAX_BYTES: int = 20 * 1024 * 1024
+
+    # Similar-case index over reviewed images' embeddings (default dir: models/index)
+    SIMILARITY_INDEX_DIR: str = ""
+    SIMILARITY_INDEX_NPROBE: int = 8  # IVF lists scanned per query
+    SIMILARITY_INDEX_TRAIN_MIN: int = 2048  # exact scan below this many vectors
+    SIMILARITY_INDEX_SAVE_EVERY: int = 100  # changes between saves to disk
+
+    # Prediction drift monitor: rolling histograms of served predictions in
+    # DRIFT_SLOT_SECONDS slots, compared per window with the validation-split
+    # reference (drift_reference.json next to the model, src/models/drift_reference.py)
+    DRIFT_MONITOR_ENABLED: bool = True
+    DRIFT_BINS: int = 10
+    DRIFT_SLOT_SECONDS: int = 300
+    DRIFT_WINDOWS_MINUTES: list[int] = [60, 1440]
+    DRIFT_MIN_SAMPLES: int = 200  # below this a window reports insufficient_data
+    DRIFT_PSI_WARNING: float = 0.1
+    DRIFT_PSI_ALERT: float = 0.25
+
+    # GET /metrics: with PROMETHEUS_MULTIPROC_DIR set (environment, see
+    # app/core/metrics.py), how often each API process refreshes its gauges
+    METRICS_GAUGE_REFRESH_SECONDS: float = 5.0
+
+    # Bulk re-scoring after a model change: rows per checkpointed chunk, images
+    # per inference-pool job, and how long a job's lease lasts without a heartbeat
+    RESCORING_CHUNK_SIZE: int = 256
+    RESCORING_BATCH_SIZE: int = 64
+    RESCORING_LEASE_SECONDS: int = 300
+
+    # Multi-image scans: files accepted per request (one forward pass per request)
+    UPLOAD_MAX_FILES: int = 10
+    # Uploads are read in chunks and rejected (413) past the size limit
+    UPLOAD_MAX_BYTES: int = 15 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 256 * 1024
+    # Threads for blocking storage uploads/deletes; uploads run alongside inference
+    STORAGE_UPLOAD_WORKERS: int = 8
+
+    # Thumbnail and preview JPEGs for image lists, rendered after upload on their
+    # own pool. Queued jobs hold the upload bytes, so at most
+    # IMAGE_DERIVATIVE_MAX_PENDING are queued; the rest are picked up again when a
+    # list shows the image. An image whose derivatives failed is not retried for
+    # IMAGE_DERIVATIVE_RETRY_SECONDS; at most IMAGE_DERIVATIVE_MAX_FAILED failures
+    # are remembered (least recently failed dropped first).
+    IMAGE_THUMBNAIL_PX: int = 128
+    IMAGE_PREVIEW_PX: int = 512
+    IMAGE_DERIVATIVE_QUALITY: int = 80
+    IMAGE_DERIVATIVE_WORKERS: int = 1
+    IMAGE_DERIVATIVE_MAX_PENDING: int = 32
+    IMAGE_DERIVATIVE_RETRY_SECONDS: float = 900.0
+    IMAGE_DERIVATIVE_MAX_FAILED: int = 1024
+
     # Optional: seed a default admin on first run (set in .env for dev)
     SEED_ADMIN_EMAIL: str = ""
     SEED_ADMIN_PASSWORD: str = ""
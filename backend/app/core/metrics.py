@@ -0,0 +1,171 @@
+"""
+Prometheus metrics (prometheus_client): counters, histograms and callback gauges.
+
+Served in the Prometheus text format at GET /metrics. Bind the label values
+once with `.labels(...)` at import time, so that the hot path skips the label
+lookup.
+
+With several uvicorn workers, set the PROMETHEUS_MULTIPROC_DIR environment
+variable to an empty directory shared by every API and inference process,
+and wipe it before each start. Every process then writes its samples to
+memory-mapped files there, and whichever worker serves a scrape reports the
+whole fleet: counters and histograms summed, gauges combined as their
+multiprocess_mode says. Without it, metrics are per process.
+
+Gauges are read from callbacks (queue depth, readiness, ...). A scrape
+refreshes those of the process serving it. In multiprocess mode each API
+process also refreshes its own every METRICS_GAUGE_REFRESH_SECONDS (start()),
+so the other workers' values are at most that old.
+"""
+
+import os
+import threading
+from typing import Callable
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Seconds; covers sub-millisecond preprocessing up to slow remote fetches
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (name, documentation, callback, multiprocess_mode), and the gauges created from them
+_callbacks: list[tuple[str, str, Callable[[], float | None], str]] = []
+_gauges: list[tuple[Gauge, Callable[[], float | None]]] = []
+_lock = threading.Lock()
+_stop = threading.Event()
+_refresher: threading.Thread | None = None
+
+
+def counter(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+    return Counter(name, documentation, labelnames)
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: tuple[str, ...] = (),
+    buckets: tuple[float, ...] = LATENCY_BUCKETS,
+) -> Histogram:
+    return Histogram(name, documentation, labelnames, buckets=buckets)
+
+
+def gauge(
+    name: str,
+    documentation: str,
+    fn: Callable[[], float | None],
+    multiprocess_mode: str = "livesum",
+) -> None:
+    """
+    Register a gauge whose value is read from fn() on refresh.
+
+    Args:
+        name: Metric name.
+        documentation: Help text.
+        fn: Returns the value, or None to leave it unchanged.
+        multiprocess_mode: How processes combine (livesum, livemax, livemin, ...).
+    """
+    with _lock:
+        _callbacks.append((name, documentation, fn, multiprocess_mode))
+
+
+def refresh() -> None:
+    """Set this process's gauges from their callbacks."""
+    with _lock:
+        # Created on the first refresh, so that processes which never serve or
+        # start() (e.g. inference workers) write no gauge files
+        for name, documentation, fn, mode in _callbacks[len(_gauges):]:
+            _gauges.append((Gauge(name, documentation, multiprocess_mode=mode), fn))
+        gauges = list(_gauges)
+    for metric, fn in gauges:
+        try:
+            value = fn()
+        except Exception:
+            continue
+        if value is not None:
+            metric.set(value)
+
+
+def render() -> bytes:
+    refresh()
+    if not MULTIPROCESS:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def _refresh_loop(interval: float) -> None:
+    while True:
+        refresh()
+        if _stop.wait(interval):
+            return
+
+
+def start(interval: float) -> None:
+    """In multiprocess mode, refresh this process's gauges every interval seconds."""
+    global _refresher
+    if not MULTIPROCESS or _refresher is not None:
+        return
+    _stop.clear()
+    _refresher = threading.Thread(
+        target=_refresh_loop, args=(interval,), name="metrics_refresh", daemon=True
+    )
+    _refresher.start()
+
+
+def shutdown() -> None:
+    """Stop refreshing, and drop this process's live gauges from the shared directory."""
+    global _refresher
+    _stop.set()
+    if _refresher is not None:
+        _refresher.join()
+        _refresher = None
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+# --- scan path -----------------------------------------------------------------
+
+SCAN_STAGE_SECONDS = histogram(
+    "dermoai_scan_stage_seconds",
+    "Time spent per scan stage (upload, fetch, decode, preprocess, quality, screen, forward, tta, total).",
+    ("stage",),
+)
+INFERENCE_BATCH_SIZE = histogram(
+    "dermoai_inference_batch_size",
+    "Images per model forward pass.",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+PREDICTIONS = counter(
+    "dermoai_predictions",
+    "Predictions served, by predicted condition and urgency (cache hits included).",
+    ("condition", "urgency"),
+)
+QUALITY_REJECTIONS = counter(
+    "dermoai_quality_rejections",
+    "Scans sent back for a retake by the image-quality gate, by failed check.",
+    ("issue",),
+)
+CASCADE_DECISIONS = counter(
+    "dermoai_cascade_decisions",
+    "Images answered by the cascade's screening model (accepted) or sent on to the full model (escalated).",
+    ("decision",),
+)
+URGENCY_OVERRIDES = counter(
+    "dermoai_urgency_overrides",
+    "Predictions whose class or urgency was changed by a safety rule "
+    "(malignant_threshold: P(malignant) forced the malignant class; "
+    "low_confidence: a non-urgent class was marked URGENT for low confidence).",
+    ("rule",),
+)
@@ -1,11 +1,15 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from fastapi.staticfiles import StaticFiles
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.core import metrics
 from app.core.config import settings
 from app.core.migrate import run_migrations
 from app.core.seed import run_seed
@@ -15,6 +19,7 @@ from app.routers import (
     conditions,
     consultations,
     images,
+    models,
     notifications,
     patients,
     practitioners,
@@ -26,8 +31,16 @@ from app.routers import (
     websocket,
 )
 from app.core.seed import run_seed
-from app.services.cloudinary_service import configure_cloudinary
-from app.services import condition_service
+from app.services.quality_gate import ImageQualityError
+from app.services import (
+    condition_service,
+    derivative_service,
+    ml_service,
+    rescoring_service,
+    similar_case_service,
+    storage_service,
+    upload_service,
+)
 from app.core.database import async_session
 
 logger = logging.getLogger(__name__)
@@ -42,7 +55,8 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.exception("Startup migration/seed failed: %s", e)
         raise
-    configure_cloudinary()
+    storage_service.get_backend()
+    metrics.start(settings.METRICS_GAUGE_REFRESH_SECONDS)
     try:
         await run_seed()
         # Seed predefined conditions
@@ -50,7 +64,30 @@ async def lifespan(app: FastAPI):
             await condition_service.seed_predefined_conditions(db)
     except Exception as e:
         logger.warning("Seed skipped or failed: %s", e)
+    # Load and warm the model in the background; /health reports model_ready
+    # so rolling deploys only route traffic to warm workers.
+    warmup_task = asyncio.create_task(ml_service.warmup_async())
+    warmup_task.add_done_callback(_log_warmup_failure)
+    # Drop prediction-cache rows that expired while the API was down
+    await ml_service.purge_cache()
+    # Re-scoring jobs interrupted by the last shutdown continue from their checkpoint
+    try:
+        await rescoring_service.resume_interrupted()
+    except Exception as e:
+        logger.warning("Resuming re-scoring jobs failed: %s", e)
     yield
+    warmup_task.cancel()
+    await rescoring_service.shutdown()
+    await similar_case_service.shutdown()
+    await ml_service.shutdown()
+    await derivative_service.shutdown()
+    await storage_service.shutdown()
+    await asyncio.to_thread(metrics.shutdown)
+
+
+def _log_warmup_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Model warmup failed: %s", task.exception())
 
 
 def create_app() -> FastAPI:
@@ -68,6 +105,8 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    # Refuse oversized upload bodies before they are parsed
+    application.add_middleware(upload_service.UploadLimitMiddleware)
 
     # Routers
     application.include_router(auth.router)
@@ -80,14 +119,41 @@ def create_app() -> FastAPI:
     application.include_router(clinical_reviews.router)
     application.include_router(notifications.router)
     application.include_router(retraining_logs.router)
+    application.include_router(models.router)
     application.include_router(stats.router)
     application.include_router(conditions.router)
     application.include_router(teleconsultations.router)
     application.include_router(websocket.router)
 
+    if settings.STORAGE_BACKEND == "local":
+        # Locally stored images are public by URL, as Cloudinary ones are
+        application.mount(
+            urlsplit(settings.STORAGE_LOCAL_URL).path,
+            StaticFiles(directory=storage_service.get_backend().images_dir),
+            name="media",
+        )
+
     @application.get("/health")
     async def health_check():
-        return {"status": "healthy"}
+        # Unauthenticated: runtime internals are at GET /api/models/stats (admin)
+        return {"status": "healthy", "model_ready": ml_service.is_ready()}
+
+    @application.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+    @application.exception_handler(ImageQualityError)
+    async def image_quality_exception_handler(request: Request, exc: ImageQualityError):
+        # A retake request rather than a failure: the model never saw the image
+        return JSONResponse(
+            status_code=422,
+            content={
+                "detail": str(exc),
+                "retake": True,
+                "file_index": exc.index,
+                **exc.report.to_dict(),
+            },
+        )
 
     @application.exception_handler(SQLAlchemyError)
     async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
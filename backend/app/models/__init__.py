@@ -7,6 +7,9 @@ from app.models.image import Image
 from app.models.clinical_review import ClinicalReview
 from app.models.notification import Notification
 from app.models.retraining_log import RetrainingLog
+from app.models.prediction_cache import PredictionCacheEntry
+from app.models.rescoring_job import RescoringJob
+from app.models.image_explanation import ImageExplanation
 
 __all__ = [
     "Base",
@@ -18,4 +21,7 @@ __all__ = [
     "ClinicalReview",
     "Notification",
     "RetrainingLog",
+    "PredictionCacheEntry",
+    "RescoringJob",
+    "ImageExplanation",
 ]
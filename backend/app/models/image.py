@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, LargeBinary, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -24,8 +24,22 @@ class Image(Base):
     )
     image_url: Mapped[str] = mapped_column(String, nullable=False)
     storage_key: Mapped[str] = mapped_column(String, nullable=False)
+    # Downscaled JPEG copies for list/review pages, stored next to the original
+    # in the background after upload (see derivative_service); None until then
+    thumbnail_url: Mapped[str | None] = mapped_column(String, nullable=True)
+    thumbnail_key: Mapped[str | None] = mapped_column(String, nullable=True)
+    preview_url: Mapped[str | None] = mapped_column(String, nullable=True)
+    preview_key: Mapped[str | None] = mapped_column(String, nullable=True)
+    # SHA-256 of the uploaded bytes, computed while streaming the upload
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     predicted_condition: Mapped[str | None] = mapped_column(String, nullable=True)
     confidence: Mapped[float | None] = mapped_column(Float, nullable=True)
+    model_version: Mapped[str | None] = mapped_column(String, nullable=True)
+    # float16 lesion embedding from the prediction pass (similar-case search);
+    # deferred so list queries do not load it
+    embedding: Mapped[bytes | None] = mapped_column(
+        LargeBinary, nullable=True, deferred=True
+    )
     reviewed_label: Mapped[str | None] = mapped_column(String, nullable=True)
     reviewed_as_final: Mapped[bool] = mapped_column(Boolean, default=False)
     uploaded_at: Mapped[datetime] = mapped_column(
@@ -0,0 +1,20 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class ImageExplanation(Base):
+    """Grad-CAM overlay (palette PNG) for one image, model version and explained condition."""
+
+    __tablename__ = "image_explanations"
+
+    image_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    model_version: Mapped[str] = mapped_column(String, primary_key=True)
+    condition: Mapped[str] = mapped_column(String, primary_key=True)
+    overlay: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
@@ -0,0 +1,23 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class PredictionCacheEntry(Base):
+    """Persistent tier of the prediction cache, keyed by image SHA-256 + model version + settings."""
+
+    __tablename__ = "prediction_cache"
+
+    image_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    model_version: Mapped[str] = mapped_column(String, primary_key=True)
+    # prediction_cache.settings_key() of the inference settings the result was computed with
+    variant: Mapped[str] = mapped_column(String(32), primary_key=True, default="")
+    result: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
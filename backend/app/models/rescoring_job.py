@@ -0,0 +1,38 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Float, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class RescoringJob(Base):
+    """Bulk re-scoring of stored images with a model version, checkpointed per chunk."""
+
+    __tablename__ = "rescoring_jobs"
+
+    job_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    model_version: Mapped[str] = mapped_column(String, nullable=False)
+    # PENDING | RUNNING | COMPLETED | FAILED | CANCELLED
+    status: Mapped[str] = mapped_column(String, nullable=False, default="PENDING")
+    chunk_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Keyset checkpoint: every image with image_id <= this has been handled
+    last_image_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    total_images: Mapped[int] = mapped_column(Integer, default=0)
+    processed: Mapped[int] = mapped_column(Integer, default=0)
+    changed: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    consultations_updated: Mapped[int] = mapped_column(Integer, default=0)
+    running_seconds: Mapped[float] = mapped_column(Float, default=0.0)
+    error: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    # Lease: refreshed after every chunk; a RUNNING job with a stale heartbeat
+    # lost its worker and may be resumed
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
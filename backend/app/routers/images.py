@@ -10,10 +10,12 @@ from app.core.deps import get_current_user, require_role
 from app.models.user import User
 from app.schemas.image import (
     AttachImageRequest,
+    ImageExplanationRead,
     ImageListResponse,
     ImageRead,
     ImageReviewUpdate,
     ImageUploadResponse,
+    SimilarCaseRead,
 )
 from app.services import image_service
 
@@ -33,6 +35,19 @@ async def upload_to_consultation(
     return image
 
 
+@router.post("/upload/batch", response_model=list[ImageUploadResponse], status_code=201)
+async def upload_batch_to_consultation(
+    files: list[UploadFile],
+    consultation_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """Upload several images to a consultation; predicted in one batch, aggregated once."""
+    return await image_service.upload_batch_to_consultation(
+        files, consultation_id, current_user.user_id, db
+    )
+
+
 @router.post("/{image_id}/attach", response_model=ImageRead)
 async def attach_to_consultation(
     image_id: UUID,
@@ -111,6 +126,32 @@ async def get_image(
     return await image_service.get_image(image_id, db)
 
 
+@router.get("/{image_id}/similar", response_model=list[SimilarCaseRead])
+async def list_similar_cases(
+    image_id: UUID,
+    _user: Annotated[User, Depends(require_role("PRACTITIONER"))],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    k: int = Query(5, ge=1, le=50),
+):
+    """Reviewed images whose lesions look most like this one (nearest lesion embeddings)."""
+    return await image_service.find_similar(image_id, k, db)
+
+
+@router.get("/{image_id}/explanation", response_model=ImageExplanationRead)
+async def get_explanation(
+    image_id: UUID,
+    _user: Annotated[User, Depends(require_role("PRACTITIONER"))],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    condition: str | None = None,
+):
+    """Grad-CAM overlay of the regions that drove the prediction (or `condition`).
+
+    Computed on first request behind live scans, then served from cache for this
+    image and model version. Draw the overlay over the photo resized to 224x224.
+    """
+    return await image_service.get_explanation(image_id, db, condition)
+
+
 @router.patch("/{image_id}", response_model=ImageRead)
 async def update_image_review(
     image_id: UUID,
@@ -0,0 +1,139 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.deps import require_role
+from app.models.user import User
+from app.schemas.model_registry import (
+    InferenceMemoryRead,
+    ModelActivateRequest,
+    ModelRegistryStatus,
+    RescoringJobRead,
+    RescoringStartRequest,
+)
+from app.services import (
+    derivative_service,
+    explanation_service,
+    ml_service,
+    rescoring_service,
+    retraining_log_service,
+    similar_case_service,
+    storage_service,
+    upload_service,
+)
+
+router = APIRouter(prefix="/api/models", tags=["models"])
+
+
+@router.get("/", response_model=ModelRegistryStatus)
+async def model_status(
+    _admin: Annotated[User, Depends(require_role("ADMIN"))],
+):
+    """Active, previous (rollback target) and currently loading model versions."""
+    return ml_service.model_status()
+
+
+@router.post("/activate", response_model=ModelRegistryStatus, status_code=202)
+async def activate_model(
+    data: ModelActivateRequest,
+    _admin: Annotated[User, Depends(require_role("ADMIN"))],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """Load and warm a retrained model version in the background, then swap it in.
+
+    The version must have a retraining log and model files in models/versions/<model_version>/.
+    The current model keeps serving until the new one is warm.
+    """
+    await retraining_log_service.get_log_by_version(data.model_version, db)
+    ml_service.activate_model(data.model_version)
+    return ml_service.model_status()
+
+
+@router.post("/rollback", response_model=ModelRegistryStatus)
+async def rollback_model(
+    _admin: Annotated[User, Depends(require_role("ADMIN"))],
+):
+    """Instantly swap the previously active model version back in."""
+    ml_service.rollback_model()
+    return ml_service.model_status()
+
+
+@router.get("/memory", response_model=InferenceMemoryRead)
+async def inference_memory(
+    _admin: Annotated[User, Depends(require_role("ADMIN"))],
+):
+    """Resident memory (RSS and proportional PSS) of this API process and each inference process."""
+    return await ml_service.worker_memory()
+
+
+@router.get("/stats")
+async def runtime_stats(
+    _admin: Annotated[User, Depends(require_role("ADMIN"))],
+):
+    """Runtime counters of this API process: inference queue and cache, similar-case index,
+    explanations, uploads, storage and image derivatives."""
+    return {
+        "inference": ml_service.inference_stats(),
+        "similar_cases": similar_case_service.index_stats(),
+        "explanations": explanation_service.stats(),
+        "uploads": upload_service.upload_stats(),
+        "storage": storage_service.stats(),
+        "derivatives": derivative_service.stats(),
+    }
+
+
+@router.post("/rescoring", response_model=RescoringJobRead, status_code=202)
+async def start_rescoring(
+    _admin: Annotated[User, Depends(require_role("ADMIN"))],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    data: RescoringStartRequest | None = None,
+):
+    """Re-score every stored image not yet scored by the active model version, in the background.
+
+    Image predictions and the aggregates of consultations whose images changed are updated
+    chunk by chunk; progress is checkpointed, so an interrupted job resumes where it stopped.
+    """
+    job = await rescoring_service.start_job(db, data.chunk_size if data else None)
+    return rescoring_service.job_progress(job)
+
+
+@router.get("/rescoring", response_model=list[RescoringJobRead])
+async def list_rescoring_jobs(
+    _admin: Annotated[User, Depends(require_role("ADMIN"))],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """Most recent re-scoring jobs with their progress."""
+    return [rescoring_service.job_progress(job) for job in await rescoring_service.list_jobs(db)]
+
+
+@router.get("/rescoring/{job_id}", response_model=RescoringJobRead)
+async def get_rescoring_job(
+    job_id: UUID,
+    _admin: Annotated[User, Depends(require_role("ADMIN"))],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """Progress of a re-scoring job: images processed, throughput and ETA."""
+    return rescoring_service.job_progress(await rescoring_service.get_job(job_id, db))
+
+
+@router.post("/rescoring/{job_id}/resume", response_model=RescoringJobRead, status_code=202)
+async def resume_rescoring_job(
+    job_id: UUID,
+    _admin: Annotated[User, Depends(require_role("ADMIN"))],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """Continue a failed or interrupted re-scoring job from its last checkpoint."""
+    return rescoring_service.job_progress(await rescoring_service.resume_job(job_id, db))
+
+
+@router.post("/rescoring/{job_id}/cancel", response_model=RescoringJobRead)
+async def cancel_rescoring_job(
+    job_id: UUID,
+    _admin: Annotated[User, Depends(require_role("ADMIN"))],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """Stop a re-scoring job after its current chunk; images already re-scored keep their update."""
+    return rescoring_service.job_progress(await rescoring_service.cancel_job(job_id, db))
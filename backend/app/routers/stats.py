@@ -6,8 +6,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.deps import get_current_user, require_role
 from app.models.user import User
-from app.schemas.stats import AdminStatsResponse, PractitionerStatsResponse, UserStatsResponse
-from app.services import stats_service
+from app.schemas.stats import (
+    AdminStatsResponse,
+    DriftResponse,
+    PractitionerStatsResponse,
+    UserStatsResponse,
+)
+from app.services import ml_service, stats_service
 from app.services.practitioner_service import get_practitioner_by_user_id
 
 router = APIRouter(prefix="/api/stats", tags=["stats"])
@@ -22,6 +27,14 @@ async def admin_stats(
     return await stats_service.get_admin_stats(db)
 
 
+@router.get("/drift", response_model=DriftResponse)
+async def prediction_drift(
+    _user: Annotated[User, Depends(require_role("ADMIN"))],
+):
+    """Prediction drift: rolling histograms of recent predictions vs the validation split (PSI per window)."""
+    return ml_service.drift_report()
+
+
 @router.get("/practitioner", response_model=PractitionerStatsResponse)
 async def practitioner_stats(
     current_user: Annotated[User, Depends(require_role("PRACTITIONER"))],
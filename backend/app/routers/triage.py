@@ -24,6 +24,9 @@ async def quick_scan(
     Works without authentication. If a Bearer token is provided,
     the image is linked to the authenticated user.
     Set consent_to_reuse=true to allow the image to be used for future model retraining.
+    When the quality gate is enabled, blurry, badly exposed or mostly-background
+    photos get a 422 with retake=true and the failed checks instead of a
+    prediction. The upload, which starts alongside inference, is deleted again.
     """
     user_id = current_user.user_id if current_user else None
     return await image_service.quick_scan(
@@ -31,6 +34,23 @@ async def quick_scan(
     )
 
 
+@router.post("/scan/batch", response_model=list[QuickScanResponse])
+async def quick_scan_batch(
+    files: list[UploadFile],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User | None, Depends(get_optional_user)] = None,
+    consent_to_reuse: bool = False,
+):
+    """Upload several images for ML prediction in a single batch.
+
+    Same rules as /scan; results are returned in upload order.
+    """
+    user_id = current_user.user_id if current_user else None
+    return await image_service.quick_scan_batch(
+        files, db, user_id=user_id, consent_to_reuse=consent_to_reuse
+    )
+
+
 @router.get("/history", response_model=list[ImageRead])
 async def scan_history(
     current_user: Annotated[User, Depends(get_current_user)],
@@ -10,8 +10,13 @@ class ImageRead(BaseModel):
     uploaded_by: uuid.UUID | None = None
     image_url: str
     storage_key: str
+    # Small JPEG copies for lists (IMAGE_THUMBNAIL_PX / IMAGE_PREVIEW_PX); None
+    # while still being generated, in which case clients fall back to image_url
+    thumbnail_url: str | None = None
+    preview_url: str | None = None
     predicted_condition: str | None = None
     confidence: float | None = None
+    model_version: str | None = None
     reviewed_label: str | None = None
     reviewed_as_final: bool = False
     uploaded_at: datetime
@@ -52,5 +57,18 @@ class ImageListResponse(BaseModel):
     total: int
 
 
+class SimilarCaseRead(BaseModel):
+    image: ImageRead
+    similarity: float  # cosine similarity of the lesion embeddings
+
+
+class ImageExplanationRead(BaseModel):
+    image_id: uuid.UUID
+    condition: str  # class the heatmap explains
+    model_version: str
+    overlay: str  # data:image/png;base64 RGBA overlay at the model input size (224x224)
+    cached: bool
+
+
 class ImageReviewUpdate(BaseModel):
     reviewed_label: str
@@ -0,0 +1,58 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class LoadedModelRead(BaseModel):
+    version: str
+    path: str
+    loaded_at: datetime
+
+
+class ModelRegistryStatus(BaseModel):
+    backend: str
+    active: LoadedModelRead | None = None
+    previous: LoadedModelRead | None = None
+    loading: str | None = None
+    last_error: str | None = None
+
+
+class ProcessMemoryRead(BaseModel):
+    pid: int
+    role: str
+    rss_mb: float | None = None
+    pss_mb: float | None = None
+    shared_mb: float | None = None
+
+
+class InferenceMemoryRead(BaseModel):
+    mode: str
+    processes: list[ProcessMemoryRead]
+
+
+class ModelActivateRequest(BaseModel):
+    model_version: str
+
+
+class RescoringStartRequest(BaseModel):
+    chunk_size: int | None = Field(default=None, ge=1, le=5000)
+
+
+class RescoringJobRead(BaseModel):
+    job_id: UUID
+    model_version: str
+    status: str
+    chunk_size: int
+    total_images: int
+    processed: int
+    changed: int
+    failed: int
+    consultations_updated: int
+    running_seconds: float
+    images_per_sec: float | None = None
+    eta_seconds: float | None = None
+    error: str | None = None
+    created_at: datetime
+    heartbeat_at: datetime | None = None
+    finished_at: datetime | None = None
@@ -36,3 +36,32 @@ class UserStatsResponse(BaseModel):
     my_scans: int
     pending_results: int
     urgent_alerts: int
+
+
+class DriftWindow(BaseModel):
+    window_minutes: int
+    n: int
+    status: str  # "ok" | "warning" | "drift" | "insufficient_data" | "no_reference" | "reference_mismatch"
+    mean_confidence: float | None = None
+    predicted_class_frequency: dict[str, float]
+    reference_frequency: dict[str, float] | None = None
+    predicted_class_psi: float | None = None
+    confidence_psi: float | None = None
+    class_probability_psi: dict[str, float] | None = None
+    max_psi: float | None = None
+
+
+class DriftReference(BaseModel):
+    path: str
+    n: int | None = None
+    split: str | None = None
+
+
+class DriftResponse(BaseModel):
+    model_version: str
+    reference: DriftReference | None = None
+    bins: int
+    min_samples: int
+    psi_warning: float
+    psi_alert: float
+    windows: list[DriftWindow]
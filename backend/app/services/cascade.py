@@ -0,0 +1,221 @@
+"""
+Two-stage inference cascade: a cheap screening model in front of the full model.
+
+The screening model is a smaller network or a lower-resolution input, declared
+in cascade_config.json next to the full model files. It sees every image. Its
+answer is served only when all of these hold:
+- it predicts a NON_URGENT class;
+- its confidence is at least confidence_threshold;
+- its P(malignant) is below malignant_threshold.
+
+Every other image is escalated to the full model.
+
+src/models/cascade.py calibrates the thresholds against the full model of the
+same version. malignant_threshold sits below the screening model's lowest
+P(malignant) on any image the full model flags as malignant, so those are
+always escalated. Malignant recall can therefore never drop below the full
+model's on the calibration split. The script verifies this on a second,
+held-out split before it writes the file.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from app.services import inference_backends
+
+CONFIG_FILE = "cascade_config.json"
+
+_SUFFIX_BACKENDS = {".keras": "keras", ".tflite": "tflite", ".onnx": "onnx"}
+
+
+def backend_for(path: Path) -> str:
+    """Inference backend for a model file, from its extension."""
+    try:
+        return _SUFFIX_BACKENDS[path.suffix]
+    except KeyError:
+        raise ValueError(f"Unsupported screening model {path.name}; expected .keras, .tflite or .onnx")
+
+
+def screen_input(batch: np.ndarray, input_size: tuple[int, int]) -> np.ndarray:
+    """Downscale a uint8 (N, 224, 224, 3) batch to the screening input, as float32 [0, 1]."""
+    if batch.shape[1:3] != tuple(input_size):
+        batch = np.stack([
+            np.asarray(Image.fromarray(x).resize(tuple(input_size), Image.BILINEAR)) for x in batch
+        ])
+    return batch.astype(np.float32) / np.float32(255.0)
+
+
+def accept_mask(
+    probabilities: np.ndarray,
+    malignant_idx: int,
+    accept_indices: list[int],
+    confidence_threshold: float,
+    malignant_threshold: float,
+) -> np.ndarray:
+    """Rows of (N, num_classes) screening probabilities whose answer can be served without escalation."""
+    probabilities = np.asarray(probabilities)
+    predicted = probabilities.argmax(axis=1)
+    return (
+        np.isin(predicted, accept_indices)
+        & (probabilities.max(axis=1) >= confidence_threshold)
+        & (probabilities[:, malignant_idx] < malignant_threshold)
+    )
+
+
+def calibrate(
+    screen_probs: np.ndarray,
+    full_served: np.ndarray,
+    malignant_idx: int,
+    accept_indices: list[int],
+    max_malignant_threshold: float,
+    min_confidence: float,
+    target_agreement: float = 0.98,
+    margin: float = 0.1,
+) -> dict:
+    """
+    Escalation thresholds from screening probabilities and the full model's served classes.
+
+    malignant_threshold is the lowest screening P(malignant) among images the
+    full model serves as malignant, less a relative margin, and never above
+    max_malignant_threshold. confidence_threshold is the lowest value (at least
+    min_confidence) at which the accepted screening answers agree with the full
+    model on at least target_agreement of the images; 1.0 (nothing accepted) if
+    none does.
+    """
+    screen_probs = np.asarray(screen_probs)
+    flagged = full_served == malignant_idx
+    lowest = float(screen_probs[flagged, malignant_idx].min()) if flagged.any() else max_malignant_threshold
+    malignant_threshold = min(lowest, max_malignant_threshold) * (1.0 - margin)
+    screen_predicted = screen_probs.argmax(axis=1)
+    confidence_threshold = 1.0
+    for candidate in np.arange(min_confidence, 1.0, 0.01):
+        accepted = accept_mask(
+            screen_probs, malignant_idx, accept_indices, float(candidate), malignant_threshold
+        )
+        if accepted.any() and (screen_predicted[accepted] == full_served[accepted]).mean() >= target_agreement:
+            confidence_threshold = round(float(candidate), 2)
+            break
+    return {
+        "malignant_threshold": round(malignant_threshold, 6),
+        "confidence_threshold": confidence_threshold,
+    }
+
+
+def evaluate(
+    screen_probs: np.ndarray,
+    full_served: np.ndarray,
+    labels: np.ndarray,
+    malignant_idx: int,
+    config: dict,
+) -> dict:
+    """Escalation rate, agreement and malignant recall of the cascade vs the full model alone."""
+    accepted = accept_mask(
+        screen_probs,
+        malignant_idx,
+        config["accept_indices"],
+        config["confidence_threshold"],
+        config["malignant_threshold"],
+    )
+    served = np.where(accepted, np.asarray(screen_probs).argmax(axis=1), full_served)
+    malignant = labels == malignant_idx
+    report = {
+        "n": int(len(labels)),
+        "escalated_fraction": round(float(1.0 - accepted.mean()), 4),
+        "accepted_agreement": (
+            round(float((served[accepted] == full_served[accepted]).mean()), 4) if accepted.any() else None
+        ),
+        "full_malignant_flags_escalated": bool(
+            (~accepted[full_served == malignant_idx]).all()
+        ),
+    }
+    if malignant.any():
+        report["full_malignant_recall"] = round(float((full_served[malignant] == malignant_idx).mean()), 4)
+        report["cascade_malignant_recall"] = round(float((served[malignant] == malignant_idx).mean()), 4)
+    return report
+
+
+class Cascade:
+    """Per-process screening model for the active version, plus accept/escalate counters."""
+
+    def __init__(self, class_names: list[str], batch_sizes: list[int] | None = None):
+        self.class_names = list(class_names)
+        self.batch_sizes = batch_sizes
+        self._loaded: tuple[Path, float, dict, object] | None = None  # config path, mtime, config, backend
+        self._lock = threading.Lock()
+        self._counts_lock = threading.Lock()
+        self.accepted = 0
+        self.escalated = 0
+        self.screen_seconds = 0.0
+
+    def load(self, model_dir: Path) -> tuple[dict, object] | None:
+        """(config, screening backend) for a model directory, reloaded when the config changes; None if absent."""
+        path = model_dir / CONFIG_FILE
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return None
+        loaded = self._loaded
+        if loaded is not None and loaded[0] == path and loaded[1] == mtime:
+            return loaded[2], loaded[3]
+        with self._lock:
+            loaded = self._loaded
+            if loaded is None or loaded[0] != path or loaded[1] != mtime:
+                with open(path, encoding="utf-8") as f:
+                    config = json.load(f)
+                if config.get("class_names") != self.class_names:
+                    raise ValueError(f"{path} was calibrated for different class names")
+                config["accept_indices"] = [self.class_names.index(c) for c in config["accept_conditions"]]
+                screen_path = model_dir / config["screen_model"]
+                backend = inference_backends.load_backend(
+                    backend_for(screen_path), screen_path, batch_sizes=self.batch_sizes
+                )
+                loaded = self._loaded = (path, mtime, config, backend)
+        return loaded[2], loaded[3]
+
+    def screen(self, batch: np.ndarray, config: dict, backend) -> tuple[np.ndarray, np.ndarray]:
+        """Screening probabilities and accept mask for a uint8 (N, 224, 224, 3) batch."""
+        start = time.perf_counter()
+        probs = backend.predict(screen_input(batch, config["input_size"]))
+        accepted = accept_mask(
+            probs,
+            self.class_names.index("malignant"),
+            config["accept_indices"],
+            config["confidence_threshold"],
+            config["malignant_threshold"],
+        )
+        elapsed = time.perf_counter() - start
+        with self._counts_lock:
+            self.accepted += int(accepted.sum())
+            self.escalated += int(len(accepted) - accepted.sum())
+            self.screen_seconds += elapsed
+        return probs, accepted
+
+    def stats(self) -> dict:
+        """
+        Escalation rate and the mean latency saved per image: the full forward
+        pass avoided on accepted images (its per-image cost measured at
+        calibration) minus the screening pass every image pays.
+        """
+        with self._counts_lock:
+            accepted, escalated, screen_seconds = self.accepted, self.escalated, self.screen_seconds
+        total = accepted + escalated
+        loaded = self._loaded
+        full_ms = loaded[2].get("latency_ms_per_image", {}).get("full") if loaded is not None else None
+        screen_ms = screen_seconds * 1000.0 / total if total else None
+        return {
+            "config": str(loaded[0]) if loaded is not None else None,
+            "screened": total,
+            "escalated": escalated,
+            "escalated_fraction": round(escalated / total, 4) if total else None,
+            "screen_ms_per_image": round(screen_ms, 3) if screen_ms is not None else None,
+            "saved_ms_per_image": (
+                round(accepted / total * full_ms - screen_ms, 3)
+                if total and full_ms is not None
+                else None
+            ),
+        }
@@ -10,6 +10,7 @@ from app.models.consultation import Consultation
 from app.models.image import Image
 from app.models.practitioner import Practitioner
 from app.schemas.clinical_review import ClinicalReviewCreate, ClinicalReviewRead
+from app.services import similar_case_service
 
 
 async def create_review(
@@ -49,6 +50,7 @@ async def create_review(
     )
     db.add(review)
 
+    labelled_ids = []
     if data.is_final:
         # Propagate diagnosis to all consultation images (final = specialist)
         img_result = await db.execute(
@@ -57,6 +59,7 @@ async def create_review(
         for img in img_result.scalars().all():
             img.reviewed_label = data.diagnosis
             img.reviewed_as_final = True
+            labelled_ids.append(img.image_id)
 
         consultation.status = "CLOSED"
     elif consultation.status == "OPEN":
@@ -64,6 +67,7 @@ async def create_review(
 
     await db.commit()
     await db.refresh(review)
+    await similar_case_service.index_images(labelled_ids, db)
     return review
 
 
@@ -0,0 +1,181 @@
+"""
+Thumbnail and preview JPEGs of stored images, for list and review pages.
+
+Lists used to link every full-resolution original, several MB each. Once an
+upload is committed, both derivatives are rendered from the in-memory bytes
+on a dedicated pool (IMAGE_DERIVATIVE_WORKERS). Rendering is off the scan
+path and does not compete with the inference pool. The results are stored
+through the same storage backend as the original, and their URLs are
+written to the image row.
+
+Decoding uses JPEG draft mode: libjpeg scales by 1/2, 1/4 or 1/8 in the DCT
+domain down to the preview size, so a 12 MP photo never decodes at full size.
+Images with no derivatives yet, such as uploads from before this existed or
+jobs skipped because IMAGE_DERIVATIVE_MAX_PENDING were queued, are queued
+again the first time a list shows them. Their original is then fetched back
+from storage. A failed image is retried the same way once
+IMAGE_DERIVATIVE_RETRY_SECONDS have passed.
+"""
+
+import asyncio
+import io
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from uuid import UUID
+
+from PIL import Image as PILImage
+from PIL import ImageOps
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.models.image import Image
+from app.services import storage_service
+from app.services.prediction_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+SIZES = {"preview": settings.IMAGE_PREVIEW_PX, "thumbnail": settings.IMAGE_THUMBNAIL_PX}
+FOLDER = "dermoai/derivatives"
+
+_pool = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_DERIVATIVE_WORKERS, thread_name_prefix="derivatives"
+)
+# Image IDs queued or rendering
+_pending: set[UUID] = set()
+# Recently failed image IDs, skipped until their entry expires (the retry back-off)
+_failed = LRUCache(
+    max_size=settings.IMAGE_DERIVATIVE_MAX_FAILED,
+    ttl_seconds=settings.IMAGE_DERIVATIVE_RETRY_SECONDS,
+)
+_tasks: set[asyncio.Task] = set()
+_stats = {"generated": 0, "skipped": 0, "failed": 0, "original_bytes": 0, "derivative_bytes": 0}
+
+
+def render(data: bytes, sizes: dict[str, int] = SIZES, quality: int = 80) -> dict[str, bytes]:
+    """
+    Downscale an image to JPEGs whose longest side is at most each size.
+
+    Args:
+        data: Original image bytes (any format PIL reads).
+        sizes: Derivative name -> longest side in pixels.
+        quality: JPEG quality.
+
+    Returns:
+        Derivative name -> JPEG bytes.
+    """
+    img = PILImage.open(io.BytesIO(data))
+    largest = max(sizes.values())
+    img.draft("RGB", (largest, largest))
+    img = ImageOps.exif_transpose(img).convert("RGB")
+    out = {}
+    # Largest first, each one downscaled from the previous
+    for name, size in sorted(sizes.items(), key=lambda item: -item[1]):
+        img.thumbnail((size, size), PILImage.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=quality, optimize=True, progressive=True)
+        out[name] = buf.getvalue()
+    return out
+
+
+async def _store(image_id: UUID, data: bytes | None, url: str | None) -> None:
+    if data is None:
+        data = await storage_service.fetch_image(url)
+    loop = asyncio.get_running_loop()
+    rendered = await loop.run_in_executor(
+        _pool, render, data, SIZES, settings.IMAGE_DERIVATIVE_QUALITY
+    )
+    names = list(rendered)
+    stored = await asyncio.gather(
+        *(storage_service.upload_image(rendered[name], folder=FOLDER) for name in names),
+        return_exceptions=True,
+    )
+    uploaded = [result for result in stored if not isinstance(result, BaseException)]
+    if len(uploaded) < len(stored):
+        await _discard(uploaded)
+        raise next(result for result in stored if isinstance(result, BaseException))
+    values = {}
+    for name, result in zip(names, stored):
+        values[f"{name}_url"] = result["url"]
+        values[f"{name}_key"] = result["storage_key"]
+    async with async_session() as db:
+        updated = await db.execute(
+            update(Image)
+            .where(Image.image_id == image_id, Image.thumbnail_url.is_(None))
+            .values(**values)
+        )
+        await db.commit()
+    if updated.rowcount == 0:
+        # Deleted meanwhile, or another worker got there first
+        await _discard(uploaded)
+        return
+    _stats["generated"] += 1
+    _stats["original_bytes"] += len(data)
+    _stats["derivative_bytes"] += sum(len(b) for b in rendered.values())
+
+
+async def _discard(stored: list[dict]) -> None:
+    for result in stored:
+        await storage_service.delete_image(result["storage_key"])
+
+
+async def _run(image_id: UUID, data: bytes | None, url: str | None) -> None:
+    try:
+        await _store(image_id, data, url)
+    except Exception as e:
+        _failed.set(str(image_id), {"failed_at": time.time(), "error": str(e)})
+        _stats["failed"] += 1
+        logger.warning("Derivatives for image %s failed: %s", image_id, e)
+    finally:
+        _pending.discard(image_id)
+
+
+def _schedule(image_id: UUID, data: bytes | None, url: str | None) -> bool:
+    if image_id in _pending or _failed.get(str(image_id)) is not None:
+        return False
+    if len(_pending) >= settings.IMAGE_DERIVATIVE_MAX_PENDING:
+        _stats["skipped"] += 1
+        return False
+    _pending.add(image_id)
+    task = asyncio.create_task(_run(image_id, data, url))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return True
+
+
+def schedule(images: list[Image], contents: list[bytes]) -> None:
+    """Generate derivatives of just-committed images in the background from their bytes."""
+    for image, data in zip(images, contents):
+        _schedule(image.image_id, data, None)
+
+
+def ensure(images: list[Image]) -> None:
+    """Queue derivatives for listed images that have none yet (fetching their originals)."""
+    for image in images:
+        if image.thumbnail_url is None:
+            _schedule(image.image_id, None, image.image_url)
+
+
+async def delete(image: Image) -> None:
+    """Delete an image's stored derivatives."""
+    for key in (image.thumbnail_key, image.preview_key):
+        if key is not None:
+            await storage_service.delete_image(key)
+
+
+def stats() -> dict[str, int | float | None]:
+    ratio = (
+        round(_stats["original_bytes"] / _stats["derivative_bytes"], 1)
+        if _stats["derivative_bytes"]
+        else None
+    )
+    return {**_stats, "pending": len(_pending), "failed_tracked": len(_failed), "size_ratio": ratio}
+
+
+async def shutdown() -> None:
+    """Cancel queued derivative jobs (called on app shutdown); lists re-queue them later."""
+    for task in list(_tasks):
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    await asyncio.to_thread(_pool.shutdown, wait=True, cancel_futures=True)
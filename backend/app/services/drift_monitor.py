@@ -0,0 +1,237 @@
+"""
+Incremental prediction-drift monitor over live traffic.
+
+Every fresh prediction adds one count per histogram:
+- each class's probability, in DRIFT_BINS equal-width bins over [0, 1];
+- the served confidence, in the same bins;
+- the predicted class.
+
+Counts are kept in a ring of time slots (DRIFT_SLOT_SECONDS each) that covers
+the longest window, so memory is constant no matter the traffic. A window's
+histogram is the sum of its slots, and no raw predictions are stored.
+
+Each window is compared with a reference from the validation split, built by
+src/models/drift_reference.py and stored as drift_reference.json next to the
+model files. The comparison is the population stability index (PSI) per
+histogram. By convention PSI < 0.1 is stable, 0.1-0.25 a moderate shift and
+> 0.25 a significant one (DRIFT_PSI_WARNING / DRIFT_PSI_ALERT).
+
+The monitor is per process and restarts its windows when the model version
+changes.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+REFERENCE_FILE = "drift_reference.json"
+
+
+def bin_indices(values: np.ndarray, bins: int) -> np.ndarray:
+    """Equal-width bin index in [0, bins) for values in [0, 1]."""
+    return np.clip((np.asarray(values, dtype=np.float64) * bins).astype(np.int64), 0, bins - 1)
+
+
+def psi(reference: np.ndarray, current: np.ndarray, eps: float = 1e-4) -> float:
+    """Population stability index between two count histograms (empty bins floored at eps)."""
+    ref = np.maximum(reference / max(reference.sum(), 1), eps)
+    cur = np.maximum(current / max(current.sum(), 1), eps)
+    return float(np.sum((cur - ref) * np.log(cur / ref)))
+
+
+def reference_from_probabilities(
+    probabilities: np.ndarray, served: np.ndarray, class_names: list[str], bins: int
+) -> dict:
+    """
+    Reference histograms from a labelled split's model outputs.
+
+    Args:
+        probabilities: (N, num_classes) model probabilities.
+        served: (N,) served class index (argmax with the malignant override).
+        class_names: Class names in model output order.
+        bins: Histogram bins; must match DRIFT_BINS of the API.
+    """
+    probabilities = np.asarray(probabilities)
+    confidence = probabilities[np.arange(len(probabilities)), served]
+    return {
+        "n": int(len(probabilities)),
+        "bins": bins,
+        "class_names": class_names,
+        "class_probability": {
+            name: np.bincount(bin_indices(probabilities[:, i], bins), minlength=bins).tolist()
+            for i, name in enumerate(class_names)
+        },
+        "confidence": np.bincount(bin_indices(confidence, bins), minlength=bins).tolist(),
+        "predicted_class": dict(
+            zip(class_names, np.bincount(served, minlength=len(class_names)).tolist())
+        ),
+    }
+
+
+class DriftMonitor:
+    """Rolling, constant-memory histograms of served predictions, compared to a reference."""
+
+    def __init__(
+        self,
+        class_names: list[str],
+        bins: int = 10,
+        slot_seconds: int = 300,
+        windows_minutes: list[int] | None = None,
+        min_samples: int = 200,
+        psi_warning: float = 0.1,
+        psi_alert: float = 0.25,
+    ):
+        self.class_names = list(class_names)
+        self.bins = bins
+        self.slot_seconds = slot_seconds
+        self.windows_minutes = sorted(windows_minutes or [60, 1440])
+        self.min_samples = min_samples
+        self.psi_warning = psi_warning
+        self.psi_alert = psi_alert
+        n = len(self.class_names)
+        # One row per slot: [class probability bins (n*bins) | confidence bins | predicted class (n)]
+        self._confidence_offset = n * bins
+        self._predicted_offset = n * bins + bins
+        width = self._predicted_offset + n
+        slots = max(1, -(-max(self.windows_minutes) * 60 // slot_seconds))
+        self._counts = np.zeros((slots, width), dtype=np.int64)
+        self._slot_ids = np.full(slots, -1, dtype=np.int64)
+        self._class_offsets = np.arange(n, dtype=np.int64) * bins
+        self.model_version: str | None = None
+        self._reference: tuple[Path, float, dict] | None = None  # path, mtime, data
+        self._lock = threading.Lock()
+
+    def _slot(self, now: float) -> int:
+        slot_id = int(now // self.slot_seconds)
+        pos = slot_id % len(self._slot_ids)
+        if self._slot_ids[pos] != slot_id:
+            self._counts[pos] = 0
+            self._slot_ids[pos] = slot_id
+        return pos
+
+    def observe(
+        self,
+        probabilities: np.ndarray,
+        predicted_index: int,
+        confidence: float,
+        model_version: str,
+        now: float | None = None,
+    ) -> None:
+        """Add one served prediction to the current slot."""
+        bins = self.bins
+        probability_columns = self._class_offsets + np.minimum(
+            (np.asarray(probabilities) * bins).astype(np.int64), bins - 1
+        )
+        confidence_column = self._confidence_offset + min(int(confidence * bins), bins - 1)
+        predicted_column = self._predicted_offset + int(predicted_index)
+        now = time.time() if now is None else now
+        with self._lock:
+            if model_version != self.model_version:
+                self._counts[:] = 0
+                self._slot_ids[:] = -1
+                self.model_version = model_version
+            row = self._counts[self._slot(now)]
+            # Columns are distinct, so fancy-index increment counts each once
+            row[probability_columns] += 1
+            row[confidence_column] += 1
+            row[predicted_column] += 1
+
+    def _window(self, minutes: int, now: float) -> np.ndarray:
+        current = int(now // self.slot_seconds)
+        slots = -(-minutes * 60 // self.slot_seconds)
+        with self._lock:
+            live = (self._slot_ids > current - slots) & (self._slot_ids <= current)
+            return self._counts[live].sum(axis=0)
+
+    def load_reference(self, path: Path) -> dict | None:
+        """Reference histograms from path (re-read when the file changes); None if missing."""
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return None
+        cached = self._reference
+        if cached is not None and cached[0] == path and cached[1] == mtime:
+            return cached[2]
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        self._reference = (path, mtime, data)
+        return data
+
+    def _status(self, max_psi: float) -> str:
+        if max_psi > self.psi_alert:
+            return "drift"
+        if max_psi > self.psi_warning:
+            return "warning"
+        return "ok"
+
+    def _compare(self, counts: np.ndarray, reference: dict) -> dict:
+        n, bins = len(self.class_names), self.bins
+        class_psi = {
+            name: round(psi(
+                np.asarray(reference["class_probability"][name], dtype=np.float64),
+                counts[i * bins : (i + 1) * bins],
+            ), 4)
+            for i, name in enumerate(self.class_names)
+        }
+        confidence_psi = round(psi(
+            np.asarray(reference["confidence"], dtype=np.float64),
+            counts[self._confidence_offset : self._predicted_offset],
+        ), 4)
+        ref_predicted = np.array(
+            [reference["predicted_class"].get(name, 0) for name in self.class_names], dtype=np.float64
+        )
+        predicted_psi = round(psi(ref_predicted, counts[self._predicted_offset : self._predicted_offset + n]), 4)
+        return {
+            "predicted_class_psi": predicted_psi,
+            "confidence_psi": confidence_psi,
+            "class_probability_psi": class_psi,
+            "max_psi": max(predicted_psi, confidence_psi, *class_psi.values()),
+            "reference_frequency": dict(zip(
+                self.class_names, np.round(ref_predicted / max(ref_predicted.sum(), 1), 4).tolist()
+            )),
+        }
+
+    def report(self, reference: dict | None, now: float | None = None) -> list[dict]:
+        """One entry per window: sample count, class frequency and PSI scores with a status."""
+        now = time.time() if now is None else now
+        usable = (
+            reference is not None
+            and reference.get("bins") == self.bins
+            and reference.get("class_names") == self.class_names
+        )
+        windows = []
+        for minutes in self.windows_minutes:
+            counts = self._window(minutes, now)
+            n = int(counts[self._confidence_offset : self._predicted_offset].sum())
+            predicted = counts[self._predicted_offset :]
+            confidence = counts[self._confidence_offset : self._predicted_offset]
+            midpoints = (np.arange(self.bins) + 0.5) / self.bins
+            window = {
+                "window_minutes": minutes,
+                "n": n,
+                "mean_confidence": round(float(confidence @ midpoints / n), 4) if n else None,
+                "predicted_class_frequency": dict(
+                    zip(self.class_names, np.round(predicted / max(n, 1), 4).tolist())
+                ),
+            }
+            if reference is None:
+                window["status"] = "no_reference"
+            elif not usable:
+                window["status"] = "reference_mismatch"
+            else:
+                window.update(self._compare(counts, reference))
+                window["status"] = (
+                    "insufficient_data" if n < self.min_samples else self._status(window["max_psi"])
+                )
+            windows.append(window)
+        return windows
+
+    def max_psi(self, reference: dict | None) -> float | None:
+        """Largest PSI over the shortest window, or None without a usable reference or data."""
+        window = self.report(reference)[0]
+        if window["n"] < self.min_samples:
+            return None
+        return window.get("max_psi")
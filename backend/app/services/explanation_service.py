@@ -0,0 +1,136 @@
+"""
+Lazily computed, cached Grad-CAM explanations for stored images.
+
+Explanations are never computed on the scan path. The first request for an
+image computes one as a background job on the inference pool, behind any
+waiting scan (see ml_service.explain_async). The palette PNG overlay, a few
+KB, is stored in the image_explanations table keyed by image SHA-256, model
+version and explained condition. Lookups go to a per-process LRU first, then
+the table. The same photo uploaded twice therefore shares one explanation,
+and a new model version gets fresh ones. Concurrent requests for the same
+key in one process share a single computation.
+"""
+
+import asyncio
+import base64
+import logging
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.models.image import Image
+from app.models.image_explanation import ImageExplanation
+from app.services import ml_service, storage_service
+from app.services.prediction_cache import LRUCache, image_hash
+
+logger = logging.getLogger(__name__)
+
+_memory = LRUCache(
+    max_size=settings.EXPLANATION_CACHE_SIZE, ttl_seconds=settings.EXPLANATION_CACHE_TTL_SECONDS
+)
+_inflight: dict[str, asyncio.Task] = {}
+_stats = {"hits": 0, "db_hits": 0, "computed": 0}
+
+
+def _key(digest: str, model_version: str, condition: str) -> str:
+    return f"{digest}:{model_version}:{condition}"
+
+
+async def _lookup(digest: str, model_version: str, condition: str, db: AsyncSession) -> bytes | None:
+    overlay = _memory.get(_key(digest, model_version, condition))
+    if overlay is not None:
+        _stats["hits"] += 1
+        return overlay
+    overlay = await db.scalar(
+        select(ImageExplanation.overlay).where(
+            ImageExplanation.image_hash == digest,
+            ImageExplanation.model_version == model_version,
+            ImageExplanation.condition == condition,
+        )
+    )
+    if overlay is not None:
+        _stats["db_hits"] += 1
+        _memory.set(_key(digest, model_version, condition), overlay)
+    return overlay
+
+
+async def _compute(digest: str, condition: str, image_url: str, data: bytes | None) -> tuple[bytes, str]:
+    if data is None:
+        data = await storage_service.fetch_image(image_url)
+    overlay, model_version = await ml_service.explain_async(data, condition)
+    _stats["computed"] += 1
+    _memory.set(_key(digest, model_version, condition), overlay)
+    try:
+        async with async_session() as db:
+            await db.execute(
+                insert(ImageExplanation)
+                .values(image_hash=digest, model_version=model_version, condition=condition, overlay=overlay)
+                .on_conflict_do_nothing()
+            )
+            await db.commit()
+    except Exception as e:
+        logger.warning("Explanation cache write failed: %s", e)
+    return overlay, model_version
+
+
+async def _compute_once(
+    digest: str, model_version: str, condition: str, image_url: str, data: bytes | None
+) -> tuple[bytes, str]:
+    key = _key(digest, model_version, condition)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_compute(digest, condition, image_url, data))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # A client that disconnects does not cancel the work others are waiting on
+    return await asyncio.shield(task)
+
+
+async def get_explanation(image: Image, db: AsyncSession, condition: str | None = None) -> dict:
+    """
+    Grad-CAM overlay for an image, computed on first request and cached.
+
+    Args:
+        image: Stored image.
+        condition: Condition to explain; defaults to the image's predicted condition.
+
+    Returns:
+        Dict with image_id, condition, model_version, overlay (PNG data URL) and cached.
+    """
+    condition = condition or image.predicted_condition
+    if condition is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Image has no prediction to explain"
+        )
+    if condition not in ml_service.CLASS_NAMES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown condition {condition!r}"
+        )
+    model_version = ml_service.get_model_version()
+    data = None
+    if image.content_hash is None:
+        # Stored before uploads were hashed: hash it once and keep the hash
+        data = await storage_service.fetch_image(image.image_url)
+        image.content_hash = image_hash(data)
+        await db.commit()
+    overlay = await _lookup(image.content_hash, model_version, condition, db)
+    cached = overlay is not None
+    if overlay is None:
+        overlay, model_version = await _compute_once(
+            image.content_hash, model_version, condition, image.image_url, data
+        )
+    return {
+        "image_id": image.image_id,
+        "condition": condition,
+        "model_version": model_version,
+        "overlay": "data:image/png;base64," + base64.b64encode(overlay).decode("ascii"),
+        "cached": cached,
+    }
+
+
+def stats() -> dict[str, int]:
+    return {**_stats, "size": len(_memory), "in_flight": len(_inflight)}
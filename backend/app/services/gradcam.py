@@ -0,0 +1,79 @@
+"""
+Grad-CAM saliency maps for the triage model and their compressed overlays.
+
+Grad-CAM weights the last convolutional feature map (7x7 for MobileNetV2
+at 224x224) by the gradient of the class score with respect to it. The result
+is a coarse map of the regions that drove that class. Gradients need the
+Keras model; TFLite and ONNX files have no backward pass, so when those
+backends serve, explanations load the Keras file of the same version.
+
+The map is rendered as a colour-mapped RGBA PNG at the model input size. It
+is transparent where the map is cold, so clients can draw it over the photo.
+Palette quantisation keeps it to a few KB.
+"""
+
+import io
+
+import numpy as np
+from PIL import Image
+
+
+def _jet() -> np.ndarray:
+    """256-entry blue-cyan-yellow-red colour map as uint8 (256, 3)."""
+    x = np.linspace(0.0, 1.0, 256)
+    rgb = np.stack([
+        np.clip(1.5 - np.abs(4.0 * x - 3.0), 0, 1),
+        np.clip(1.5 - np.abs(4.0 * x - 2.0), 0, 1),
+        np.clip(1.5 - np.abs(4.0 * x - 1.0), 0, 1),
+    ], axis=1)
+    return (rgb * 255).astype(np.uint8)
+
+
+_COLORMAP = _jet()
+
+
+def last_conv_layer(model):
+    """Last top-level layer with a 4-D (N, H, W, C) output, e.g. the MobileNetV2 base."""
+    for layer in reversed(getattr(model, "layers", [])):
+        shape = getattr(layer, "output", None) is not None and layer.output.shape
+        if shape and len(shape) == 4:
+            return layer
+    raise ValueError("Model has no convolutional feature map to explain")
+
+
+class GradCAM:
+    """Grad-CAM for a Keras classifier with (N, 224, 224, 3) float input."""
+
+    def __init__(self, model):
+        import keras
+
+        conv = last_conv_layer(model)
+        self._model = keras.Model(inputs=model.inputs, outputs=[conv.output, model.outputs[0]])
+
+    def heatmap(self, x: np.ndarray, class_index: int) -> np.ndarray:
+        """(h, w) map in [0, 1] for one preprocessed float32 (1, 224, 224, 3) image."""
+        import tensorflow as tf
+
+        inputs = tf.convert_to_tensor(x)
+        with tf.GradientTape() as tape:
+            features, probs = self._model(inputs, training=False)
+            score = probs[:, class_index]
+        grads = tape.gradient(score, features)
+        weights = tf.reduce_mean(grads, axis=(1, 2), keepdims=True)
+        cam = tf.nn.relu(tf.reduce_sum(features * weights, axis=-1))[0].numpy()
+        peak = cam.max()
+        return cam / peak if peak > 0 else cam
+
+
+def overlay_png(heatmap: np.ndarray, size: tuple[int, int], max_alpha: float = 0.6) -> bytes:
+    """Colour-mapped RGBA PNG of a [0, 1] heatmap, upsampled to size; alpha grows with heat."""
+    # 2-D uint8 is read as "L" and (H, W, 4) uint8 as "RGBA" (fromarray's mode= is deprecated)
+    small = Image.fromarray((np.clip(heatmap, 0.0, 1.0) * 255).astype(np.uint8))
+    heat = np.asarray(small.resize(size, Image.BILINEAR))
+    rgba = np.empty((*heat.shape, 4), dtype=np.uint8)
+    rgba[..., :3] = _COLORMAP[heat]
+    rgba[..., 3] = (heat.astype(np.float32) * max_alpha).astype(np.uint8)
+    img = Image.fromarray(rgba).quantize(colors=64, method=Image.Quantize.FASTOCTREE)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
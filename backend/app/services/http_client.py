@@ -0,0 +1,128 @@
+"""
+Shared async HTTP client for fetching remote images (e.g. Cloudinary or S3 URLs of stored images).
+
+One pooled httpx.AsyncClient per process keeps connections alive across
+requests; a semaphore per host caps concurrent fetches to the same origin,
+and bodies are streamed and abandoned as soon as they exceed the size cap,
+so a huge or hostile URL never ties up memory or an inference worker.
+"""
+
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import HTTPException, status
+
+from app.core import metrics
+from app.core.config import settings
+
+
+class RemoteImageClient:
+    """Pooled, per-host-limited, size-capped image downloader."""
+
+    def __init__(
+        self,
+        max_connections: int = 32,
+        max_per_host: int = 8,
+        max_bytes: int = 20 * 1024 * 1024,
+        timeout_seconds: float = 30.0,
+    ):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.max_bytes = max_bytes
+        self.timeout_seconds = timeout_seconds
+        self._client: httpx.AsyncClient | None = None
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self.fetched = 0
+        self.bytes_fetched = 0
+        self.errors = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=httpx.Timeout(self.timeout_seconds),
+                follow_redirects=True,
+            )
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return limit
+
+    def _too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Remote image exceeds {self.max_bytes} bytes",
+        )
+
+    async def fetch(self, url: str) -> bytes:
+        """
+        Download a URL into memory.
+
+        Raises 413 if the body exceeds max_bytes (checked against
+        Content-Length first, then while streaming) and 502 if the remote
+        server fails or returns an error status.
+        """
+        async with self._host_limit(url):
+            try:
+                async with self._get_client().stream("GET", url) as resp:
+                    resp.raise_for_status()
+                    length = resp.headers.get("content-length")
+                    if length is not None and int(length) > self.max_bytes:
+                        raise self._too_large()
+                    buf = bytearray()
+                    async for chunk in resp.aiter_bytes():
+                        buf += chunk
+                        if len(buf) > self.max_bytes:
+                            raise self._too_large()
+            except httpx.HTTPError as e:
+                self.errors += 1
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=f"Could not fetch image: {e}",
+                )
+        self.fetched += 1
+        self.bytes_fetched += len(buf)
+        return bytes(buf)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "fetched": self.fetched,
+            "bytes_fetched": self.bytes_fetched,
+            "errors": self.errors,
+            "hosts": len(self._host_limits),
+        }
+
+
+remote_images = RemoteImageClient(
+    max_connections=settings.HTTP_MAX_CONNECTIONS,
+    max_per_host=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+    max_bytes=settings.REMOTE_IMAGE_MAX_BYTES,
+    timeout_seconds=settings.HTTP_TIMEOUT_SECONDS,
+)
+
+
+_fetch_seconds = metrics.SCAN_STAGE_SECONDS.labels("fetch")
+
+
+async def fetch_image(url: str) -> bytes:
+    """Fetch a remote image through the shared client."""
+    start = time.perf_counter()
+    try:
+        return await remote_images.fetch(url)
+    finally:
+        _fetch_seconds.observe(time.perf_counter() - start)
@@ -1,12 +1,85 @@
+import asyncio
+import logging
+from collections.abc import Awaitable
 from datetime import datetime
+from typing import TypeVar
 from uuid import UUID
 
 from fastapi import HTTPException, UploadFile, status
 from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.models.image import Image
-from app.services import cloudinary_service, consultation_service, ml_service, notification_service
+from app.services import (
+    consultation_service,
+    derivative_service,
+    explanation_service,
+    ml_service,
+    notification_service,
+    similar_case_service,
+    storage_service,
+    upload_service,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Strong references to stored-then-discarded uploads still being deleted
+_discards: set[asyncio.Task] = set()
+
+
+async def _discard_stored(stored: list[dict]) -> None:
+    for result in stored:
+        try:
+            await storage_service.delete_image(result["storage_key"])
+        except Exception as e:
+            logger.warning("Could not delete discarded upload %s: %s", result["storage_key"], e)
+
+
+def _discard_when_done(uploads: asyncio.Future) -> None:
+    """Delete whatever the uploads stored once they finish, without waiting for them."""
+
+    def discard(done: asyncio.Future) -> None:
+        if done.cancelled():
+            return
+        stored = [r for r in done.result() if not isinstance(r, BaseException)]
+        if stored:
+            task = asyncio.create_task(_discard_stored(stored))
+            _discards.add(task)
+            task.add_done_callback(_discards.discard)
+
+    uploads.add_done_callback(discard)
+
+
+async def _store_while_predicting(
+    uploads: list[upload_service.UploadedImage], prediction: Awaitable[T]
+) -> tuple[list[dict], T]:
+    """
+    Upload images to storage while the model predicts them from the same bytes.
+
+    Scan latency is max(upload, inference) instead of their sum. If the
+    prediction fails (quality gate, full inference queue) the caller gets the
+    error right away and the uploads are deleted once they land, so a retake
+    is not held up and nothing is orphaned. Likewise, if one upload of a batch
+    fails, the others are deleted.
+    """
+    storing = asyncio.gather(
+        *(storage_service.upload_image(u.data, content_hash=u.content_hash) for u in uploads),
+        return_exceptions=True,
+    )
+    try:
+        predicted = await prediction
+    except BaseException:
+        _discard_when_done(storing)
+        raise
+    stored = await storing
+    errors = [r for r in stored if isinstance(r, BaseException)]
+    if errors:
+        await _discard_stored([r for r in stored if not isinstance(r, BaseException)])
+        raise errors[0]
+    return stored, predicted
 
 
 async def quick_scan(
@@ -15,19 +88,26 @@ async def quick_scan(
     user_id: UUID | None = None,
     consent_to_reuse: bool = False,
 ) -> dict:
-    upload_result = await cloudinary_service.upload_image(file)
-    prediction = ml_service.predict_with_details(upload_result["url"])
-    condition = prediction["predicted_condition"]
-    confidence = prediction["confidence"]
-    urgency = prediction["urgency"]
+    # Predict from the uploaded bytes while they are stored, rather than
+    # re-downloading from storage afterwards
+    async with upload_service.read_uploads([file]) as (upload,):
+        (upload_result,), prediction = await _store_while_predicting(
+            [upload], ml_service.predict_async(upload.data, upload.content_hash)
+        )
+    condition = prediction.predicted_condition
+    confidence = round(prediction.confidence, 4)
+    urgency = prediction.urgency
 
     image = Image(
         uploaded_by=user_id,
         image_url=upload_result["url"],
         storage_key=upload_result["storage_key"],
+        content_hash=upload.content_hash,
         file_size=upload_result["file_size"],
         predicted_condition=condition,
         confidence=confidence,
+        model_version=prediction.model_version,
+        embedding=prediction.embedding_bytes,
         source="QUICK_SCAN",
         allowed_review=False,
         consultation_id=None,
@@ -36,6 +116,7 @@ async def quick_scan(
     db.add(image)
     await db.commit()
     await db.refresh(image)
+    derivative_service.schedule([image], [upload.data])
 
     return {
         "image_id": image.image_id,
@@ -56,25 +137,33 @@ async def upload_to_consultation(
     # Verify consultation exists
     await consultation_service.get_consultation(consultation_id, db)
 
-    upload_result = await cloudinary_service.upload_image(file)
-    prediction = ml_service.predict_with_details(upload_result["url"])
-    condition = prediction["predicted_condition"]
-    confidence = prediction["confidence"]
+    # Predict from the uploaded bytes while they are stored, rather than
+    # re-downloading from storage afterwards
+    async with upload_service.read_uploads([file]) as (upload,):
+        (upload_result,), prediction = await _store_while_predicting(
+            [upload], ml_service.predict_async(upload.data, upload.content_hash)
+        )
+    condition = prediction.predicted_condition
+    confidence = round(prediction.confidence, 4)
 
     image = Image(
         consultation_id=consultation_id,
         uploaded_by=user_id,
         image_url=upload_result["url"],
         storage_key=upload_result["storage_key"],
+        content_hash=upload.content_hash,
         file_size=upload_result["file_size"],
         predicted_condition=condition,
         confidence=confidence,
+        model_version=prediction.model_version,
+        embedding=prediction.embedding_bytes,
         source="CONSULTATION",
         allowed_review=True,
     )
     db.add(image)
     await db.commit()
     await db.refresh(image)
+    derivative_service.schedule([image], [upload.data])
 
     # Re-aggregate consultation ML results
     consultation = await consultation_service.update_ml_results(consultation_id, db)
@@ -85,6 +174,116 @@ async def upload_to_consultation(
     return image
 
 
+async def _read_and_predict(
+    files: list[UploadFile],
+) -> tuple[list[upload_service.UploadedImage], list[dict], list]:
+    """Stream-read all files and predict them as one batch while they upload."""
+    if not files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="No files uploaded"
+        )
+    if len(files) > settings.UPLOAD_MAX_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.UPLOAD_MAX_FILES} files per request",
+        )
+    async with upload_service.read_uploads(files) as uploads:
+        stored, predictions = await _store_while_predicting(
+            uploads,
+            ml_service.predict_many_async(
+                [upload.data for upload in uploads], [upload.content_hash for upload in uploads]
+            ),
+        )
+    # The bytes live on only until their derivatives are rendered
+    return uploads, stored, predictions
+
+
+async def quick_scan_batch(
+    files: list[UploadFile],
+    db: AsyncSession,
+    user_id: UUID | None = None,
+    consent_to_reuse: bool = False,
+) -> list[dict]:
+    """Quick scan of several images: one forward pass, one bulk insert."""
+    uploads, stored, predictions = await _read_and_predict(files)
+
+    images = [
+        Image(
+            uploaded_by=user_id,
+            image_url=upload_result["url"],
+            storage_key=upload_result["storage_key"],
+            content_hash=upload.content_hash,
+            file_size=upload_result["file_size"],
+            predicted_condition=prediction.predicted_condition,
+            confidence=round(prediction.confidence, 4),
+            model_version=prediction.model_version,
+            embedding=prediction.embedding_bytes,
+            source="QUICK_SCAN",
+            allowed_review=False,
+            consultation_id=None,
+            consent_to_reuse=consent_to_reuse,
+        )
+        for upload, upload_result, prediction in zip(uploads, stored, predictions)
+    ]
+    db.add_all(images)
+    await db.commit()
+    derivative_service.schedule(images, [upload.data for upload in uploads])
+
+    return [
+        {
+            "image_id": image.image_id,
+            "image_url": image.image_url,
+            "predicted_condition": image.predicted_condition,
+            "confidence": image.confidence,
+            "urgency": prediction.urgency,
+            "consent_to_reuse": image.consent_to_reuse,
+        }
+        for image, prediction in zip(images, predictions)
+    ]
+
+
+async def upload_batch_to_consultation(
+    files: list[UploadFile],
+    consultation_id: UUID,
+    user_id: UUID,
+    db: AsyncSession,
+) -> list[Image]:
+    """Upload several images to a consultation and re-aggregate its ML results once."""
+    # Verify consultation exists
+    await consultation_service.get_consultation(consultation_id, db)
+
+    uploads, stored, predictions = await _read_and_predict(files)
+
+    images = [
+        Image(
+            consultation_id=consultation_id,
+            uploaded_by=user_id,
+            image_url=upload_result["url"],
+            storage_key=upload_result["storage_key"],
+            content_hash=upload.content_hash,
+            file_size=upload_result["file_size"],
+            predicted_condition=prediction.predicted_condition,
+            confidence=round(prediction.confidence, 4),
+            model_version=prediction.model_version,
+            embedding=prediction.embedding_bytes,
+            source="CONSULTATION",
+            allowed_review=True,
+        )
+        for upload, upload_result, prediction in zip(uploads, stored, predictions)
+    ]
+    db.add_all(images)
+    await db.commit()
+    derivative_service.schedule(images, [upload.data for upload in uploads])
+
+    # Re-aggregate consultation ML results
+    consultation = await consultation_service.update_ml_results(consultation_id, db)
+
+    if consultation.urgency == "URGENT":
+        await notification_service.notify_urgent_case(consultation, db)
+
+    return images
+
+
 async def attach_to_consultation(
     image_id: UUID, consultation_id: UUID, db: AsyncSession
 ) -> Image:
@@ -113,6 +312,15 @@ async def attach_to_consultation(
     return image
 
 
+async def find_similar(image_id: UUID, k: int, db: AsyncSession) -> list[dict]:
+    return await similar_case_service.find_similar(image_id, k, db)
+
+
+async def get_explanation(image_id: UUID, db: AsyncSession, condition: str | None = None) -> dict:
+    image = await get_image(image_id, db)
+    return await explanation_service.get_explanation(image, db, condition)
+
+
 async def get_image(image_id: UUID, db: AsyncSession) -> Image:
     result = await db.execute(select(Image).where(Image.image_id == image_id))
     image = result.scalar_one_or_none()
@@ -181,7 +389,9 @@ async def list_unreviewed(
         .offset(skip)
         .limit(limit)
     )
-    return list(result.scalars().all()), total
+    items = list(result.scalars().all())
+    derivative_service.ensure(items)
+    return items, total
 
 
 async def list_reviewed(
@@ -200,7 +410,9 @@ async def list_reviewed(
         .offset(skip)
         .limit(limit)
     )
-    return list(result.scalars().all()), total
+    items = list(result.scalars().all())
+    derivative_service.ensure(items)
+    return items, total
 
 
 async def list_all(
@@ -233,7 +445,9 @@ async def list_all(
     if criteria:
         list_query = list_query.where(*criteria)
     result = await db.execute(list_query)
-    return list(result.scalars().all()), total
+    items = list(result.scalars().all())
+    derivative_service.ensure(items)
+    return items, total
 
 
 async def update_reviewed_label(
@@ -251,6 +465,7 @@ async def update_reviewed_label(
         image.allowed_review = True  # Ensure consultation images are marked allowed
     await db.commit()
     await db.refresh(image)
+    await similar_case_service.index_images([image.image_id], db)
     return image
 
 
@@ -258,10 +473,12 @@ async def delete_image(image_id: UUID, db: AsyncSession) -> None:
     image = await get_image(image_id, db)
     consultation_id = image.consultation_id
 
-    cloudinary_service.delete_image(image.storage_key)
+    await storage_service.delete_image(image.storage_key)
+    await derivative_service.delete(image)
 
     await db.delete(image)
     await db.commit()
+    similar_case_service.remove_image(image_id)
 
     # Re-aggregate if image was part of a consultation
     if consultation_id:
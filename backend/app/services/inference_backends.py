@@ -0,0 +1,202 @@
+"""
+Pluggable inference backends for the triage model.
+
+All backends take a float32 batch of shape (N, 224, 224, 3) in [0, 1] and
+return (N, num_classes) probabilities. predict_with_embeddings() also returns
+the pooled penultimate-layer features (N, embedding_dim) from the same forward
+pass, or None when the model file does not expose them. Selected by
+INFERENCE_BACKEND:
+
+- keras:  models/final/best_model.keras (or dermoai_final_model.keras)
+- tflite: models/final/best_model_<INFERENCE_TFLITE_QUANTIZATION>.tflite
+- onnx:   models/final/best_model.onnx (ONNX Runtime, CPU)
+
+TFLite/ONNX files are produced by src/models/export.py. Runtimes are imported
+lazily so only the selected backend's dependency needs to be installed.
+"""
+
+import threading
+from pathlib import Path
+
+import numpy as np
+
+BACKENDS = ("keras", "tflite", "onnx")
+
+
+def _split_outputs(outputs: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray | None]:
+    """(probabilities, embeddings) from a model's outputs; the embedding is the wider one."""
+    if len(outputs) == 1:
+        return outputs[0], None
+    probs, embeddings = sorted(outputs[:2], key=lambda out: out.shape[-1])
+    return probs, embeddings
+
+
+def embedding_model(model):
+    """Keras model with (probabilities, global-average-pooled features) outputs, or None."""
+    import keras
+
+    pooled = [
+        layer for layer in getattr(model, "layers", [])
+        if type(layer).__name__.startswith("GlobalAveragePooling")
+    ]
+    if not pooled:
+        return None
+    return keras.Model(inputs=model.inputs, outputs=[model.outputs[0], pooled[-1].output])
+
+
+class KerasBackend:
+    name = "keras"
+
+    def __init__(self, path: Path):
+        import keras
+
+        self.path = path
+        # compile=False avoids needing the training loss (e.g. focal_loss_fixed)
+        self.model = keras.models.load_model(path, compile=False)
+        self._with_embeddings = embedding_model(self.model)
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return self.model.predict(batch, verbose=0)
+
+    def predict_with_embeddings(self, batch: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+        if self._with_embeddings is None:
+            return self.predict(batch), None
+        probs, embeddings = self._with_embeddings.predict(batch, verbose=0)
+        return probs, embeddings
+
+
+class _TFLiteInterpreter:
+    """One interpreter with its tensors allocated for a fixed batch size."""
+
+    def __init__(self, interpreter_cls, path: Path, num_threads: int | None, batch_size: int):
+        self.interpreter = interpreter_cls(model_path=str(path), num_threads=num_threads)
+        details = self.interpreter.get_input_details()[0]
+        if int(details["shape"][0]) != batch_size:
+            self.interpreter.resize_tensor_input(
+                details["index"], [batch_size, *details["shape"][1:]]
+            )
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.outputs = self.interpreter.get_output_details()
+        # An Interpreter instance is not safe to invoke from several threads
+        self.lock = threading.Lock()
+
+
+class TFLiteBackend:
+    """
+    TFLite interpreters, one per batch size in batch_sizes (the warmup sizes).
+
+    Resizing an interpreter reallocates its tensor arena, so instead a batch
+    is zero-padded up to the smallest allocated size that holds it. Batches
+    larger than the largest size run in chunks of that size. Each size has its
+    own lock, so single scans and micro-batches do not wait for each other.
+    """
+
+    name = "tflite"
+
+    def __init__(self, path: Path, num_threads: int | None = None, batch_sizes: list[int] | None = None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+
+        self.path = path
+        if not batch_sizes:
+            probe = Interpreter(model_path=str(path))
+            batch_sizes = [max(1, int(probe.get_input_details()[0]["shape"][0]))]
+        self.batch_sizes = sorted({int(size) for size in batch_sizes if size > 0})
+        self._interpreters = {
+            size: _TFLiteInterpreter(Interpreter, path, num_threads, size) for size in self.batch_sizes
+        }
+
+    def _read(self, interpreter: _TFLiteInterpreter, output: dict) -> np.ndarray:
+        out = interpreter.interpreter.get_tensor(output["index"])
+        scale, zero_point = output["quantization"]
+        if output["dtype"] in (np.int8, np.uint8) and scale:
+            out = (out.astype(np.float32) - zero_point) * scale
+        return out.astype(np.float32, copy=False)
+
+    def _invoke(self, batch: np.ndarray) -> list[np.ndarray]:
+        n = len(batch)
+        size = next((size for size in self.batch_sizes if size >= n), self.batch_sizes[-1])
+        if n < size:
+            batch = np.concatenate([batch, np.zeros((size - n, *batch.shape[1:]), dtype=batch.dtype)])
+        interpreter = self._interpreters[size]
+        x = batch
+        scale, zero_point = interpreter.input["quantization"]
+        if interpreter.input["dtype"] in (np.int8, np.uint8) and scale:
+            info = np.iinfo(interpreter.input["dtype"])
+            x = np.clip(np.round(batch / scale + zero_point), info.min, info.max)
+        with interpreter.lock:
+            interpreter.interpreter.set_tensor(interpreter.input["index"], x.astype(interpreter.input["dtype"]))
+            interpreter.interpreter.invoke()
+            outputs = [self._read(interpreter, output) for output in interpreter.outputs]
+        return [out[:n] for out in outputs]
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return self.predict_with_embeddings(batch)[0]
+
+    def predict_with_embeddings(self, batch: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+        largest = self.batch_sizes[-1]
+        if len(batch) <= largest:
+            return _split_outputs(self._invoke(batch))
+        chunks = [self._invoke(batch[i : i + largest]) for i in range(0, len(batch), largest)]
+        return _split_outputs([np.concatenate(parts) for parts in zip(*chunks)])
+
+
+class ONNXBackend:
+    name = "onnx"
+
+    def __init__(self, path: Path, num_threads: int | None = None):
+        import onnxruntime as ort
+
+        self.path = path
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self._session = ort.InferenceSession(
+            str(path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_name = self._session.get_inputs()[0].name
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return self.predict_with_embeddings(batch)[0]
+
+    def predict_with_embeddings(self, batch: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+        outputs = self._session.run(None, {self._input_name: batch.astype(np.float32, copy=False)})
+        return _split_outputs(outputs)
+
+
+def model_path(backend: str, model_dir: Path, tflite_quantization: str = "float16") -> Path:
+    """Resolve the model file for a backend, raising FileNotFoundError if missing."""
+    if backend == "keras":
+        candidates = [model_dir / "best_model.keras", model_dir / "dermoai_final_model.keras"]
+    elif backend == "tflite":
+        candidates = [model_dir / f"best_model_{tflite_quantization}.tflite"]
+    elif backend == "onnx":
+        candidates = [model_dir / "best_model.onnx"]
+    else:
+        raise ValueError(f"Unknown inference backend {backend!r}; expected one of {BACKENDS}")
+    for path in candidates:
+        if path.exists():
+            return path
+    names = " or ".join(p.name for p in candidates)
+    raise FileNotFoundError(f"Model not found. Place {names} in {model_dir}")
+
+
+def load_backend(
+    backend: str, path: Path, num_threads: int | None = None, batch_sizes: list[int] | None = None
+):
+    """
+    Instantiate the backend for an already-resolved model file.
+
+    batch_sizes are the sizes the caller warms up; TFLite allocates an
+    interpreter for each and pads other batches up to one of them.
+    """
+    if backend == "keras":
+        return KerasBackend(path)
+    if backend == "tflite":
+        return TFLiteBackend(path, num_threads=num_threads, batch_sizes=batch_sizes)
+    if backend == "onnx":
+        return ONNXBackend(path, num_threads=num_threads)
+    raise ValueError(f"Unknown inference backend {backend!r}; expected one of {BACKENDS}")
@@ -0,0 +1,160 @@
+"""
+Dedicated, bounded thread pool for model inference.
+
+Image decode, preprocessing and the forward pass are CPU-bound and release
+the GIL inside PIL/NumPy/TensorFlow, so running them here keeps the asyncio
+event loop responsive (websocket pings, logins) while scans are in progress.
+
+Jobs have two priorities. Live jobs (scans) are always picked up first.
+Background jobs (explanation maps, bulk re-scoring) only run when no live job
+is waiting. At most max_background of them run at once, which by default
+leaves one worker free for live scans.
+
+With a single worker there is no worker to spare. max_background is then 0,
+and background jobs run one at a time on a dedicated extra thread. A scan
+never queues behind a Grad-CAM pass; the two share the CPU instead.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+from fastapi import HTTPException, status
+
+
+class InferenceExecutor:
+    """Two-priority thread pool with an awaitable API, a queue limit and depth counters."""
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 64, max_background: int | None = None):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.max_background = max_background or self.max_workers - 1
+        self._cond = threading.Condition()
+        self._live: deque[tuple[Future, Callable, tuple]] = deque()
+        self._background: deque[tuple[Future, Callable, tuple]] = deque()
+        # Threads start on first use, so importing this before a fork is safe
+        self._threads: list[threading.Thread] = []
+        self._background_thread: threading.Thread | None = None
+        self._idle = 0
+        self._active = 0
+        self._background_active = 0
+        self._shutdown = False
+
+    @property
+    def queue_depth(self) -> int:
+        """Live jobs submitted but not yet picked up by a worker thread."""
+        return len(self._live)
+
+    @property
+    def active(self) -> int:
+        """Jobs currently running on a worker thread."""
+        return self._active
+
+    def _next(self, background_only: bool) -> tuple[tuple[Future, Callable, tuple], bool] | None:
+        """Next job to run and whether it is a background job; called with the lock held."""
+        while not self._shutdown:
+            if background_only:
+                if self._background and self._background_active == 0:
+                    return self._background.popleft(), True
+                self._cond.wait()
+                continue
+            if self._live:
+                return self._live.popleft(), False
+            if self._background and self._background_active < self.max_background:
+                return self._background.popleft(), True
+            self._idle += 1
+            self._cond.wait()
+            self._idle -= 1
+        return None
+
+    def _worker(self, background_only: bool = False) -> None:
+        while True:
+            with self._cond:
+                item = self._next(background_only)
+                if item is None:
+                    return
+                (future, fn, args), background = item
+                self._active += 1
+                if background:
+                    self._background_active += 1
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    if background:
+                        self._background_active -= 1
+                        # A queued background job may now be allowed to start
+                        self._cond.notify_all()
+
+    def _submit(self, fn: Callable, args: tuple, background: bool, reject_when_full: bool) -> Future:
+        future: Future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            queue = self._background if background else self._live
+            if reject_when_full and len(queue) >= self.max_queue:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Inference queue is full, please retry shortly",
+                )
+            queue.append((future, fn, args))
+            if background and self.max_background == 0:
+                if self._background_thread is None:
+                    self._background_thread = threading.Thread(
+                        target=self._worker, args=(True,), name="inference_background", daemon=True
+                    )
+                    self._background_thread.start()
+            else:
+                waiting = len(self._live) + (len(self._background) if self.max_background else 0)
+                if waiting > self._idle and len(self._threads) < self.max_workers:
+                    thread = threading.Thread(
+                        target=self._worker, name=f"inference_{len(self._threads)}", daemon=True
+                    )
+                    self._threads.append(thread)
+                    thread.start()
+            # Wake every waiter: the background thread and the workers take different jobs
+            self._cond.notify_all()
+        return future
+
+    async def run(
+        self, fn: Callable, *args: Any, reject_when_full: bool = True, background: bool = False
+    ) -> Any:
+        """
+        Run fn(*args) on the pool and await its result.
+
+        Raises 503 when the queue is full so callers back off instead of
+        piling up unbounded work; internal follow-up jobs (e.g. a batch
+        forward pass whose callers were already admitted) pass
+        reject_when_full=False. Background jobs have their own queue and
+        limit and never delay a live job that is waiting.
+        """
+        return await asyncio.wrap_future(self._submit(fn, args, background, reject_when_full))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "workers": self.max_workers,
+            "max_background": self.max_background,
+            "max_queue": self.max_queue,
+            "queue_depth": len(self._live),
+            "active": self._active,
+            "background_queued": len(self._background),
+            "background_active": self._background_active,
+        }
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._shutdown = True
+            pending = [*self._live, *self._background]
+            self._live.clear()
+            self._background.clear()
+            self._cond.notify_all()
+        for future, _, _ in pending:
+            future.cancel()
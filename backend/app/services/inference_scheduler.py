@@ -0,0 +1,130 @@
+"""
+Dynamic micro-batching for model inference.
+
+Concurrent requests submit single preprocessed images; a background task
+collects them into batches (up to max_batch_size, waiting at most
+max_wait_ms for the batch to fill), runs one forward pass and resolves each
+caller's future with its own row of predictions. A row is whatever predict_fn
+returns per image; ml_service's is a (probabilities, embedding, model_version)
+triple.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Generic, TypeVar
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Row = TypeVar("Row")
+
+
+class BatchScheduler(Generic[Row]):
+    """Queue-based micro-batcher around a batch predict function."""
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], Sequence[Row]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        runner: Callable[..., Awaitable[Sequence[Row]]] | None = None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self._predict_fn = predict_fn
+        # Awaitable that runs predict_fn off the event loop; defaults to asyncio.to_thread
+        self._runner = runner or asyncio.to_thread
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(max_wait_ms, 0.0) / 1000.0
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.batches_run = 0
+        self.items_run = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of images waiting to be batched."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and self._loop is loop and not self._worker.done():
+            return
+        # (Re)bind to the running loop, e.g. after a restart or in a new asyncio.run()
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._worker = loop.create_task(self._run())
+
+    async def submit(self, x: np.ndarray) -> Row:
+        """
+        Queue one preprocessed image and wait for its predictions.
+
+        Args:
+            x: Image tensor of shape (H, W, C) or (1, H, W, C).
+
+        Returns:
+            This image's row of predict_fn's output, e.g. ml_service's
+            (probabilities, embedding, model_version) triple.
+        """
+        if x.ndim == 4:
+            x = x[0]
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((x, future))
+        return await future
+
+    async def _collect(self) -> list[tuple[np.ndarray, asyncio.Future]]:
+        """Wait for the first item, then fill the batch until full or max_wait elapses."""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            batch = [(x, fut) for x, fut in batch if not fut.cancelled()]
+            if not batch:
+                continue
+            inputs = np.stack([x for x, _ in batch])
+            try:
+                preds = await self._runner(self._predict_fn, inputs)
+            except Exception as e:
+                logger.exception("Batched inference failed for %d images", len(batch))
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            self.batches_run += 1
+            self.items_run += len(batch)
+            for (_, fut), row in zip(batch, preds):
+                if not fut.done():
+                    fut.set_result(row)
+
+    async def close(self) -> None:
+        """Stop the batching task; pending callers receive CancelledError."""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        while self._queue is not None and not self._queue.empty():
+            _, fut = self._queue.get_nowait()
+            fut.cancel()
+        self._worker = None
@@ -0,0 +1,348 @@
+"""
+Out-of-process inference worker pool (INFERENCE_PROCESSES > 0).
+
+Run next to the API instead of loading the model in every uvicorn worker:
+
+    python -m app.services.inference_server      # INFERENCE_PROCESSES workers
+    uvicorn app.main:app --workers 8
+
+The parent process loads and warms the model once, then forks a fixed pool
+of worker processes. Weights are never written after loading, so the
+workers share the parent's pages copy-on-write instead of holding a copy
+each. Runtimes are limited to one thread per worker, because thread pools
+created before fork do not survive in the children; parallelism comes from
+the processes. TensorFlow is not fork-safe, so with the Keras backend each
+worker loads its own copy after fork. Use TFLite or ONNX to share weights.
+
+API processes still decode, preprocess and micro-batch. Each forward pass is
+sent as a uint8 batch over a Unix socket (INFERENCE_SOCKET). The listening
+socket's accept queue is the shared IPC queue: whichever worker is idle takes
+the next batch. API concurrency (uvicorn workers x INFERENCE_WORKERS) thus
+scales separately from model memory. Grad-CAM explanations run in the
+workers too, so API processes never load Keras; with TFLite or ONNX a worker
+loads the Keras file on its first explanation.
+
+Activating a model version writes models/versions/ACTIVE. The parent sees
+the change, loads the new version and replaces the workers one at a time:
+each old worker is retired only once its replacement has the model loaded.
+If the version fails to load, the pool keeps serving the current one and
+the pointer is put back.
+
+    python -m app.services.inference_server --report   # RSS / PSS per process
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import struct
+import time
+
+import numpy as np
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("!II")  # header JSON length, payload length
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        read = sock.recv_into(view[got:])
+        if read == 0:
+            raise ConnectionError("Inference socket closed mid-message")
+        got += read
+    return bytes(buf)
+
+
+def send_frame(sock: socket.socket, header: dict, payload: bytes = b"") -> None:
+    data = json.dumps(header).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data), len(payload)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+def recv_frame(sock: socket.socket) -> tuple[dict, bytes]:
+    header_len, payload_len = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    header = json.loads(_recv_exact(sock, header_len))
+    return header, _recv_exact(sock, payload_len) if payload_len else b""
+
+
+def process_memory(pid: int, role: str) -> dict:
+    """
+    Resident memory of a process from /proc (Linux), in MB.
+
+    rss counts shared pages in full for every process that maps them; pss
+    splits them between the sharers, so summing pss over processes gives
+    the real total.
+    """
+    info = {"pid": pid, "role": role, "rss_mb": None, "pss_mb": None, "shared_mb": None}
+    fields = {"Rss": "rss_mb", "Pss": "pss_mb", "Shared_Clean": "shared_mb", "Shared_Dirty": "shared_mb"}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                key = fields.get(name)
+                if key:
+                    value = int(rest.split()[0]) / 1024.0
+                    info[key] = round((info[key] or 0.0) + value, 1)
+    except OSError:
+        pass
+    return info
+
+
+class InferenceWorkerClient:
+    """Blocking client used from the API's inference threads (one connection per request)."""
+
+    def __init__(self, socket_path: str, timeout_seconds: float = 60.0):
+        self.socket_path = socket_path
+        self.timeout_seconds = timeout_seconds
+
+    def _request(self, header: dict, payload: bytes = b"") -> tuple[dict, bytes]:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout_seconds)
+                sock.connect(self.socket_path)
+                send_frame(sock, header, payload)
+                response, data = recv_frame(sock)
+        except (OSError, ConnectionError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Inference server unavailable: {e}",
+            )
+        if not response.get("ok"):
+            if response.get("status"):
+                raise HTTPException(status_code=response["status"], detail=response.get("error"))
+            raise RuntimeError(f"Inference worker error: {response.get('error')}")
+        return response, data
+
+    def predict(self, batch: np.ndarray) -> tuple[np.ndarray, np.ndarray | None, str]:
+        """Forward pass on a uint8 (N, 224, 224, 3) batch in a worker process."""
+        batch = np.ascontiguousarray(batch, dtype=np.uint8)
+        response, data = self._request({"op": "predict", "shape": list(batch.shape)}, batch.tobytes())
+        probs_shape = response["probabilities"]
+        split = int(np.prod(probs_shape)) * 4
+        probs = np.frombuffer(data[:split], dtype=np.float32).reshape(probs_shape)
+        embeddings = None
+        if response["embeddings"] is not None:
+            embeddings = np.frombuffer(data[split:], dtype=np.float16).reshape(response["embeddings"])
+        return probs, embeddings, response["model_version"]
+
+    def explain(self, x: np.ndarray, condition: str) -> tuple[bytes, str]:
+        """Grad-CAM overlay PNG of a uint8 (1, 224, 224, 3) image, and the model version."""
+        x = np.ascontiguousarray(x, dtype=np.uint8)
+        response, data = self._request(
+            {"op": "explain", "shape": list(x.shape), "condition": condition}, x.tobytes()
+        )
+        return data, response["model_version"]
+
+    def ping(self) -> dict:
+        return self._request({"op": "ping"})[0]
+
+    def stats(self) -> list[dict]:
+        return self._request({"op": "stats"})[0]["processes"]
+
+
+# --- server side -------------------------------------------------------------
+
+_stopping = False
+
+
+def _on_sigterm(signum, frame) -> None:
+    global _stopping
+    _stopping = True
+
+
+def _handle(conn: socket.socket, pids) -> None:
+    from app.services import ml_service
+
+    header, payload = recv_frame(conn)
+    op = header.get("op")
+    if op == "predict":
+        batch = np.frombuffer(payload, dtype=np.uint8).reshape(header["shape"])
+        probs, embeddings, version = ml_service._predict_batch(batch)
+        probs = np.ascontiguousarray(probs, dtype=np.float32)
+        data = probs.tobytes()
+        if embeddings is not None:
+            data += np.ascontiguousarray(embeddings, dtype=np.float16).tobytes()
+        send_frame(conn, {
+            "ok": True,
+            "model_version": version,
+            "probabilities": list(probs.shape),
+            "embeddings": list(embeddings.shape) if embeddings is not None else None,
+        }, data)
+    elif op == "explain":
+        x = np.frombuffer(payload, dtype=np.uint8).reshape(header["shape"])
+        overlay, version = ml_service._explain_array(x, header["condition"])
+        send_frame(conn, {"ok": True, "model_version": version}, overlay)
+    elif op == "ping":
+        send_frame(conn, {"ok": True, "pid": os.getpid(), "model_version": ml_service.get_model_version()})
+    elif op == "stats":
+        processes = [process_memory(pids[0], "inference-parent")]
+        processes += [process_memory(pid, "inference-worker") for pid in pids[1:] if pid]
+        send_frame(conn, {"ok": True, "processes": processes})
+    else:
+        send_frame(conn, {"ok": False, "error": f"Unknown op {op!r}"})
+
+
+def _worker_main(listener: socket.socket, pids, preloaded: bool, ready) -> None:
+    from app.services import ml_service
+
+    signal.signal(signal.SIGTERM, _on_sigterm)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if not preloaded:
+        ml_service.warmup()
+    ready.set()
+    # Wake up periodically to notice SIGTERM; a request in progress always completes
+    listener.settimeout(1.0)
+    while not _stopping:
+        try:
+            conn, _ = listener.accept()
+        except TimeoutError:
+            continue
+        with conn:
+            conn.settimeout(None)
+            try:
+                _handle(conn, pids)
+            except HTTPException as e:
+                # Passed on to the API caller as is (e.g. 409: no Keras model for Grad-CAM)
+                try:
+                    send_frame(conn, {"ok": False, "status": e.status_code, "error": e.detail})
+                except OSError:
+                    pass
+            except Exception as e:
+                logger.exception("Inference request failed")
+                try:
+                    send_frame(conn, {"ok": False, "error": str(e)})
+                except OSError:
+                    pass
+
+
+def serve(socket_path: str, processes: int, model=None) -> None:
+    """
+    Load the model, fork `processes` workers on a Unix socket and supervise them.
+
+    Args:
+        socket_path: Unix socket the API processes connect to.
+        processes: Number of worker processes.
+        model: Optional already-loaded LoadedModel to serve (benchmarks).
+    """
+    from app.services import ml_service
+
+    # This process *is* the worker pool: forward passes run locally here
+    ml_service._workers = None
+    registry = ml_service._registry
+    preloaded = model is not None or registry.backend in ("tflite", "onnx")
+    if model is not None:
+        registry.install(model)
+    elif preloaded:
+        registry.num_threads = 1
+        ml_service.warmup()
+    current = registry.active_version()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(max(128, settings.INFERENCE_MAX_QUEUE))
+
+    ctx = multiprocessing.get_context("fork")
+    pids = ctx.RawArray("i", processes + 1)
+    pids[0] = os.getpid()
+    children: list = [None] * processes
+    versions = [current] * processes  # model version each worker serves
+
+    def spawn(slot: int, ready=None):
+        child = ctx.Process(
+            target=_worker_main,
+            args=(listener, pids, preloaded, ready or ctx.Event()),
+            name=f"inference-worker-{slot}",
+        )
+        child.start()
+        pids[slot + 1] = child.pid
+        return child
+
+    def replace(slot: int, version: str) -> bool:
+        """Start a worker for `version` and retire the slot's old one once the new one is ready."""
+        ready = ctx.Event()
+        child = spawn(slot, ready)
+        deadline = time.monotonic() + settings.INFERENCE_SERVER_STARTUP_TIMEOUT_SECONDS
+        while not ready.wait(0.5):
+            if not child.is_alive() or time.monotonic() >= deadline or _stopping:
+                child.terminate()
+                child.join()
+                pids[slot + 1] = children[slot].pid
+                return False
+        old, children[slot], versions[slot] = children[slot], child, version
+        old.terminate()
+        old.join()
+        return True
+
+    for slot in range(processes):
+        children[slot] = spawn(slot)
+    logger.info("Inference server on %s: %d workers, model %s", socket_path, processes, current)
+
+    signal.signal(signal.SIGTERM, _on_sigterm)
+    signal.signal(signal.SIGINT, _on_sigterm)
+    try:
+        while not _stopping:
+            time.sleep(1.0)
+            wanted = current if model is not None else registry.initial_version()
+            if wanted != current:
+                logger.info("Switching inference workers to model %s", wanted)
+                try:
+                    if preloaded:
+                        registry.activate(wanted, settings.INFERENCE_WARMUP_BATCH_SIZES)
+                    for slot in range(processes):
+                        if not replace(slot, wanted):
+                            raise RuntimeError(f"worker {slot} did not load it")
+                    current = wanted
+                except Exception as e:
+                    logger.error("Switching to model %s failed (%s); still serving %s", wanted, e, current)
+                    if preloaded and registry.active_version() == wanted:
+                        registry.rollback()
+                    registry.write_pointer(current)
+                    # Workers already switched go back to the current version
+                    for slot in range(processes):
+                        if versions[slot] != current and not replace(slot, current):
+                            logger.error("Inference worker %s is still on model %s", children[slot].pid, versions[slot])
+                finally:
+                    # The parent never rolls back: only the served model stays resident
+                    registry.release_previous()
+            for slot, child in enumerate(children):
+                if not child.is_alive():
+                    logger.warning("Inference worker %s exited (%s); restarting", child.pid, child.exitcode)
+                    children[slot] = spawn(slot)
+                    versions[slot] = current
+    finally:
+        for child in children:
+            child.terminate()
+        for child in children:
+            child.join()
+        listener.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="DermoAI inference worker pool")
+    parser.add_argument("--processes", type=int, default=settings.INFERENCE_PROCESSES or 2)
+    parser.add_argument("--socket", default=settings.INFERENCE_SOCKET)
+    parser.add_argument("--report", action="store_true", help="Print memory per process of a running server")
+    args = parser.parse_args()
+
+    if args.report:
+        client = InferenceWorkerClient(args.socket, settings.INFERENCE_SERVER_TIMEOUT_SECONDS)
+        print(json.dumps(client.stats(), indent=2))
+    else:
+        logging.basicConfig(level=logging.INFO)
+        serve(args.socket, args.processes)
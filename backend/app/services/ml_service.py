@@ -1,29 +1,64 @@
 """
 ML inference service for DermoAI skin lesion classification.
 
-Uses a trained MobileNetV2 Keras model (224x224 RGB input) with 8 condition
-classes and rule-based urgency mapping including malignant threshold override.
+Uses a trained MobileNetV2 model (224x224 RGB input) with 8 condition classes
+and rule-based urgency mapping including malignant threshold override. The
+model runs on the Keras, TFLite or ONNX Runtime backend (INFERENCE_BACKEND).
 """
 
+import asyncio
+import base64
 import io
 import json
+import logging
+import os
+import threading
+import time
 from collections import Counter
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
 from urllib.request import urlopen
 
 import numpy as np
+from fastapi import HTTPException, status
 from PIL import Image
 
+from app.core import metrics
+from app.core.config import settings
+from app.services import http_client, inference_backends, quality_gate, storage_service
+from app.services.cascade import Cascade
+from app.services.drift_monitor import REFERENCE_FILE, DriftMonitor
+from app.services.gradcam import GradCAM, overlay_png
+from app.services.inference_executor import InferenceExecutor
+from app.services.inference_scheduler import BatchScheduler
+from app.services.inference_server import InferenceWorkerClient, process_memory
+from app.services.model_registry import ModelRegistry
+from app.services.prediction_cache import PredictionCache, image_hash, settings_key
+
+logger = logging.getLogger(__name__)
+
+# Per-stage latency histograms for GET /metrics, bound once for the hot path
+_fetch_seconds = metrics.SCAN_STAGE_SECONDS.labels("fetch")
+_decode_seconds = metrics.SCAN_STAGE_SECONDS.labels("decode")
+_preprocess_seconds = metrics.SCAN_STAGE_SECONDS.labels("preprocess")
+_quality_seconds = metrics.SCAN_STAGE_SECONDS.labels("quality")
+_screen_seconds = metrics.SCAN_STAGE_SECONDS.labels("screen")
+_forward_seconds = metrics.SCAN_STAGE_SECONDS.labels("forward")
+_tta_seconds = metrics.SCAN_STAGE_SECONDS.labels("tta")
+_total_seconds = metrics.SCAN_STAGE_SECONDS.labels("total")
+_batch_size = metrics.INFERENCE_BATCH_SIZE
+_malignant_overrides = metrics.URGENCY_OVERRIDES.labels("malignant_threshold")
+_low_confidence_overrides = metrics.URGENCY_OVERRIDES.labels("low_confidence")
+_cascade_accepted = metrics.CASCADE_DECISIONS.labels("accepted")
+_cascade_escalated = metrics.CASCADE_DECISIONS.labels("escalated")
+
 # Resolve model paths: backend/app/services -> backend -> repo root (dermoai)
 _BACKEND_ROOT = Path(__file__).resolve().parent.parent.parent
 _PROJECT_ROOT = _BACKEND_ROOT.parent
 _MODEL_DIR = _PROJECT_ROOT / "models" / "final"
-_MODEL_PATH = _MODEL_DIR / "best_model.keras"
 _CLASS_NAMES_PATH = _MODEL_DIR / "class_names.json"
 
-# Fallback model filename if best_model.keras is not present
-_ALT_MODEL_PATH = _MODEL_DIR / "dermoai_final_model.keras"
-
 CONDITION_CLASSES = [
     "autoimmune",
     "benign_neoplastic",
@@ -48,6 +83,8 @@ URGENCY_MAP = {
 
 MALIGNANT_THRESHOLD = 0.20  # P(malignant) > this → force URGENT (from notebook)
 
+LOW_CONFIDENCE_THRESHOLD = 0.6  # confidence < this → URGENT (conservative)
+
 INPUT_SIZE = (224, 224)
 
 # Load class names from JSON if present, else use CONDITION_CLASSES
@@ -57,151 +94,1160 @@ if _CLASS_NAMES_PATH.exists():
 else:
     CLASS_NAMES = list(CONDITION_CLASSES)
 
-# Load model at module import (once). compile=False avoids needing the training
-# loss (e.g. focal_loss_fixed) for inference.
-_model = None
-if _MODEL_PATH.exists():
-    import keras
-    _model = keras.models.load_model(_MODEL_PATH, compile=False)
-elif _ALT_MODEL_PATH.exists():
-    import keras
-    _model = keras.models.load_model(_ALT_MODEL_PATH, compile=False)
-else:
-    raise FileNotFoundError(
-        f"Model not found. Place best_model.keras or dermoai_final_model.keras in {_MODEL_DIR}"
-    )
-
 MALIGNANT_IDX = CLASS_NAMES.index("malignant")
 
+# Models are loaded lazily on first use (or by warmup() at app startup), so
+# importing this module — alembic, scripts, tests — does not pull in
+# TensorFlow or another inference runtime. The registry owns the active
+# version and supports hot-swap / rollback (see model_registry.py).
+_registry = ModelRegistry(
+    final_dir=_MODEL_DIR,
+    versions_dir=_PROJECT_ROOT / "models" / "versions",
+    backend=settings.INFERENCE_BACKEND,
+    tflite_quantization=settings.INFERENCE_TFLITE_QUANTIZATION,
+    num_threads=settings.INFERENCE_THREADS or None,
+    default_version=settings.MODEL_VERSION,
+    input_shape=(*INPUT_SIZE, 3),
+)
+_ready = threading.Event()
+_background_tasks: set[asyncio.Task] = set()
+_pointer_watch: asyncio.Task | None = None
+_follow_failed: str | None = None  # pointer version this process failed to load
+
+# With INFERENCE_PROCESSES > 0 forward passes run in the shared worker pool
+# (python -m app.services.inference_server) and this process never loads the model.
+_workers = (
+    InferenceWorkerClient(settings.INFERENCE_SOCKET, settings.INFERENCE_SERVER_TIMEOUT_SECONDS)
+    if settings.INFERENCE_PROCESSES
+    else None
+)
+
+
+def _get_model():
+    """Return the active inference backend, loading it on first call."""
+    return _registry.get().backend
+
+
+def get_model_version() -> str:
+    """Version of the model currently serving predictions (no file access once warmup_async started)."""
+    return _registry.active_version()
+
 
-def _load_image(image_url: str) -> Image.Image:
-    """Load PIL Image from file path or HTTP(S) URL."""
-    if image_url.startswith(("http://", "https://")):
-        with urlopen(image_url, timeout=30) as resp:
-            data = resp.read()
-        return Image.open(io.BytesIO(data)).convert("RGB")
-    return Image.open(image_url).convert("RGB")
+# Anything the model can be run on: a file path or HTTP(S) URL (re-scoring
+# stored images), raw encoded bytes from an upload, or a decoded RGB array.
+ImageSource = str | bytes | np.ndarray | Image.Image
+
+
+def _is_url(image: ImageSource) -> bool:
+    return isinstance(image, str) and image.startswith(("http://", "https://"))
+
+
+def _open_image(image: ImageSource) -> Image.Image:
+    """Open (lazily, for encoded sources) a PIL Image from bytes, array, path or HTTP(S) URL."""
+    if isinstance(image, Image.Image):
+        return image
+    if isinstance(image, np.ndarray):
+        return Image.fromarray(image.astype(np.uint8, copy=False))
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return Image.open(io.BytesIO(image))
+    if _is_url(image):
+        return Image.open(io.BytesIO(_download(image)))
+    return Image.open(image)
+
+
+def _download(url: str) -> bytes:
+    """Blocking download for synchronous callers; async paths fetch through storage_service."""
+    max_bytes = settings.REMOTE_IMAGE_MAX_BYTES
+    with _fetch_seconds.time():
+        with urlopen(url, timeout=settings.HTTP_TIMEOUT_SECONDS) as resp:
+            data = resp.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Remote image exceeds {max_bytes} bytes",
+        )
+    return data
+
+
+def _load_image(image: ImageSource, fast_decode: bool | None = None) -> Image.Image:
+    """
+    Load RGB PIL Image from raw bytes, a decoded array, a file path or an HTTP(S) URL.
+
+    With fast decode (INFERENCE_FAST_DECODE), JPEGs are decoded in draft mode:
+    libjpeg scales by 1/2, 1/4 or 1/8 in the DCT domain to the smallest size
+    still >= INPUT_SIZE, so a 12 MP phone photo decodes to ~0.5 MP instead of
+    a full-resolution RGB buffer. Non-JPEG formats ignore draft().
+    """
+    img = _open_image(image)
+    if settings.INFERENCE_FAST_DECODE if fast_decode is None else fast_decode:
+        img.draft("RGB", INPUT_SIZE)
+    return img.convert("RGB")
 
 
 def _preprocess(img: Image.Image) -> np.ndarray:
-    """Resize and normalize image to model input shape (1, 224, 224, 3)."""
+    """Resize image to model input size as a uint8 array of shape (1, 224, 224, 3)."""
     img = img.resize(INPUT_SIZE)
-    arr = np.array(img, dtype=np.float32) / 255.0
-    return np.expand_dims(arr, axis=0)
+    return np.asarray(img, dtype=np.uint8)[None, ...]
+
+
+# Per-thread float32 input buffer, grown to the largest batch seen and reused
+_buffers = threading.local()
 
 
-def _get_predictions(image_url: str) -> np.ndarray:
-    """Load image, preprocess, and return 1D array of class probabilities."""
-    img = _load_image(image_url)
+def _normalize(batch: np.ndarray) -> np.ndarray:
+    """
+    Scale a uint8 (N, 224, 224, 3) batch to float32 [0, 1] in one vectorized step.
+
+    Writes into a reusable per-thread buffer; the result is only valid until
+    the next call on the same thread (backends copy it into their own tensors).
+    """
+    n = len(batch)
+    buf = getattr(_buffers, "input", None)
+    if buf is None or len(buf) < n:
+        buf = _buffers.input = np.empty((n, *batch.shape[1:]), dtype=np.float32)
+    out = buf[:n]
+    np.divide(batch, np.float32(255.0), out=out, casting="unsafe")
+    return out
+
+
+def _predict_batch(batch: np.ndarray) -> tuple[np.ndarray, np.ndarray | None, str]:
+    """
+    Run one forward pass on a uint8 (N, 224, 224, 3) batch.
+
+    Returns (N, num_classes) probabilities, the pooled penultimate-layer
+    embeddings as float16 (None if the model file does not expose them) and
+    the version that produced them. A single model reference is held for the
+    whole pass, so a concurrent hot-swap never changes the model mid-batch.
+    """
+    _batch_size.observe(len(batch))
+    with _forward_seconds.time():
+        if _workers is not None:
+            return _workers.predict(batch)
+        model = _registry.get()
+        probs, embeddings = model.predict_with_embeddings(_normalize(batch))
+    if embeddings is not None:
+        embeddings = embeddings.astype(np.float16)
+    return probs, embeddings, model.version
+
+
+def _predict_rows(batch: np.ndarray) -> list[tuple[np.ndarray, np.ndarray | None, str]]:
+    """Scheduler entry point: one (probabilities, embedding, model_version) triple per image."""
+    probs, embeddings, version = _predict_batch(batch)
+    if embeddings is None:
+        return [(row, None, version) for row in probs]
+    return list(zip(probs, embeddings, [version] * len(probs)))
+
+
+def _tta_views(x: np.ndarray) -> np.ndarray:
+    """
+    Test-time augmentation views of one preprocessed uint8 (224, 224, 3) image:
+    identity, horizontal/vertical flips and small rotations, stacked as one batch.
+    """
+    views = [x, x[:, ::-1], x[::-1, :]]
+    if settings.INFERENCE_TTA_ROTATIONS:
+        img = Image.fromarray(x)
+        # Fill rotated-in corners with the mean colour rather than black
+        fill = tuple(int(c) for c in x.reshape(-1, 3).mean(axis=0))
+        for angle in settings.INFERENCE_TTA_ROTATIONS:
+            rotated = img.rotate(angle, resample=Image.BILINEAR, fillcolor=fill)
+            views.append(np.asarray(rotated, dtype=np.uint8))
+    return np.stack(views)
+
+
+def _predict_tta(x: np.ndarray) -> tuple[np.ndarray, str]:
+    """One batched forward pass over all TTA views; returns averaged probabilities."""
+    probs, _, version = _predict_batch(_tta_views(x))
+    return probs.mean(axis=0), version
+
+
+def _predict_tta_many(xs: np.ndarray) -> tuple[np.ndarray, str]:
+    """TTA for several uint8 images in one forward pass; returns (N, num_classes) averaged probabilities."""
+    views = [_tta_views(x) for x in xs]
+    probs, _, version = _predict_batch(np.concatenate(views))
+    return probs.reshape(len(xs), len(views[0]), -1).mean(axis=1), version
+
+
+def _needs_tta(predictions: np.ndarray) -> bool:
+    """TTA only runs when enabled and the first pass would be flagged as low confidence."""
+    return (
+        settings.INFERENCE_TTA_ENABLED
+        and float(predictions[_served_index(predictions)]) < LOW_CONFIDENCE_THRESHOLD
+    )
+
+
+def _load_and_preprocess(image: ImageSource) -> np.ndarray:
+    """Load image and return uint8 model input of shape (1, 224, 224, 3)."""
+    if _is_url(image):
+        image = _download(image)
+    start = time.perf_counter()
+    img = _load_image(image)  # convert("RGB") forces the (lazy) decode
+    decoded = time.perf_counter()
     x = _preprocess(img)
-    preds = _model.predict(x, verbose=0)
-    return preds[0]
+    _decode_seconds.observe(decoded - start)
+    _preprocess_seconds.observe(time.perf_counter() - decoded)
+    return x
+
+
+def _check_quality(x: np.ndarray, index: int | None = None) -> None:
+    """Raise ImageQualityError if a preprocessed (1, 224, 224, 3) image fails the quality gate."""
+    report = quality_gate.assess(
+        x[0],
+        min_sharpness=settings.QUALITY_MIN_SHARPNESS,
+        max_clipped_fraction=settings.QUALITY_MAX_CLIPPED_FRACTION,
+        min_skin_fraction=settings.QUALITY_MIN_SKIN_FRACTION,
+        skin_cr=tuple(settings.QUALITY_SKIN_CR),
+        skin_cb=tuple(settings.QUALITY_SKIN_CB),
+    )
+    _quality_seconds.observe(report.cost_us["total"] / 1e6)
+    if not report.usable:
+        for issue in report.issues:
+            metrics.QUALITY_REJECTIONS.labels(issue).inc()
+        raise quality_gate.ImageQualityError(report, index)
 
 
-def predict(image_url: str) -> str:
+def _load_and_check(
+    image: ImageSource, index: int | None = None, quality_check: bool = True
+) -> np.ndarray:
+    """_load_and_preprocess, then the quality gate (when enabled) on the 224x224 result."""
+    x = _load_and_preprocess(image)
+    if quality_check and settings.QUALITY_GATE_ENABLED:
+        _check_quality(x, index)
+    return x
+
+
+# Screening model of the two-stage cascade (INFERENCE_CASCADE_ENABLED)
+_cascade = (
+    Cascade(CLASS_NAMES, batch_sizes=settings.INFERENCE_WARMUP_BATCH_SIZES)
+    if settings.INFERENCE_CASCADE_ENABLED
+    else None
+)
+
+
+def _screen(batch: np.ndarray) -> tuple[np.ndarray, np.ndarray, str] | None:
     """
-    Predict skin condition from image URL or file path.
+    Cascade screening pass over a uint8 (N, 224, 224, 3) batch.
+
+    Returns (N, num_classes) screening probabilities, the mask of rows that can
+    be served without the full model and the version whose cascade config was
+    used. Returns None when the cascade is off or the active version has no
+    usable cascade_config.json; every image then goes to the full model.
+    """
+    if _cascade is None:
+        return None
+    version = get_model_version()
+    try:
+        loaded = _cascade.load(_registry.model_dir(version))
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Cascade disabled for model %s: %s", version, e)
+        return None
+    if loaded is None:
+        return None
+    with _screen_seconds.time():
+        probs, accepted = _cascade.screen(batch, *loaded)
+    n_accepted = int(accepted.sum())
+    _cascade_accepted.inc(n_accepted)
+    _cascade_escalated.inc(len(accepted) - n_accepted)
+    return probs, accepted, version
+
+
+def _prepare(
+    image: ImageSource, screen: bool = True, quality_check: bool = True
+) -> tuple[np.ndarray, tuple | None]:
+    """Load and preprocess, quality gate and cascade screening pass, in one pool job."""
+    x = _load_and_check(image, quality_check=quality_check)
+    return x, (_screen(x) if screen else None)
+
+
+# Bounded pool that runs decode/preprocess/forward pass off the event loop.
+_executor = InferenceExecutor(
+    max_workers=settings.INFERENCE_WORKERS,
+    max_queue=settings.INFERENCE_MAX_QUEUE,
+    max_background=settings.INFERENCE_MAX_BACKGROUND or None,
+)
+
+# Re-submitted images (same bytes, same model, same inference settings) skip
+# inference entirely. Recalibrating cascade_config.json for the same model
+# version does not change the key; screened entries then live out their TTL.
+_cache = PredictionCache(
+    max_size=settings.PREDICTION_CACHE_SIZE,
+    ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS,
+    persist=settings.PREDICTION_CACHE_PERSIST,
+    persist_ttl_seconds=settings.PREDICTION_CACHE_PERSIST_TTL_SECONDS,
+    purge_interval_seconds=settings.PREDICTION_CACHE_PURGE_INTERVAL_SECONDS,
+    variant=settings_key(
+        backend=settings.INFERENCE_BACKEND,
+        quantization=settings.INFERENCE_TFLITE_QUANTIZATION,
+        fast_decode=settings.INFERENCE_FAST_DECODE,
+        tta=settings.INFERENCE_TTA_ENABLED,
+        tta_rotations=settings.INFERENCE_TTA_ROTATIONS,
+        cascade=settings.INFERENCE_CASCADE_ENABLED,
+    ),
+)
+
+# Collects concurrent async requests into batches for a single forward pass.
+_scheduler: BatchScheduler[tuple[np.ndarray, np.ndarray | None, str]] = BatchScheduler(
+    _predict_rows,
+    max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+    runner=partial(_executor.run, reject_when_full=False),
+)
+
+metrics.gauge(
+    "dermoai_inference_queue_depth",
+    "Jobs waiting for an inference pool thread.",
+    lambda: _executor.stats()["queue_depth"],
+)
+metrics.gauge(
+    "dermoai_inference_batch_pending",
+    "Images waiting in the batch scheduler.",
+    lambda: _scheduler.pending,
+)
+metrics.gauge(
+    "dermoai_model_ready",
+    "1 once the model is loaded and warm (in every API process).",
+    lambda: int(_ready.is_set()),
+    multiprocess_mode="livemin",
+)
+
+# Rolling histograms of served predictions vs the validation split (GET /api/stats/drift)
+_drift = (
+    DriftMonitor(
+        CLASS_NAMES,
+        bins=settings.DRIFT_BINS,
+        slot_seconds=settings.DRIFT_SLOT_SECONDS,
+        windows_minutes=settings.DRIFT_WINDOWS_MINUTES,
+        min_samples=settings.DRIFT_MIN_SAMPLES,
+        psi_warning=settings.DRIFT_PSI_WARNING,
+        psi_alert=settings.DRIFT_PSI_ALERT,
+    )
+    if settings.DRIFT_MONITOR_ENABLED
+    else None
+)
+
+
+def _drift_reference(version: str) -> tuple[Path | None, dict | None]:
+    try:
+        path = _registry.model_dir(version) / REFERENCE_FILE
+    except ValueError:
+        return None, None
+    return path, _drift.load_reference(path)
+
+
+def drift_report() -> dict:
+    """
+    Drift scores of recent predictions per window against the reference
+    histograms of the serving model (drift_reference.json in its model directory).
+    """
+    if _drift is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Drift monitor is disabled"
+        )
+    version = _drift.model_version or get_model_version()
+    path, reference = _drift_reference(version)
+    return {
+        "model_version": version,
+        "reference": (
+            {"path": str(path), "n": reference.get("n"), "split": reference.get("split")}
+            if reference is not None
+            else None
+        ),
+        "bins": _drift.bins,
+        "min_samples": _drift.min_samples,
+        "psi_warning": _drift.psi_warning,
+        "psi_alert": _drift.psi_alert,
+        "windows": _drift.report(reference),
+    }
+
+
+def _drift_max_psi() -> float | None:
+    if _drift is None or _drift.model_version is None:
+        return None
+    return _drift.max_psi(_drift_reference(_drift.model_version)[1])
+
+
+metrics.gauge(
+    "dermoai_drift_max_psi",
+    "Largest population stability index vs the validation split over the shortest drift window.",
+    _drift_max_psi,
+    multiprocess_mode="livemax",
+)
+
+
+def _served_index(predictions: np.ndarray) -> int:
+    """Argmax class index with the malignant threshold override applied."""
+    # Malignant threshold override: if P(malignant) > threshold, force malignant
+    if predictions[MALIGNANT_IDX] > MALIGNANT_THRESHOLD:
+        return MALIGNANT_IDX
+    return int(np.argmax(predictions))
+
+
+@dataclass(frozen=True)
+class PredictionResult:
+    """
+    Everything derived from one model run on one image, computed once.
+
+    All public helpers (predict, get_confidence, predict_with_details,
+    predict_async) are built on this, so using several of them for the same
+    image never re-runs decode or inference. The embedding comes from the
+    same (first) forward pass and feeds the similar-case index.
+    """
+
+    probabilities: np.ndarray
+    predicted_index: int  # argmax with malignant threshold override
+    malignant_probability: float
+    urgency: str
+    model_version: str
+    tta_applied: bool = False
+    cached: bool = False
+    timing: dict[str, float] = field(default_factory=dict)
+    embedding: np.ndarray | None = None  # float16 pooled penultimate-layer features
+    screened: bool = False  # answered by the cascade's screening model (no embedding)
+    # Full model's single-pass probabilities when TTA replaced them (drift monitoring)
+    first_pass: np.ndarray | None = None
+
+    @classmethod
+    def from_probabilities(
+        cls,
+        probabilities: np.ndarray,
+        model_version: str,
+        tta_applied: bool = False,
+        timing: dict[str, float] | None = None,
+        embedding: np.ndarray | None = None,
+        screened: bool = False,
+        first_pass: np.ndarray | None = None,
+    ) -> "PredictionResult":
+        predicted_index = _served_index(probabilities)
+        malignant_prob = float(probabilities[MALIGNANT_IDX])
+        urgency = classify_urgency(
+            CLASS_NAMES[predicted_index],
+            float(probabilities[predicted_index]),
+            malignant_probability=malignant_prob,
+        )
+        return cls(
+            probabilities=probabilities,
+            predicted_index=predicted_index,
+            malignant_probability=malignant_prob,
+            urgency=urgency,
+            model_version=model_version,
+            tta_applied=tta_applied,
+            timing=timing or {},
+            embedding=embedding,
+            screened=screened,
+            first_pass=first_pass,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PredictionResult":
+        """Rebuild from to_dict() output (prediction cache); keeps the stored urgency."""
+        probs = data["all_probabilities"]
+        embedding = data.get("embedding")
+        return cls(
+            probabilities=np.array([probs[name] for name in CLASS_NAMES], dtype=np.float32),
+            predicted_index=CLASS_NAMES.index(data["predicted_condition"]),
+            malignant_probability=data["malignant_probability"],
+            urgency=data["urgency"],
+            model_version=data["model_version"],
+            tta_applied=data.get("tta_applied", False),
+            screened=data.get("screened", False),
+            cached=True,
+            embedding=(
+                np.frombuffer(base64.b64decode(embedding), dtype=np.float16)
+                if embedding is not None
+                else None
+            ),
+        )
+
+    @property
+    def predicted_condition(self) -> str:
+        return CLASS_NAMES[self.predicted_index]
+
+    @property
+    def confidence(self) -> float:
+        """Probability of the served (possibly malignant-overridden) class."""
+        return float(self.probabilities[self.predicted_index])
+
+    @property
+    def max_probability(self) -> float:
+        return float(np.max(self.probabilities))
+
+    @property
+    def embedding_bytes(self) -> bytes | None:
+        """float16 embedding as raw bytes (Image.embedding column)."""
+        return self.embedding.tobytes() if self.embedding is not None else None
+
+    def to_dict(self, include_embedding: bool = False) -> dict:
+        """predict_with_details response shape; the prediction cache also keeps the embedding."""
+        data = {
+            "predicted_condition": self.predicted_condition,
+            "confidence": round(self.confidence, 4),
+            "urgency": self.urgency,
+            "all_probabilities": {
+                CLASS_NAMES[i]: round(float(self.probabilities[i]), 4)
+                for i in range(len(CLASS_NAMES))
+            },
+            "malignant_probability": round(self.malignant_probability, 4),
+            "model_version": self.model_version,
+            "tta_applied": self.tta_applied,
+            "screened": self.screened,
+        }
+        if include_embedding and self.embedding is not None:
+            data["embedding"] = base64.b64encode(self.embedding_bytes).decode("ascii")
+        return data
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000.0, 2)
+
+
+def _observe(timing: dict[str, float]) -> None:
+    """Stage histograms for a fresh prediction (fetch/decode/preprocess/forward record themselves)."""
+    if "tta_ms" in timing:
+        _tta_seconds.observe(timing["tta_ms"] / 1000.0)
+    _total_seconds.observe(timing["total_ms"] / 1000.0)
+
+
+def _observe_drift(result: PredictionResult) -> None:
+    """
+    Feed the drift monitor the same output its reference was built from.
+
+    The reference (src/models/drift_reference.py) holds single-pass full-model
+    probabilities on the validation split. Cache hits are skipped, since repeats
+    of one image would skew the traffic distribution. Cascade-screened results
+    are skipped too, since they come from a different model. When TTA replaced
+    the probabilities, the first pass is observed instead of the average.
+    """
+    if _drift is None or result.cached or result.screened:
+        return
+    probs = result.first_pass if result.first_pass is not None else result.probabilities
+    index = _served_index(probs)
+    _drift.observe(probs, index, float(probs[index]), result.model_version)
+
+
+def _record(result: PredictionResult) -> PredictionResult:
+    """Count a served prediction (cache hits included) and the safety rules it triggered."""
+    _observe_drift(result)
+    metrics.PREDICTIONS.labels(result.predicted_condition, result.urgency).inc()
+    if result.predicted_index != int(np.argmax(result.probabilities)):
+        _malignant_overrides.inc()
+    if (
+        result.confidence < LOW_CONFIDENCE_THRESHOLD
+        and URGENCY_MAP.get(result.predicted_condition) == "NON_URGENT"
+    ):
+        _low_confidence_overrides.inc()
+    return result
+
+
+def _run_single(image: ImageSource) -> PredictionResult:
+    """Synchronous single-image path: load, predict, and refine with TTA if uncertain."""
+    start = time.perf_counter()
+    x = _load_and_preprocess(image)
+    timing = {"preprocess_ms": _elapsed_ms(start)}
+    stage = time.perf_counter()
+    screened = _screen(x)
+    if screened is not None:
+        timing["screen_ms"] = _elapsed_ms(stage)
+        if screened[1][0]:
+            timing["total_ms"] = _elapsed_ms(start)
+            _observe(timing)
+            return PredictionResult.from_probabilities(
+                screened[0][0], screened[2], timing=timing, screened=True
+            )
+    stage = time.perf_counter()
+    probs, embeddings, version = _predict_batch(x)
+    timing["inference_ms"] = _elapsed_ms(stage)
+    probs, first_pass = probs[0], None
+    embedding = embeddings[0] if embeddings is not None else None
+    if _needs_tta(probs):
+        stage = time.perf_counter()
+        first_pass = probs
+        probs, version = _predict_tta(x[0])
+        timing["tta_ms"] = _elapsed_ms(stage)
+    timing["total_ms"] = _elapsed_ms(start)
+    _observe(timing)
+    return PredictionResult.from_probabilities(
+        probs, version, first_pass is not None, timing, embedding, first_pass=first_pass
+    )
+
+
+def predict_result(image: ImageSource) -> PredictionResult:
+    """
+    Run the model once on an image and return the full result (synchronous).
+
+    Raw bytes are content-addressed, so a repeat of the same bytes on the same
+    model version is served from the prediction cache.
 
     Args:
-        image_url: Path to image file or HTTP(S) URL (e.g. Cloudinary).
+        image: Raw image bytes, decoded RGB array, path to image file or HTTP(S) URL.
+    """
+    if not isinstance(image, (bytes, bytearray, memoryview)):
+        return _record(_run_single(image))
+    digest = image_hash(image)
+    cached = _cache.get(digest, get_model_version())
+    if cached is not None:
+        return _record(PredictionResult.from_dict(cached))
+    result = _run_single(image)
+    _cache.set(digest, result.model_version, result.to_dict(include_embedding=True))
+    return _record(result)
+
+
+def predict(image: ImageSource) -> str:
+    """
+    Predict skin condition from image bytes, array, URL or file path.
+
+    Args:
+        image: Raw image bytes, decoded RGB array, path to image file or HTTP(S) URL (e.g. a stored image).
 
     Returns:
         Predicted class name.
     """
-    predictions = _get_predictions(image_url)
-    predicted_idx = int(np.argmax(predictions))
-    # Malignant threshold override: if P(malignant) > threshold, force malignant
-    if predictions[MALIGNANT_IDX] > MALIGNANT_THRESHOLD:
-        predicted_idx = MALIGNANT_IDX
-    return CLASS_NAMES[predicted_idx]
+    return predict_result(image).predicted_condition
 
 
-def get_confidence(image_url: str) -> float:
+def get_confidence(image: ImageSource) -> float:
     """
     Get confidence score (max probability) for the prediction.
 
     Args:
-        image_url: Path to image file or HTTP(S) URL.
+        image: Raw image bytes, decoded RGB array, path to image file or HTTP(S) URL.
 
     Returns:
         Confidence score in [0, 1].
     """
-    predictions = _get_predictions(image_url)
-    return float(np.max(predictions))
+    return predict_result(image).max_probability
 
 
 def classify_urgency(
     condition: str,
     confidence: float,
-    image_url: str | None = None,
     malignant_probability: float | None = None,
 ) -> str:
     """
-    Classify urgency with conservative rules.
+    Classify urgency with conservative rules. Never runs the model: callers
+    with an image should use PredictionResult.urgency instead.
 
     Rules:
-    1. If confidence < 0.6 → URGENT (conservative).
+    1. If confidence < LOW_CONFIDENCE_THRESHOLD (0.6) → URGENT (conservative).
     2. If P(malignant) > MALIGNANT_THRESHOLD → URGENT.
     3. Else use URGENCY_MAP.
 
     Args:
         condition: Predicted condition name.
         confidence: Prediction confidence.
-        image_url: Optional; if provided and malignant_probability not given, run model to get P(malignant).
-        malignant_probability: Optional; if provided, used for rule 2 (avoids re-running model).
+        malignant_probability: Optional; if provided, used for rule 2.
 
     Returns:
         "URGENT" or "NON_URGENT".
     """
-    if confidence < 0.6:
+    if confidence < LOW_CONFIDENCE_THRESHOLD:
         return "URGENT"
 
-    malignant_prob = malignant_probability
-    if malignant_prob is None and image_url:
-        predictions = _get_predictions(image_url)
-        malignant_prob = float(predictions[MALIGNANT_IDX])
-    if malignant_prob is not None and malignant_prob > MALIGNANT_THRESHOLD:
+    if malignant_probability is not None and malignant_probability > MALIGNANT_THRESHOLD:
         return "URGENT"
 
     return URGENCY_MAP.get(condition, "URGENT")
 
 
-def predict_with_details(image_url: str) -> dict:
+def predict_with_details(image: ImageSource) -> dict:
     """
     Get full prediction details including all class probabilities.
 
     Args:
-        image_url: Path to image file or HTTP(S) URL.
+        image: Raw image bytes, decoded RGB array, path to image file or HTTP(S) URL.
 
     Returns:
-        Dict with predicted_condition, confidence, urgency, all_probabilities, malignant_probability.
+        Dict with predicted_condition, confidence, urgency, all_probabilities,
+        malignant_probability, model_version and tta_applied.
+    """
+    return predict_result(image).to_dict()
+
+
+async def predict_async(
+    image: ImageSource,
+    content_hash: str | None = None,
+    screen: bool = True,
+    quality_check: bool = True,
+) -> PredictionResult:
     """
-    predictions = _get_predictions(image_url)
-    malignant_prob = float(predictions[MALIGNANT_IDX])
+    Async prediction through the batch scheduler.
 
-    if malignant_prob > MALIGNANT_THRESHOLD:
-        predicted_idx = MALIGNANT_IDX
+    Image loading and the forward pass run on the inference pool, and the
+    forward pass is shared with other concurrent requests, so the event loop
+    is never blocked. The quality gate and, with INFERENCE_CASCADE_ENABLED,
+    the screening model run in the same pool job as preprocessing; only
+    escalated images reach the full model. Uncertain results get one extra
+    batched TTA pass when INFERENCE_TTA_ENABLED. Raises 503 when the inference
+    queue is full and ImageQualityError when the image should be retaken.
+
+    Args:
+        image: Raw image bytes (preferred for fresh uploads), decoded RGB array,
+            path to image file or HTTP(S) URL (re-scoring stored images).
+        content_hash: SHA-256 of the bytes if already known (streamed uploads).
+        screen: False to always use the full model (e.g. when the embedding is needed).
+        quality_check: False to skip the quality gate (images already accepted and stored).
+
+    Returns:
+        PredictionResult (timing covers fetch, preprocess, screening, queue + forward pass, TTA).
+    """
+    start = time.perf_counter()
+    timing = {}
+    if _is_url(image):
+        # Pooled async download; the bytes then go through the content-addressed cache
+        image = await storage_service.fetch_image(image)
+        timing["fetch_ms"] = _elapsed_ms(start)
+    digest = None
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        digest = content_hash or image_hash(image)
+        cached = await _cache.aget(digest, get_model_version())
+        if cached is not None and (screen or not cached.get("screened")):
+            return _record(PredictionResult.from_dict(cached))
+    stage = time.perf_counter()
+    x, screened = await _executor.run(_prepare, image, screen, quality_check)
+    timing["preprocess_ms"] = _elapsed_ms(stage)
+    if screened is not None and screened[1][0]:
+        timing["total_ms"] = _elapsed_ms(start)
+        _observe(timing)
+        result = PredictionResult.from_probabilities(
+            screened[0][0], screened[2], timing=timing, screened=True
+        )
     else:
-        predicted_idx = int(np.argmax(predictions))
+        stage = time.perf_counter()
+        probs, embedding, version = await _scheduler.submit(x)
+        timing["inference_ms"] = _elapsed_ms(stage)
+        first_pass = None
+        if _needs_tta(probs):
+            stage = time.perf_counter()
+            first_pass = probs
+            probs, version = await _executor.run(_predict_tta, x[0], reject_when_full=False)
+            timing["tta_ms"] = _elapsed_ms(stage)
+        timing["total_ms"] = _elapsed_ms(start)
+        _observe(timing)
+        result = PredictionResult.from_probabilities(
+            probs, version, first_pass is not None, timing, embedding, first_pass=first_pass
+        )
+    if digest is not None:
+        await _cache.aset(digest, result.model_version, result.to_dict(include_embedding=True))
+    return _record(result)
+
+
+async def predict_many_async(
+    images: list[ImageSource],
+    content_hashes: list[str] | None = None,
+    quality_check: bool = True,
+) -> list[PredictionResult]:
+    """
+    Async prediction for a multi-image upload as one batch.
+
+    Cached images are answered from the prediction cache; the rest are decoded
+    concurrently on the inference pool and run through the model in a single
+    forward pass (plus one batched TTA pass for the uncertain ones), rather
+    than being queued one by one behind the batch scheduler. With the cascade
+    on, the batch is screened first and only escalated images are in that pass.
+
+    Args:
+        images: Image sources, typically raw upload bytes; URLs are
+            fetched concurrently through the pooled HTTP client.
+        content_hashes: SHA-256 per image if already known (streamed uploads).
+        quality_check: False to skip the quality gate.
+
+    Returns:
+        One PredictionResult per image, in input order (timing is per batch).
+
+    Raises:
+        ImageQualityError: An image failed the quality gate (its index is set);
+            no image of the batch reaches the model.
+    """
+    images = list(images)
+    urls = [i for i, image in enumerate(images) if _is_url(image)]
+    if urls:
+        fetched = await asyncio.gather(*(storage_service.fetch_image(images[i]) for i in urls))
+        for i, data in zip(urls, fetched):
+            images[i] = data
+    results: list[PredictionResult | None] = [None] * len(images)
+    known = content_hashes or [None] * len(images)
+    digests = [
+        (known[i] or image_hash(image)) if isinstance(image, (bytes, bytearray, memoryview)) else None
+        for i, image in enumerate(images)
+    ]
+    version = get_model_version()
+    for i, digest in enumerate(digests):
+        if digest is not None:
+            cached = await _cache.aget(digest, version)
+            if cached is not None:
+                results[i] = PredictionResult.from_dict(cached)
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    if pending:
+        start = time.perf_counter()
+        xs = await asyncio.gather(
+            *(_executor.run(_load_and_check, images[i], i, quality_check) for i in pending)
+        )
+        batch = np.concatenate(xs)
+        timing = {"preprocess_ms": _elapsed_ms(start)}
+        screened = None
+        if _cascade is not None:
+            stage = time.perf_counter()
+            screened = await _executor.run(_screen, batch, reject_when_full=False)
+            timing["screen_ms"] = _elapsed_ms(stage)
+        accepted = screened[1] if screened is not None else np.zeros(len(batch), dtype=bool)
+        escalated = np.flatnonzero(~accepted)
+        probs = screened[0].astype(np.float32) if screened is not None else None
+        embeddings: list[np.ndarray | None] = [None] * len(batch)
+        if screened is not None:
+            version = screened[2]
+        if len(escalated):
+            stage = time.perf_counter()
+            full_probs, full_embeddings, version = await _executor.run(
+                _predict_batch, batch if screened is None else batch[escalated], reject_when_full=False
+            )
+            timing["inference_ms"] = _elapsed_ms(stage)
+            if probs is None:
+                probs = full_probs
+            else:
+                probs[escalated] = full_probs
+            if full_embeddings is not None:
+                for k, embedding in zip(escalated, full_embeddings):
+                    embeddings[k] = embedding
+        uncertain = [k for k in escalated if _needs_tta(probs[k])]
+        first_pass = {}
+        if uncertain:
+            stage = time.perf_counter()
+            tta_probs, version = await _executor.run(
+                _predict_tta_many, batch[uncertain], reject_when_full=False
+            )
+            first_pass = dict(zip(uncertain, probs[uncertain]))
+            probs = probs.copy()
+            probs[uncertain] = tta_probs
+            timing["tta_ms"] = _elapsed_ms(stage)
+        timing["total_ms"] = _elapsed_ms(start)
+        _observe(timing)
+        for k, i in enumerate(pending):
+            result = PredictionResult.from_probabilities(
+                probs[k],
+                version,
+                k in uncertain,
+                dict(timing, batch_size=len(pending)),
+                embeddings[k],
+                screened=bool(accepted[k]),
+                first_pass=first_pass.get(k),
+            )
+            results[i] = result
+            if digests[i] is not None:
+                await _cache.aset(
+                    digests[i], result.model_version, result.to_dict(include_embedding=True)
+                )
+    return [_record(result) for result in results]
+
+
+def _predict_bulk(images: list[bytes]) -> list[PredictionResult | None]:
+    """Decode and score encoded images in one pool job; None for images that fail to decode."""
+    xs, ok = [], []
+    for i, data in enumerate(images):
+        try:
+            xs.append(_load_and_preprocess(data))
+            ok.append(i)
+        except Exception as e:  # corrupt or non-image file; the rest of the batch still runs
+            logger.warning("Skipping undecodable image in bulk batch: %s", e)
+    results: list[PredictionResult | None] = [None] * len(images)
+    if not xs:
+        return results
+    batch = np.concatenate(xs)
+    probs, embeddings, version = _predict_batch(batch)
+    uncertain = [k for k, row in enumerate(probs) if _needs_tta(row)]
+    if uncertain:
+        tta_probs, version = _predict_tta_many(batch[uncertain])
+        probs = probs.copy()
+        probs[uncertain] = tta_probs
+    for k, i in enumerate(ok):
+        results[i] = PredictionResult.from_probabilities(
+            probs[k], version, k in uncertain, None, embeddings[k] if embeddings is not None else None
+        )
+    return results
+
+
+async def predict_bulk_async(images: list[bytes]) -> list[PredictionResult | None]:
+    """
+    Score a large batch of stored images (bulk re-scoring) without crowding out live scans.
+
+    The whole batch is one background job on the inference pool (decode +
+    one forward pass): it takes a single worker thread instead of a queue
+    slot per image, never runs ahead of a waiting scan, and when the
+    background queue is full the call waits for room rather than failing. Results bypass the prediction cache, prediction counters and
+    drift monitor, which describe live traffic.
+
+    Returns:
+        One PredictionResult per image, or None where the image could not be decoded.
+    """
+    while True:
+        try:
+            return await _executor.run(_predict_bulk, images, background=True)
+        except HTTPException as e:
+            if e.status_code != status.HTTP_503_SERVICE_UNAVAILABLE:
+                raise
+            await asyncio.sleep(0.5)
+
+
+# Grad-CAM needs gradients, i.e. the Keras model; built for one version at a time
+_explainer: tuple[str, GradCAM] | None = None
+_explainer_lock = threading.Lock()
+
+
+def _gradcam(version: str) -> GradCAM:
+    global _explainer
+    with _explainer_lock:
+        if _explainer is not None and _explainer[0] == version:
+            return _explainer[1]
+        model = None
+        active = _registry.get()
+        if active.version == version and isinstance(active.backend, inference_backends.KerasBackend):
+            model = active.backend.model
+        if model is None:
+            # TFLite / ONNX serving: load the Keras file of the same version
+            import keras
+
+            try:
+                path = inference_backends.model_path("keras", _registry.model_dir(version))
+            except (FileNotFoundError, ValueError) as e:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Explanations need the Keras model of {version}: {e}",
+                )
+            model = keras.models.load_model(path, compile=False)
+        _explainer = (version, GradCAM(model))
+        return _explainer[1]
+
 
-    predicted_condition = CLASS_NAMES[predicted_idx]
-    confidence = float(predictions[predicted_idx])
-    urgency = classify_urgency(
-        predicted_condition, confidence, malignant_probability=malignant_prob
+def _explain_array(x: np.ndarray, condition: str) -> tuple[bytes, str]:
+    """Grad-CAM overlay PNG of a preprocessed uint8 image with this process's model, and its version."""
+    version = get_model_version()
+    heatmap = _gradcam(version).heatmap(_normalize(x), CLASS_NAMES.index(condition))
+    return overlay_png(heatmap, INPUT_SIZE), version
+
+
+def _explain(image: ImageSource, condition: str) -> tuple[bytes, str]:
+    """Grad-CAM overlay PNG for one image and condition, and the model version (pool job)."""
+    x = _load_and_preprocess(image)
+    if _workers is not None:
+        # Keras stays in the inference server instead of loading in every API worker
+        return _workers.explain(x, condition)
+    return _explain_array(x, condition)
+
+
+async def explain_async(image: ImageSource, condition: str) -> tuple[bytes, str]:
+    """
+    Grad-CAM overlay of the regions that drove `condition` for an image.
+
+    Runs as a background job on the inference pool, behind any waiting
+    scan. Raises 503 when the background queue is full and 409 when no
+    Keras model is available for the active version.
+
+    Returns:
+        (palette PNG overlay at the model input size, model version).
+    """
+    return await _executor.run(_explain, image, condition, background=True)
+
+
+def warmup(batch_sizes: list[int] | None = None) -> None:
+    """
+    Load the model and run dummy batches so graph tracing happens before real traffic.
+
+    Args:
+        batch_sizes: Batch sizes to trace; defaults to INFERENCE_WARMUP_BATCH_SIZES.
+    """
+    sizes = batch_sizes or settings.INFERENCE_WARMUP_BATCH_SIZES
+    _registry.get(warmup_sizes=sizes)
+    _ready.set()
+    logger.info("Model warm (version %s, batch sizes %s)", get_model_version(), sizes)
+
+
+async def _wait_for_workers() -> None:
+    """Poll the inference server until it answers, for at most INFERENCE_SERVER_STARTUP_TIMEOUT_SECONDS."""
+    timeout = settings.INFERENCE_SERVER_STARTUP_TIMEOUT_SECONDS
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            # A server that accepts but never replies must not outlast the deadline either
+            remaining = max(deadline - time.monotonic(), 1.0)
+            await asyncio.wait_for(asyncio.to_thread(_workers.ping), timeout=remaining)
+            return
+        except (HTTPException, asyncio.TimeoutError):
+            if time.monotonic() >= deadline:
+                raise RuntimeError(
+                    f"Inference server on {_workers.socket_path} did not answer within {timeout:.0f}s; "
+                    "start it with `python -m app.services.inference_server` (scans get 503 until then)"
+                ) from None
+            logger.info("Waiting for inference server on %s", _workers.socket_path)
+            await asyncio.sleep(min(2.0, deadline - time.monotonic()))
+
+
+async def _follow_pointer() -> None:
+    """
+    In-process mode: serve the version another API worker activated or rolled back to.
+
+    Only the worker that handled the admin request swaps its model and writes
+    the pointer; the others follow it here. They never write the pointer
+    themselves, so a newer activation cannot be overwritten.
+    """
+    global _follow_failed
+    version = _registry.pointer_version
+    if (
+        not _ready.is_set()
+        or _registry.loading
+        or version == _registry.active_version()
+        or version == _follow_failed
+    ):
+        return
+    try:
+        if version == _registry.previous_version():
+            _registry.rollback(persist=False)
+        else:
+            await _executor.run(
+                partial(_registry.activate, persist=False),
+                version,
+                settings.INFERENCE_WARMUP_BATCH_SIZES,
+                reject_when_full=False,
+            )
+        logger.info("Now serving model %s (activated by another worker)", version)
+        _follow_failed = None
+    except Exception as e:
+        _follow_failed = version
+        logger.error("Could not load model %s activated by another worker: %s", version, e)
+
+
+async def _watch_pointer() -> None:
+    """Re-read the ACTIVE pointer off the event loop every MODEL_POINTER_POLL_SECONDS."""
+    while True:
+        await asyncio.sleep(settings.MODEL_POINTER_POLL_SECONDS)
+        try:
+            if await asyncio.to_thread(_registry.refresh_pointer):
+                logger.info("Model pointer now at %s", _registry.pointer_version)
+            if _workers is None:
+                await _follow_pointer()
+        except Exception as e:
+            logger.warning("Following the model pointer failed: %s", e)
+
+
+async def warmup_async() -> None:
+    """
+    Run warmup() on the inference pool without blocking the event loop.
+
+    In multi-process mode the inference server owns the model, so this only
+    waits until it answers. Raises RuntimeError if it has not started in time.
+    /health then keeps reporting model_ready false.
+    """
+    global _pointer_watch
+    # Resolve the served version (pointer read, default model hash) once, off the loop
+    await asyncio.to_thread(_registry.refresh_pointer)
+    if _pointer_watch is None or _pointer_watch.done():
+        _pointer_watch = asyncio.create_task(_watch_pointer())
+    if _workers is not None:
+        await _wait_for_workers()
+        _ready.set()
+        return
+    await _executor.run(warmup, reject_when_full=False)
+
+
+def activate_model(version: str) -> None:
+    """
+    Start loading and warming a model version in the background; it is swapped
+    in atomically once warm. Raises 404 if the version has no model files and
+    409 if another version is still loading.
+
+    With several uvicorn workers the other processes load it once this one
+    has written the pointer (see _follow_pointer).
+    """
+    if not _registry.has_version(version):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No model files for version {version} in models/versions/{version}",
+        )
+    if _workers is not None:
+        # The inference server watches the pointer and replaces its workers
+        _registry.write_pointer(version)
+        return
+    if _registry.loading:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Model version {_registry.loading} is still loading",
+        )
+    task = asyncio.create_task(
+        _executor.run(
+            _registry.activate,
+            version,
+            settings.INFERENCE_WARMUP_BATCH_SIZES,
+            reject_when_full=False,
+        )
     )
+    _background_tasks.add(task)
+    task.add_done_callback(_on_activation_done)
+
+
+def _on_activation_done(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Model activation failed: %s", task.exception())
+
+
+def rollback_model() -> None:
+    """
+    Swap the previously active model version back in. Raises 409 if there is none.
+    Other uvicorn workers follow through the pointer.
+    """
+    if _workers is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Rollback is not available with INFERENCE_PROCESSES; activate the previous version instead",
+        )
+    try:
+        _registry.rollback()
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+def model_status() -> dict:
+    """Active / previous / loading model versions for the admin API."""
+    return _registry.status()
+
 
+def is_ready() -> bool:
+    """True once the model is loaded and warmed up."""
+    return _ready.is_set()
+
+
+def inference_stats() -> dict:
+    """Inference pool size, queue depth, images waiting to be batched and cache counters."""
     return {
-        "predicted_condition": predicted_condition,
-        "confidence": round(confidence, 4),
-        "urgency": urgency,
-        "all_probabilities": {
-            CLASS_NAMES[i]: round(float(predictions[i]), 4)
-            for i in range(len(CLASS_NAMES))
-        },
-        "malignant_probability": round(malignant_prob, 4),
+        **_executor.stats(),
+        "batch_pending": _scheduler.pending,
+        "model_version": get_model_version() if _ready.is_set() else None,
+        "model_loading": _registry.loading,
+        "cache": _cache.stats(),
+        "cascade": _cascade.stats() if _cascade is not None else None,
+        "remote_images": http_client.remote_images.stats(),
     }
 
 
+async def worker_memory() -> dict:
+    """Resident memory of this API process and, in multi-process mode, of each inference process."""
+    processes = [process_memory(os.getpid(), "api")]
+    if _workers is not None:
+        processes += await _executor.run(_workers.stats, reject_when_full=False)
+    return {"mode": "processes" if _workers is not None else "in_process", "processes": processes}
+
+
+async def purge_cache() -> int:
+    """Delete expired persistent prediction-cache rows (also done periodically on writes)."""
+    return await _cache.purge_expired()
+
+
+async def shutdown() -> None:
+    """Stop the pointer watch, batch scheduler, inference pool and HTTP client (called on app shutdown)."""
+    if _pointer_watch is not None:
+        _pointer_watch.cancel()
+    await _scheduler.close()
+    _executor.shutdown()
+    await http_client.remote_images.aclose()
+
+
 def aggregate_predictions(images: list[dict]) -> dict[str, str | float | None]:
     """
     Majority vote on condition + mean confidence; then classify urgency.
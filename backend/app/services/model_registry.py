@@ -0,0 +1,257 @@
+"""
+Versioned model registry with atomic hot-swap and rollback.
+
+Retrained models live under models/versions/<model_version>/ with the same
+file names as models/final/ (best_model.keras, best_model_<q>.tflite,
+best_model.onnx), where <model_version> matches RetrainingLog.model_version.
+The bundled models/final/ model is the default version.
+
+A new version is loaded and warmed in the background while the current one
+keeps serving; the swap is a single reference assignment under a lock.
+Callers take one LoadedModel reference per forward pass, so in-flight
+batches finish on the model they started with. The previous version stays
+loaded so rollback is instant. The active version is recorded in
+models/versions/ACTIVE so restarts come back on the same model. Processes
+that have no model loaded (API workers in front of the inference server)
+report the version in that pointer, cached and re-read only when the file
+changes (refresh_pointer(), which blocks and belongs off the event loop).
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.services import inference_backends
+
+logger = logging.getLogger(__name__)
+
+_VERSION_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    version: str
+    path: Path
+    backend: Any
+    loaded_at: datetime
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return self.backend.predict(batch)
+
+    def predict_with_embeddings(self, batch: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+        return self.backend.predict_with_embeddings(batch)
+
+
+class ModelRegistry:
+    """Holds the active (and previous) loaded model and swaps them atomically."""
+
+    def __init__(
+        self,
+        final_dir: Path,
+        versions_dir: Path,
+        backend: str = "keras",
+        tflite_quantization: str = "float16",
+        num_threads: int | None = None,
+        default_version: str = "",
+        input_shape: tuple[int, int, int] = (224, 224, 3),
+    ):
+        self.final_dir = final_dir
+        self.versions_dir = versions_dir
+        self.backend = backend
+        self.tflite_quantization = tflite_quantization
+        self.num_threads = num_threads
+        self._default_version_setting = default_version
+        self._default_version: str | None = None
+        self.input_shape = input_shape
+        self._active: LoadedModel | None = None
+        self._previous: LoadedModel | None = None
+        self._swap_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.loading: str | None = None
+        self.last_error: str | None = None
+        # Version in the ACTIVE pointer, and the (mtime, size) it was read at
+        self._pointer_version: str | None = None
+        self._pointer_stamp: tuple[int, int] | None = None
+
+    @property
+    def _pointer_path(self) -> Path:
+        return self.versions_dir / "ACTIVE"
+
+    def _resolve_path(self, model_dir: Path) -> Path:
+        return inference_backends.model_path(self.backend, model_dir, self.tflite_quantization)
+
+    def default_version(self) -> str:
+        """Version id of models/final/: MODEL_VERSION setting, else file stem + short content hash."""
+        if self._default_version is None:
+            if self._default_version_setting:
+                self._default_version = self._default_version_setting
+            else:
+                path = self._resolve_path(self.final_dir)
+                digest = hashlib.sha256()
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        digest.update(chunk)
+                self._default_version = f"{path.stem}-{digest.hexdigest()[:12]}"
+        return self._default_version
+
+    def has_version(self, version: str) -> bool:
+        if version == self.default_version():
+            return True
+        if not _VERSION_RE.match(version):
+            return False
+        try:
+            self._resolve_path(self.versions_dir / version)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def model_dir(self, version: str) -> Path:
+        """Directory holding a version's model files (models/final for the default)."""
+        if version == self.default_version():
+            return self.final_dir
+        if not _VERSION_RE.match(version):
+            raise ValueError(f"Invalid model version {version!r}")
+        return self.versions_dir / version
+
+    def initial_version(self) -> str:
+        """Version recorded in the ACTIVE pointer if still present, else the default."""
+        if self._pointer_path.exists():
+            version = self._pointer_path.read_text(encoding="utf-8").strip()
+            if version and self.has_version(version):
+                return version
+        return self.default_version()
+
+    def refresh_pointer(self) -> bool:
+        """
+        Re-read the ACTIVE pointer if the file changed since the last call (blocking).
+
+        Returns:
+            True if the version it records changed.
+        """
+        try:
+            stat = self._pointer_path.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+        if self._pointer_version is not None and stamp == self._pointer_stamp:
+            return False
+        self._pointer_stamp = stamp
+        version = self.initial_version()
+        changed = version != self._pointer_version
+        self._pointer_version = version
+        return changed
+
+    @property
+    def pointer_version(self) -> str:
+        """Version in the ACTIVE pointer as of the last refresh_pointer()."""
+        if self._pointer_version is None:
+            self.refresh_pointer()
+        return self._pointer_version
+
+    def _load(self, version: str, warmup_sizes: list[int]) -> LoadedModel:
+        path = self._resolve_path(self.model_dir(version))
+        backend = inference_backends.load_backend(
+            self.backend, path, num_threads=self.num_threads, batch_sizes=warmup_sizes
+        )
+        # Trace graphs before the model takes traffic
+        for size in warmup_sizes:
+            backend.predict_with_embeddings(np.zeros((size, *self.input_shape), dtype=np.float32))
+        logger.info("Loaded model %s from %s (warm batch sizes %s)", version, path, warmup_sizes)
+        return LoadedModel(
+            version=version, path=path, backend=backend, loaded_at=datetime.now(timezone.utc)
+        )
+
+    def get(self, warmup_sizes: list[int] | None = None) -> LoadedModel:
+        """Return the active model, loading the initial version on first call."""
+        model = self._active
+        if model is not None:
+            return model
+        with self._load_lock:
+            if self._active is None:
+                self._active = self._load(self.initial_version(), warmup_sizes or [])
+            return self._active
+
+    def install(self, model: LoadedModel) -> None:
+        """Serve an already-loaded model (benchmarks with a stand-in model)."""
+        with self._swap_lock:
+            self._active = model
+
+    def active_version(self) -> str:
+        """Version of the loaded model, else the cached pointer version (no file access once resolved)."""
+        model = self._active
+        return model.version if model is not None else self.pointer_version
+
+    def write_pointer(self, version: str) -> None:
+        """Record the version to serve after a restart (and for the inference server to pick up)."""
+        try:
+            self.versions_dir.mkdir(parents=True, exist_ok=True)
+            self._pointer_path.write_text(version, encoding="utf-8")
+        except OSError as e:
+            logger.warning("Could not record active model version: %s", e)
+            return
+        # Re-read on the next refresh_pointer(); reports no change unless someone else wrote since
+        self._pointer_version = version
+        self._pointer_stamp = None
+
+    def activate(
+        self, version: str, warmup_sizes: list[int] | None = None, persist: bool = True
+    ) -> LoadedModel:
+        """Load and warm a version (blocking), then swap it in as active (and record it if persist)."""
+        with self._load_lock:
+            self.loading = version
+            self.last_error = None
+            try:
+                model = self._load(version, warmup_sizes or [])
+            except Exception as e:
+                self.last_error = f"{version}: {e}"
+                raise
+            finally:
+                self.loading = None
+            with self._swap_lock:
+                if self._active is not None and self._active.version != version:
+                    self._previous = self._active
+                self._active = model
+        if persist:
+            self.write_pointer(version)
+        return model
+
+    def rollback(self, persist: bool = True) -> LoadedModel:
+        """Swap the previous version back in (no reload), and record it if persist."""
+        with self._swap_lock:
+            if self._previous is None:
+                raise LookupError("No previous model version to roll back to")
+            self._active, self._previous = self._previous, self._active
+            model = self._active
+        if persist:
+            self.write_pointer(model.version)
+        return model
+
+    def previous_version(self) -> str | None:
+        model = self._previous
+        return model.version if model is not None else None
+
+    def release_previous(self) -> None:
+        """Drop the rollback target, e.g. where rollback is never served, to free its memory."""
+        with self._swap_lock:
+            self._previous = None
+
+    def status(self) -> dict:
+        def describe(model: LoadedModel | None) -> dict | None:
+            if model is None:
+                return None
+            return {"version": model.version, "path": str(model.path), "loaded_at": model.loaded_at}
+
+        return {
+            "backend": self.backend,
+            "active": describe(self._active),
+            "previous": describe(self._previous),
+            "loading": self.loading,
+            "last_error": self.last_error,
+        }
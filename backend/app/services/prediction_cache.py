@@ -0,0 +1,208 @@
+"""
+Content-addressed prediction cache.
+
+Results are keyed by the SHA-256 of the uploaded image bytes, the model
+version and a fingerprint of the settings that change what inference returns
+(settings_key), so a re-submitted photo (retry, attach to consultation)
+returns the stored prediction without running the model. Two tiers:
+
+- in-memory LRU with size and TTL eviction (per process)
+- optional persistent tier in Postgres (shared across workers and restarts).
+  Rows carry an expiry; lookups ignore expired rows and writes delete them
+  at most once per purge interval.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.database import async_session
+from app.models.prediction_cache import PredictionCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def image_hash(data: bytes) -> str:
+    """SHA-256 hex digest of raw image bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def settings_key(**options) -> str:
+    """Short stable fingerprint of inference-affecting settings, for the cache key."""
+    encoded = json.dumps(options, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()[:12]
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with a maximum size and per-entry TTL."""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class PredictionCache:
+    """Two-tier cache of predict_with_details results with hit/miss counters."""
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 3600.0,
+        persist: bool = False,
+        persist_ttl_seconds: float = 7 * 86400.0,
+        purge_interval_seconds: float = 3600.0,
+        variant: str = "",
+    ):
+        self.memory = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.persist = persist
+        self.persist_ttl_seconds = persist_ttl_seconds
+        self.purge_interval_seconds = purge_interval_seconds
+        self.variant = variant
+        self.hits = 0
+        self.misses = 0
+        self.db_hits = 0
+        self.purged = 0
+        self._last_purge = float("-inf")
+
+    def _key(self, digest: str, model_version: str) -> str:
+        return f"{digest}:{model_version}:{self.variant}"
+
+    def _memory_get(self, digest: str, model_version: str) -> dict | None:
+        value = self.memory.get(self._key(digest, model_version))
+        return copy.deepcopy(value) if value is not None else None
+
+    def get(self, digest: str, model_version: str) -> dict | None:
+        """In-memory lookup only (safe to call from worker threads)."""
+        value = self._memory_get(digest, model_version)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, digest: str, model_version: str, result: dict) -> None:
+        self.memory.set(self._key(digest, model_version), copy.deepcopy(result))
+
+    async def aget(self, digest: str, model_version: str) -> dict | None:
+        """Memory tier, then the persistent tier if enabled; counts a miss if neither has it."""
+        value = self._memory_get(digest, model_version)
+        if value is not None:
+            self.hits += 1
+            return value
+        if self.persist:
+            try:
+                async with async_session() as db:
+                    result = await db.execute(
+                        select(PredictionCacheEntry.result).where(
+                            PredictionCacheEntry.image_hash == digest,
+                            PredictionCacheEntry.model_version == model_version,
+                            PredictionCacheEntry.variant == self.variant,
+                            PredictionCacheEntry.expires_at > datetime.now(timezone.utc),
+                        )
+                    )
+                    stored = result.scalar_one_or_none()
+            except Exception as e:
+                logger.warning("Prediction cache lookup failed: %s", e)
+                stored = None
+            if stored is not None:
+                self.db_hits += 1
+                self.set(digest, model_version, stored)
+                return copy.deepcopy(stored)
+        self.misses += 1
+        return None
+
+    async def aset(self, digest: str, model_version: str, result: dict) -> None:
+        self.set(digest, model_version, result)
+        if not self.persist:
+            return
+        now = datetime.now(timezone.utc)
+        try:
+            async with async_session() as db:
+                # Refresh the expiry of an entry that has lapsed but not yet been purged
+                stmt = insert(PredictionCacheEntry).values(
+                    image_hash=digest,
+                    model_version=model_version,
+                    variant=self.variant,
+                    result=result,
+                    expires_at=now + timedelta(seconds=self.persist_ttl_seconds),
+                )
+                await db.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=["image_hash", "model_version", "variant"],
+                        set_={"result": stmt.excluded.result, "expires_at": stmt.excluded.expires_at},
+                        where=PredictionCacheEntry.expires_at <= now,
+                    )
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning("Prediction cache write failed: %s", e)
+            return
+        if time.monotonic() - self._last_purge >= self.purge_interval_seconds:
+            await self.purge_expired()
+
+    async def purge_expired(self) -> int:
+        """Delete expired rows from the persistent tier; returns how many were removed."""
+        if not self.persist:
+            return 0
+        self._last_purge = time.monotonic()
+        try:
+            async with async_session() as db:
+                result = await db.execute(
+                    delete(PredictionCacheEntry).where(
+                        PredictionCacheEntry.expires_at <= datetime.now(timezone.utc)
+                    )
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning("Prediction cache purge failed: %s", e)
+            return 0
+        self.purged += result.rowcount
+        return result.rowcount
+
+    def stats(self) -> dict[str, int | str]:
+        return {
+            "size": len(self.memory),
+            "hits": self.hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "purged": self.purged,
+            "variant": self.variant,
+        }
@@ -0,0 +1,147 @@
+"""
+Image-quality gate run before inference on live scans.
+
+Blurry, badly exposed or mostly-background photos still get a prediction
+from the model, but a low-confidence one, which classify_urgency turns into
+URGENT. The gate instead asks for a retake without spending model capacity.
+
+The checks run on every other pixel of the 224x224 uint8 array that
+preprocessing already produced (a 112x112 grid), so they take on the order
+of a hundred microseconds whatever the camera resolution:
+- blur: variance of the 4-neighbour Laplacian of luma (low = no edges);
+- exposure: share of clipped highlights and crushed shadows;
+- skin coverage: share of pixels inside a chrominance-only (YCrCb) skin range.
+  Luma is ignored, but very dark skin sits close to neutral chroma (RGB
+  35,28,26 has Cr 131.7), so the lower Cr bound decides whether FST V/VI
+  photos count as skin.
+
+Thresholds are QUALITY_* settings. Derive them from the validation split
+with src/models/quality_calibration.py, which reports the false-reject rate
+of every check per Fitzpatrick group. The gate is off until then.
+"""
+
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+# Default chrominance skin range (ITU-R BT.601 Cr, Cb); QUALITY_SKIN_CR/CB override it.
+# Cb <= 127 already excludes neutral greys, so Cr starts at 128 for dark skin.
+SKIN_CR = (128.0, 173.0)
+SKIN_CB = (77.0, 127.0)
+CLIPPED_HIGH = 250.0
+CLIPPED_LOW = 10.0
+
+_ADVICE = {
+    "blurry": "hold the camera steady and tap to focus",
+    "overexposed": "avoid direct light or flash glare",
+    "underexposed": "move to a brighter place",
+    "low_skin_coverage": "move closer so the skin area fills most of the frame",
+}
+
+
+@dataclass(frozen=True)
+class QualityReport:
+    issues: tuple[str, ...]
+    metrics: dict[str, float]
+    cost_us: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def usable(self) -> bool:
+        return not self.issues
+
+    def message(self) -> str:
+        problems = ", ".join(issue.replace("_", " ") for issue in self.issues)
+        advice = "; ".join(_ADVICE[issue] for issue in self.issues)
+        return f"Image quality too low to analyse ({problems}). Please retake the photo: {advice}."
+
+    def to_dict(self) -> dict:
+        return {"issues": list(self.issues), "metrics": self.metrics, "cost_us": self.cost_us}
+
+
+class ImageQualityError(Exception):
+    """An uploaded image failed the quality gate; index is its position in a multi-image upload."""
+
+    def __init__(self, report: QualityReport, index: int | None = None):
+        super().__init__(report.message())
+        self.report = report
+        self.index = index
+
+
+def _us(start: int) -> float:
+    return round((time.perf_counter_ns() - start) / 1000.0, 1)
+
+
+def _chroma(r: np.ndarray, g: np.ndarray, b: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    cr = 0.5 * r - 0.418688 * g - 0.081312 * b + 128.0
+    cb = 0.5 * b - 0.168736 * r - 0.331264 * g + 128.0
+    return cr, cb
+
+
+def chroma(x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Cr and Cb of the grid assess() samples from a uint8 (H, W, 3) image (for calibration)."""
+    sub = x[::2, ::2]
+    return _chroma(*(sub[..., c].astype(np.float32) for c in range(3)))
+
+
+def assess(
+    x: np.ndarray,
+    min_sharpness: float,
+    max_clipped_fraction: float,
+    min_skin_fraction: float,
+    skin_cr: tuple[float, float] = SKIN_CR,
+    skin_cb: tuple[float, float] = SKIN_CB,
+) -> QualityReport:
+    """
+    Run the blur, exposure and skin-coverage checks on one uint8 (H, W, 3) image.
+
+    cost_us gives the wall time of each check (plus the shared float
+    conversion) in microseconds.
+    """
+    start = time.perf_counter_ns()
+    # Every other pixel of the 224x224 input: the statistics and edge energy
+    # survive, at a quarter of the cost
+    sub = x[::2, ::2]
+    r, g, b = (sub[..., c].astype(np.float32) for c in range(3))
+    luma = 0.299 * r + 0.587 * g + 0.114 * b
+    cost = {"convert": _us(start)}
+
+    start = time.perf_counter_ns()
+    laplacian = luma[:-2, 1:-1] + luma[2:, 1:-1]
+    laplacian += luma[1:-1, :-2]
+    laplacian += luma[1:-1, 2:]
+    laplacian -= 4.0 * luma[1:-1, 1:-1]
+    sharpness = float(laplacian.var())
+    cost["blur"] = _us(start)
+
+    start = time.perf_counter_ns()
+    overexposed = float(np.count_nonzero(luma >= CLIPPED_HIGH)) / luma.size
+    underexposed = float(np.count_nonzero(luma <= CLIPPED_LOW)) / luma.size
+    cost["exposure"] = _us(start)
+
+    start = time.perf_counter_ns()
+    cr, cb = _chroma(r, g, b)
+    skin = (cr >= skin_cr[0]) & (cr <= skin_cr[1]) & (cb >= skin_cb[0]) & (cb <= skin_cb[1])
+    skin_fraction = float(np.count_nonzero(skin)) / skin.size
+    cost["skin"] = _us(start)
+    cost["total"] = round(sum(cost.values()), 1)
+
+    issues = []
+    if sharpness < min_sharpness:
+        issues.append("blurry")
+    if overexposed > max_clipped_fraction:
+        issues.append("overexposed")
+    if underexposed > max_clipped_fraction:
+        issues.append("underexposed")
+    if skin_fraction < min_skin_fraction:
+        issues.append("low_skin_coverage")
+    return QualityReport(
+        issues=tuple(issues),
+        metrics={
+            "sharpness": round(sharpness, 2),
+            "overexposed_fraction": round(overexposed, 4),
+            "underexposed_fraction": round(underexposed, 4),
+            "skin_fraction": round(skin_fraction, 4),
+        },
+        cost_us=cost,
+    )
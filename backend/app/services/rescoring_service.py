@@ -0,0 +1,406 @@
+"""
+Resumable bulk re-scoring of stored images with the active model version.
+
+After a retrain the stored predictions and consultation aggregates reflect
+the old model. A re-scoring job walks the images that were not scored by the
+target version in keyset order (image_id > checkpoint, RESCORING_CHUNK_SIZE
+rows at a time), so every chunk is an index range scan regardless of how far
+the job has got. For each chunk it:
+
+1. downloads the images concurrently through the pooled HTTP client, while the
+   previous chunk is still being scored;
+2. scores them in RESCORING_BATCH_SIZE batches, each a single job on the
+   inference pool (see ml_service.predict_bulk_async);
+3. bulk-updates the image rows, re-aggregates only consultations whose images
+   changed, and advances the checkpoint, all in one transaction;
+4. notifies specialists about consultations that became URGENT, as a new
+   upload would.
+
+A crash therefore loses at most the chunk in flight. Jobs hold a lease
+(heartbeat_at, refreshed after every scoring batch, so a slow chunk does not
+outlive it); a RUNNING job whose lease expired (or
+that was interrupted by a shutdown) is resumed at startup or through
+POST /api/models/rescoring/{job_id}/resume. Images that cannot be fetched or
+decoded are counted as failed and keep their old prediction.
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.models.consultation import Consultation
+from app.models.image import Image
+from app.models.rescoring_job import RescoringJob
+from app.services import ml_service, notification_service, similar_case_service, storage_service
+
+logger = logging.getLogger(__name__)
+
+_tasks: dict[UUID, asyncio.Task] = {}
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def job_progress(job: RescoringJob) -> dict:
+    """Job row plus throughput and an ETA from the time spent running so far."""
+    rate = job.processed / job.running_seconds if job.running_seconds else None
+    remaining = max(job.total_images - job.processed, 0)
+    return {
+        "job_id": job.job_id,
+        "model_version": job.model_version,
+        "status": job.status,
+        "chunk_size": job.chunk_size,
+        "total_images": job.total_images,
+        "processed": job.processed,
+        "changed": job.changed,
+        "failed": job.failed,
+        "consultations_updated": job.consultations_updated,
+        "running_seconds": round(job.running_seconds, 1),
+        "images_per_sec": round(rate, 1) if rate else None,
+        "eta_seconds": round(remaining / rate, 0) if rate and job.status == "RUNNING" else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "heartbeat_at": job.heartbeat_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _pending_images(model_version: str):
+    return Image.model_version.is_distinct_from(model_version)
+
+
+async def start_job(db: AsyncSession, chunk_size: int | None = None) -> RescoringJob:
+    """Create a job for the active model version and start it. 409 if one is already active."""
+    if not ml_service.is_ready():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Model is not loaded yet"
+        )
+    result = await db.execute(
+        select(RescoringJob).where(RescoringJob.status.in_(("PENDING", "RUNNING")))
+    )
+    active = result.scalars().first()
+    if active is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Re-scoring job {active.job_id} is already {active.status.lower()}",
+        )
+    version = ml_service.get_model_version()
+    total = await db.scalar(
+        select(func.count()).select_from(Image).where(_pending_images(version))
+    )
+    job = RescoringJob(
+        model_version=version,
+        chunk_size=chunk_size or settings.RESCORING_CHUNK_SIZE,
+        total_images=total or 0,
+        status="PENDING",
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    _launch(job.job_id)
+    return job
+
+
+async def get_job(job_id: UUID, db: AsyncSession) -> RescoringJob:
+    job = await db.get(RescoringJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Re-scoring job not found")
+    return job
+
+
+async def list_jobs(db: AsyncSession, limit: int = 20) -> list[RescoringJob]:
+    result = await db.execute(
+        select(RescoringJob).order_by(RescoringJob.created_at.desc()).limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def cancel_job(job_id: UUID, db: AsyncSession) -> RescoringJob:
+    """Stop a job after its current chunk; progress so far is kept."""
+    job = await get_job(job_id, db)
+    if job.status not in ("PENDING", "RUNNING", "FAILED"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=f"Job is already {job.status.lower()}"
+        )
+    job.status = "CANCELLED"
+    job.finished_at = _utc_now()
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def resume_job(job_id: UUID, db: AsyncSession) -> RescoringJob:
+    """Continue a failed or interrupted job from its checkpoint."""
+    job = await get_job(job_id, db)
+    if job.job_id in _tasks:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Job is running in this process")
+    if job.status not in ("PENDING", "RUNNING", "FAILED"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status.lower()}"
+        )
+    lease_expires = _utc_now() - timedelta(seconds=settings.RESCORING_LEASE_SECONDS)
+    if job.status == "RUNNING" and job.heartbeat_at is not None and job.heartbeat_at > lease_expires:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Job is running in another worker"
+        )
+    _launch(job.job_id)
+    return job
+
+
+async def resume_interrupted() -> None:
+    """Startup hook: resume RUNNING jobs whose lease was released or expired."""
+    async with async_session() as db:
+        result = await db.execute(
+            select(RescoringJob.job_id).where(RescoringJob.status == "RUNNING", _lease_free())
+        )
+        for job_id in result.scalars().all():
+            _launch(job_id)
+
+
+def _lease_free():
+    stale = func.now() - timedelta(seconds=settings.RESCORING_LEASE_SECONDS)
+    return or_(RescoringJob.heartbeat_at.is_(None), RescoringJob.heartbeat_at < stale)
+
+
+def _launch(job_id: UUID) -> None:
+    task = asyncio.create_task(_run(job_id))
+    _tasks[job_id] = task
+    task.add_done_callback(lambda t: _tasks.pop(job_id, None))
+
+
+async def _claim(job_id: UUID, db: AsyncSession) -> RescoringJob | None:
+    """Take the job's lease; None if another process holds it or the job is finished."""
+    result = await db.execute(
+        update(RescoringJob)
+        .where(
+            RescoringJob.job_id == job_id,
+            or_(
+                RescoringJob.status.in_(("PENDING", "FAILED")),
+                and_(RescoringJob.status == "RUNNING", _lease_free()),
+            ),
+        )
+        .values(status="RUNNING", heartbeat_at=func.now(), error=None)
+        .returning(RescoringJob.job_id)
+    )
+    claimed = result.scalar_one_or_none()
+    await db.commit()
+    if claimed is None:
+        return None
+    return await db.get(RescoringJob, job_id, populate_existing=True)
+
+
+async def _fetch(urls: list[str]) -> list[bytes | None]:
+    fetched = await asyncio.gather(
+        *(storage_service.fetch_image(url) for url in urls), return_exceptions=True
+    )
+    return [data if isinstance(data, bytes) else None for data in fetched]
+
+
+async def _next_rows(job: RescoringJob, after: UUID | None, db: AsyncSession) -> list:
+    query = select(
+        Image.image_id, Image.image_url, Image.consultation_id,
+        Image.predicted_condition, Image.confidence,
+    ).where(_pending_images(job.model_version))
+    if after is not None:
+        query = query.where(Image.image_id > after)
+    result = await db.execute(query.order_by(Image.image_id).limit(job.chunk_size))
+    return list(result.all())
+
+
+async def _heartbeat(job_id: UUID) -> None:
+    """Renew the lease in its own transaction; the chunk's updates stay uncommitted."""
+    async with async_session() as db:
+        await db.execute(
+            update(RescoringJob)
+            .where(RescoringJob.job_id == job_id, RescoringJob.status == "RUNNING")
+            .values(heartbeat_at=func.now())
+        )
+        await db.commit()
+
+
+async def _score(job_id: UUID, images: list[bytes | None]) -> list:
+    """Predictions for the fetched images in RESCORING_BATCH_SIZE batches (None where missing)."""
+    results = [None] * len(images)
+    present = [i for i, data in enumerate(images) if data is not None]
+    size = settings.RESCORING_BATCH_SIZE
+    for start in range(0, len(present), size):
+        part = present[start : start + size]
+        for i, prediction in zip(part, await ml_service.predict_bulk_async([images[i] for i in part])):
+            results[i] = prediction
+        await _heartbeat(job_id)
+    return results
+
+
+async def _reaggregate(consultation_ids: set[UUID], db: AsyncSession) -> list[UUID]:
+    """
+    Recompute the ML aggregate of these consultations from their (updated) images.
+
+    Uses the same aggregation as consultation_service.update_ml_results, as one
+    bulk update inside the chunk's transaction, so the aggregates commit
+    together with the image rows and the checkpoint.
+
+    Returns:
+        IDs of the consultations that were not URGENT before and are now.
+    """
+    result = await db.execute(
+        select(Consultation.consultation_id, Consultation.urgency).where(
+            Consultation.consultation_id.in_(consultation_ids)
+        )
+    )
+    previous = dict(result.all())
+    result = await db.execute(
+        select(Image.consultation_id, Image.predicted_condition, Image.confidence).where(
+            Image.consultation_id.in_(consultation_ids)
+        )
+    )
+    grouped = defaultdict(list)
+    for consultation_id, condition, confidence in result.all():
+        grouped[consultation_id].append({"predicted_condition": condition, "confidence": confidence})
+    updates, escalated = [], []
+    for consultation_id in consultation_ids:
+        aggregated = ml_service.aggregate_predictions(grouped[consultation_id])
+        updates.append({"consultation_id": consultation_id, **aggregated})
+        if aggregated["urgency"] == "URGENT" and previous.get(consultation_id) != "URGENT":
+            escalated.append(consultation_id)
+    await db.execute(update(Consultation), updates)
+    return escalated
+
+
+async def _notify_urgent(consultation_ids: list[UUID]) -> None:
+    """
+    Alert specialists about consultations re-scoring made URGENT.
+
+    Runs after the chunk commits, each in its own session, so a failed
+    notification neither rolls back the chunk nor stops the job.
+    """
+    for consultation_id in consultation_ids:
+        try:
+            async with async_session() as db:
+                consultation = await db.get(Consultation, consultation_id)
+                if consultation is not None and consultation.urgency == "URGENT":
+                    await notification_service.notify_urgent_case(consultation, db)
+        except Exception as e:
+            logger.warning("Urgent-case notification for %s failed: %s", consultation_id, e)
+
+
+async def _process(job: RescoringJob, rows: list, images: list[bytes | None], db: AsyncSession) -> bool:
+    """Score one chunk and commit it with the checkpoint; False if the job must stop."""
+    started = time.perf_counter()
+    predictions = await _score(job.job_id, images)
+    updates, affected, changed, failed = [], set(), 0, 0
+    for row, prediction in zip(rows, predictions):
+        if prediction is None:
+            failed += 1
+            continue
+        if prediction.model_version != job.model_version:
+            job.status, job.error = "FAILED", (
+                f"Active model changed to {prediction.model_version}; start a new job"
+            )
+            return False
+        confidence = round(prediction.confidence, 4)
+        if row.predicted_condition != prediction.predicted_condition or row.confidence != confidence:
+            changed += 1
+            if row.consultation_id is not None:
+                affected.add(row.consultation_id)
+        updates.append({
+            "image_id": row.image_id,
+            "predicted_condition": prediction.predicted_condition,
+            "confidence": confidence,
+            "model_version": prediction.model_version,
+            "embedding": prediction.embedding_bytes,
+        })
+    if updates:
+        await db.execute(update(Image), updates)
+    escalated = await _reaggregate(affected, db) if affected else []
+
+    job.last_image_id = rows[-1].image_id
+    job.processed += len(rows)
+    job.changed += changed
+    job.failed += failed
+    job.consultations_updated += len(affected)
+    elapsed = time.perf_counter() - started
+    job.running_seconds += elapsed
+    job.heartbeat_at = _utc_now()
+    await db.commit()
+    await _notify_urgent(escalated)
+    await similar_case_service.index_images([u["image_id"] for u in updates], db)
+    logger.info(
+        "Re-scoring %s: %d/%d images, %.1f images/s (chunk), %d failed",
+        job.job_id, job.processed, job.total_images, len(rows) / elapsed, job.failed,
+    )
+    return True
+
+
+async def _still_running(job_id: UUID, db: AsyncSession) -> bool:
+    return await db.scalar(select(RescoringJob.status).where(RescoringJob.job_id == job_id)) == "RUNNING"
+
+
+async def _run(job_id: UUID) -> None:
+    while not ml_service.is_ready():
+        await asyncio.sleep(1.0)
+    async with async_session() as db:
+        job = await _claim(job_id, db)
+        if job is None:
+            return
+        if job.model_version != ml_service.get_model_version():
+            job.status, job.error = "FAILED", (
+                f"Job targets {job.model_version} but {ml_service.get_model_version()} is active"
+            )
+            await db.commit()
+            return
+        prefetch: asyncio.Task | None = None
+        try:
+            rows = await _next_rows(job, job.last_image_id, db)
+            prefetch = asyncio.create_task(_fetch([row.image_url for row in rows]))
+            while rows:
+                images = await prefetch
+                # Download the next chunk while this one is scored
+                next_rows = await _next_rows(job, rows[-1].image_id, db)
+                prefetch = asyncio.create_task(_fetch([row.image_url for row in next_rows]))
+                if not await _still_running(job_id, db):
+                    return  # cancelled
+                if not await _process(job, rows, images, db):
+                    await db.commit()
+                    return
+                rows = next_rows
+            job.status = "COMPLETED"
+            job.finished_at = _utc_now()
+            await db.commit()
+        except asyncio.CancelledError:
+            # Shutdown: release the lease so the next startup resumes right away
+            await db.rollback()
+            await db.execute(
+                update(RescoringJob).where(RescoringJob.job_id == job_id).values(heartbeat_at=None)
+            )
+            await db.commit()
+            raise
+        except Exception as e:
+            logger.exception("Re-scoring job %s failed", job_id)
+            await db.rollback()
+            await db.execute(
+                update(RescoringJob)
+                .where(RescoringJob.job_id == job_id)
+                .values(status="FAILED", error=str(e)[:500], heartbeat_at=None)
+            )
+            await db.commit()
+        finally:
+            if prefetch is not None and not prefetch.done():
+                prefetch.cancel()
+
+
+async def shutdown() -> None:
+    """Cancel running jobs (they resume from their checkpoint on the next startup)."""
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
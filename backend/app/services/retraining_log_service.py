@@ -32,6 +32,22 @@ async def get_log(log_id: UUID, db: AsyncSession) -> RetrainingLog:
     return log
 
 
+async def get_log_by_version(model_version: str, db: AsyncSession) -> RetrainingLog:
+    result = await db.execute(
+        select(RetrainingLog)
+        .where(RetrainingLog.model_version == model_version)
+        .order_by(RetrainingLog.retrained_at.desc())
+        .limit(1)
+    )
+    log = result.scalar_one_or_none()
+    if not log:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No retraining log for this model version",
+        )
+    return log
+
+
 async def list_logs(db: AsyncSession) -> list[RetrainingLog]:
     result = await db.execute(
         select(RetrainingLog).order_by(RetrainingLog.retrained_at.desc())
@@ -0,0 +1,220 @@
+"""
+Similar-case search over reviewed images.
+
+Every scan stores its float16 embedding on the Image row. Images that have a
+reviewed_label are kept in an in-process VectorIndex for the active model
+version (embeddings from different model versions are not comparable):
+
+- loaded from models/index/similar_cases_<version>.npz at first use, then
+  reconciled with the database (new reviews, relabels, deletions); built from
+  the database when no file exists
+- updated incrementally when an image is reviewed or deleted
+- saved every SIMILARITY_INDEX_SAVE_EVERY changes and on shutdown
+"""
+
+import asyncio
+import logging
+from pathlib import Path
+from uuid import UUID
+
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.image import Image
+from app.services import ml_service
+from app.services.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+_INDEX_DIR = (
+    Path(settings.SIMILARITY_INDEX_DIR)
+    if settings.SIMILARITY_INDEX_DIR
+    else Path(__file__).resolve().parents[3] / "models" / "index"
+)
+
+_index: VectorIndex | None = None
+_index_version: str | None = None
+_index_lock = asyncio.Lock()
+_unsaved = 0
+_training: asyncio.Task | None = None
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _index_path(version: str) -> Path:
+    return _INDEX_DIR / f"similar_cases_{version}.npz"
+
+
+def _vector(embedding: bytes) -> np.ndarray:
+    return np.frombuffer(embedding, dtype=np.float16)
+
+
+def _indexed_criteria(version: str) -> tuple:
+    return (
+        Image.reviewed_label.isnot(None),
+        Image.embedding.isnot(None),
+        Image.model_version == version,
+    )
+
+
+async def _sync_with_db(index: VectorIndex | None, version: str, db: AsyncSession) -> VectorIndex | None:
+    """Bring an index loaded from disk (or a new one) in line with the reviewed images in the database."""
+    result = await db.execute(
+        select(Image.image_id, Image.reviewed_label).where(*_indexed_criteria(version))
+    )
+    labels = {str(image_id): label for image_id, label in result.all()}
+    if index is not None:
+        for key in set(index.keys()) - labels.keys():
+            index.remove(key)
+        for key, label in labels.items():
+            if key in index and index.label(key) != label:
+                index.set_label(key, label)
+    missing = [key for key in labels if index is None or key not in index]
+    for start in range(0, len(missing), 1000):
+        chunk = [UUID(key) for key in missing[start : start + 1000]]
+        result = await db.execute(
+            select(Image.image_id, Image.embedding).where(Image.image_id.in_(chunk))
+        )
+        for image_id, embedding in result.all():
+            vector = _vector(embedding)
+            if index is None:
+                index = VectorIndex(
+                    len(vector),
+                    nprobe=settings.SIMILARITY_INDEX_NPROBE,
+                    train_min=settings.SIMILARITY_INDEX_TRAIN_MIN,
+                )
+            index.add(str(image_id), vector, labels[str(image_id)])
+    return index
+
+
+async def get_index(db: AsyncSession) -> VectorIndex | None:
+    """Index for the active model version, loading or building it on first use (None if empty)."""
+    global _index, _index_version, _unsaved
+    version = ml_service.get_model_version()
+    if _index_version == version:
+        return _index
+    async with _index_lock:
+        if _index_version == version:
+            return _index
+        index = None
+        path = _index_path(version)
+        if path.exists():
+            try:
+                index, _ = await asyncio.to_thread(VectorIndex.load, path)
+            except Exception as e:
+                logger.warning("Could not load similar-case index %s: %s", path, e)
+        index = await _sync_with_db(index, version, db)
+        _index, _index_version, _unsaved = index, version, 0
+        if index is not None:
+            logger.info("Similar-case index ready for %s: %s", version, index.stats())
+            _after_change(0)
+        return _index
+
+
+def _after_change(changes: int) -> None:
+    """Schedule background k-means retraining and periodic saves."""
+    global _unsaved, _training
+    _unsaved += changes
+    if _index is None:
+        return
+    if _index.needs_training() and (_training is None or _training.done()):
+        _training = asyncio.create_task(asyncio.to_thread(_index.train))
+        _background_tasks.add(_training)
+        _training.add_done_callback(_on_background_done)
+    if _unsaved >= settings.SIMILARITY_INDEX_SAVE_EVERY:
+        _unsaved = 0
+        task = asyncio.create_task(
+            asyncio.to_thread(_index.save, _index_path(_index_version), model_version=_index_version)
+        )
+        _background_tasks.add(task)
+        task.add_done_callback(_on_background_done)
+
+
+def _on_background_done(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Similar-case index maintenance failed: %s", task.exception())
+
+
+async def index_images(image_ids: list[UUID], db: AsyncSession) -> None:
+    """Add (or relabel) reviewed images in the loaded index; call after their review is committed."""
+    global _index
+    if _index_version is None or not image_ids:
+        return  # not loaded yet; picked up from the database at load time
+    result = await db.execute(
+        select(Image.image_id, Image.reviewed_label, Image.embedding).where(
+            Image.image_id.in_(image_ids), *_indexed_criteria(_index_version)
+        )
+    )
+    rows = result.all()
+    for image_id, label, embedding in rows:
+        vector = _vector(embedding)
+        if _index is None:
+            _index = VectorIndex(
+                len(vector),
+                nprobe=settings.SIMILARITY_INDEX_NPROBE,
+                train_min=settings.SIMILARITY_INDEX_TRAIN_MIN,
+            )
+        _index.add(str(image_id), vector, label)
+    _after_change(len(rows))
+
+
+def remove_image(image_id: UUID) -> None:
+    if _index is not None and _index.remove(str(image_id)):
+        _after_change(1)
+
+
+async def _query_vector(image: Image, db: AsyncSession) -> np.ndarray:
+    """Stored embedding if it matches the active model, else one from a (cached) prediction."""
+    if image.model_version == _index_version:
+        embedding = await db.scalar(
+            select(Image.embedding).where(Image.image_id == image.image_id)
+        )
+        if embedding is not None:
+            return _vector(embedding)
+    prediction = await ml_service.predict_async(image.image_url, screen=False, quality_check=False)
+    if prediction.embedding is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The active model does not provide embeddings",
+        )
+    return prediction.embedding
+
+
+async def find_similar(image_id: UUID, k: int, db: AsyncSession) -> list[dict]:
+    """Up to k reviewed images most similar to the given image, most similar first."""
+    result = await db.execute(select(Image).where(Image.image_id == image_id))
+    image = result.scalar_one_or_none()
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Image not found"
+        )
+    index = await get_index(db)
+    if index is None:
+        return []
+    hits = index.search(await _query_vector(image, db), k=k, exclude=str(image_id))
+    if not hits:
+        return []
+    result = await db.execute(
+        select(Image).where(Image.image_id.in_([UUID(key) for key, _, _ in hits]))
+    )
+    images = {str(img.image_id): img for img in result.scalars().all()}
+    return [
+        {"image": images[key], "similarity": score}
+        for key, _, score in hits
+        if key in images
+    ]
+
+
+def index_stats() -> dict | None:
+    if _index is None:
+        return None
+    return {"model_version": _index_version, **_index.stats()}
+
+
+async def shutdown() -> None:
+    """Save the index if it changed since the last save (called on app shutdown)."""
+    if _index is not None and _unsaved:
+        await asyncio.to_thread(_index.save, _index_path(_index_version), model_version=_index_version)
@@ -0,0 +1,225 @@
+"""
+Pluggable storage backends for uploaded images.
+
+All backends are blocking (storage_service runs them on its own thread pool)
+and share one interface:
+
+- upload(contents, folder, content_hash) -> {"url", "storage_key", "file_size", "deduplicated"}
+- delete(storage_key) -> bool
+- local_path(url) -> the file behind a stored URL, or None when it is not on local disk
+
+Selected by STORAGE_BACKEND:
+
+- cloudinary: the Cloudinary upload API (CLOUDINARY_*)
+- local:      files under STORAGE_LOCAL_DIR, served by the API at STORAGE_LOCAL_URL
+- s3:         any S3-compatible bucket (S3_*; boto3 is imported lazily)
+
+The local backend is content-addressed: the key is the image's SHA-256, so
+the same photo uploaded twice is stored once. Files live under images/ (the
+only directory the API serves) and each key has a reference count under
+refs/. delete() drops one reference and removes the file with the last one.
+Counts are updated under a file lock, so several API processes can share the
+directory.
+"""
+
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from app.services.prediction_cache import image_hash
+
+try:
+    import fcntl
+except ImportError:  # Windows: keys are then locked per process only
+    fcntl = None
+
+BACKENDS = ("cloudinary", "local", "s3")
+
+_EXTENSIONS = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF8", ".gif"),
+)
+_CONTENT_TYPES = {".jpg": "image/jpeg", ".png": "image/png", ".gif": "image/gif", ".webp": "image/webp"}
+
+
+def extension(contents: bytes) -> str:
+    """File extension for the image format sniffed from the leading bytes ("" if unknown)."""
+    if contents[:4] == b"RIFF" and contents[8:12] == b"WEBP":
+        return ".webp"
+    for magic, ext in _EXTENSIONS:
+        if contents.startswith(magic):
+            return ext
+    return ""
+
+
+class CloudinaryStorage:
+    name = "cloudinary"
+
+    def __init__(self, cloud_name: str, api_key: str, api_secret: str):
+        import cloudinary
+        import cloudinary.uploader
+
+        cloudinary.config(cloud_name=cloud_name, api_key=api_key, api_secret=api_secret, secure=True)
+        self._uploader = cloudinary.uploader
+
+    def upload(self, contents: bytes, folder: str = "dermoai", content_hash: str | None = None) -> dict:
+        result = self._uploader.upload(contents, folder=folder, resource_type="image")
+        return {
+            "url": result["secure_url"],
+            "storage_key": result["public_id"],
+            "file_size": result.get("bytes", 0),
+            "deduplicated": False,
+        }
+
+    def delete(self, storage_key: str) -> bool:
+        return self._uploader.destroy(storage_key).get("result") == "ok"
+
+    def local_path(self, url: str) -> Path | None:
+        return None
+
+
+class LocalStorage:
+    name = "local"
+
+    def __init__(self, root: Path, base_url: str):
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+        self.images_dir = self.root / "images"
+        self._refs_dir = self.root / "refs"
+        self._locks_dir = self.root / "locks"
+        for directory in (self.images_dir, self._refs_dir, self._locks_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        self._thread_lock = threading.Lock()
+
+    def _path(self, storage_key: str) -> Path:
+        path = (self.images_dir / storage_key).resolve()
+        if not path.is_relative_to(self.images_dir):
+            raise ValueError(f"Storage key {storage_key!r} is outside the storage directory")
+        return path
+
+    def _refs_path(self, storage_key: str) -> Path:
+        relative = self._path(storage_key).relative_to(self.images_dir)
+        return self._refs_dir / f"{relative}.refs"
+
+    @contextmanager
+    def _locked(self, digest: str) -> Iterator[None]:
+        """Exclusive lock for one key, across threads and processes (one lock file per prefix)."""
+        if fcntl is None:
+            with self._thread_lock:
+                yield
+            return
+        # flock() locks belong to the open file, so threads exclude each other too
+        with open(self._locks_dir / f"{digest[:2]}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def references(self, storage_key: str) -> int:
+        """Number of stored images sharing this key (0 if it is not stored)."""
+        path = self._path(storage_key)
+        try:
+            return int(self._refs_path(storage_key).read_text())
+        except (FileNotFoundError, ValueError):
+            return 1 if path.exists() else 0
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def upload(self, contents: bytes, folder: str = "dermoai", content_hash: str | None = None) -> dict:
+        # Keyed by content alone, so identical bytes dedupe across folders
+        digest = content_hash or image_hash(contents)
+        storage_key = f"{digest[:2]}/{digest}{extension(contents)}"
+        path = self._path(storage_key)
+        refs_path = self._refs_path(storage_key)
+        with self._locked(digest):
+            refs = self.references(storage_key)
+            if refs == 0:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._write_atomic(path, contents)
+            refs_path.parent.mkdir(parents=True, exist_ok=True)
+            self._write_atomic(refs_path, str(refs + 1).encode())
+        return {
+            "url": f"{self.base_url}/{storage_key}",
+            "storage_key": storage_key,
+            "file_size": len(contents),
+            "deduplicated": refs > 0,
+        }
+
+    def delete(self, storage_key: str) -> bool:
+        path = self._path(storage_key)
+        refs_path = self._refs_path(storage_key)
+        with self._locked(path.stem):
+            refs = self.references(storage_key)
+            if refs == 0:
+                return False
+            if refs > 1:
+                self._write_atomic(refs_path, str(refs - 1).encode())
+            else:
+                path.unlink(missing_ok=True)
+                refs_path.unlink(missing_ok=True)
+        return True
+
+    def local_path(self, url: str) -> Path | None:
+        if not url.startswith(self.base_url + "/"):
+            return None
+        try:
+            return self._path(url[len(self.base_url) + 1 :])
+        except ValueError:
+            return None
+
+
+class S3Storage:
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        public_url: str,
+        endpoint_url: str | None = None,
+        region: str | None = None,
+        access_key_id: str | None = None,
+        secret_access_key: str | None = None,
+    ):
+        import boto3
+
+        self.bucket = bucket
+        self.public_url = public_url.rstrip("/")
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key_id or None,
+            aws_secret_access_key=secret_access_key or None,
+        )
+
+    def upload(self, contents: bytes, folder: str = "dermoai", content_hash: str | None = None) -> dict:
+        ext = extension(contents)
+        storage_key = f"{folder}/{uuid.uuid4().hex}{ext}"
+        self._client.put_object(
+            Bucket=self.bucket,
+            Key=storage_key,
+            Body=contents,
+            ContentType=_CONTENT_TYPES.get(ext, "application/octet-stream"),
+        )
+        return {
+            "url": f"{self.public_url}/{storage_key}",
+            "storage_key": storage_key,
+            "file_size": len(contents),
+            "deduplicated": False,
+        }
+
+    def delete(self, storage_key: str) -> bool:
+        self._client.delete_object(Bucket=self.bucket, Key=storage_key)
+        return True
+
+    def local_path(self, url: str) -> Path | None:
+        return None
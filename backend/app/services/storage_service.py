@@ -0,0 +1,118 @@
+"""
+Image storage, through the backend selected by STORAGE_BACKEND.
+
+Backends are blocking (see storage_backends). Their calls run on a dedicated
+pool, so they neither stall the event loop nor queue behind other to_thread
+work (similar-case index training and saves) on the shared default executor.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from fastapi import HTTPException, status
+
+from app.core import metrics
+from app.core.config import settings
+from app.services import http_client, storage_backends
+
+_upload_seconds = metrics.SCAN_STAGE_SECONDS.labels("upload")
+_fetch_seconds = metrics.SCAN_STAGE_SECONDS.labels("fetch")
+
+LOCAL_DIR = (
+    Path(settings.STORAGE_LOCAL_DIR)
+    if settings.STORAGE_LOCAL_DIR
+    else Path(__file__).resolve().parents[3] / "media"
+)
+
+_pool = ThreadPoolExecutor(
+    max_workers=settings.STORAGE_UPLOAD_WORKERS, thread_name_prefix="storage"
+)
+_backend = None
+_stats = {"uploads": 0, "deduplicated": 0, "bytes_stored": 0, "deletes": 0, "local_reads": 0}
+
+
+def load_backend(name: str):
+    """Instantiate a storage backend from settings."""
+    if name == "cloudinary":
+        return storage_backends.CloudinaryStorage(
+            settings.CLOUDINARY_CLOUD_NAME, settings.CLOUDINARY_API_KEY, settings.CLOUDINARY_API_SECRET
+        )
+    if name == "local":
+        return storage_backends.LocalStorage(LOCAL_DIR, settings.STORAGE_LOCAL_URL)
+    if name == "s3":
+        return storage_backends.S3Storage(
+            bucket=settings.S3_BUCKET,
+            public_url=settings.S3_PUBLIC_URL,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        )
+    raise ValueError(
+        f"Unknown storage backend {name!r}; expected one of {storage_backends.BACKENDS}"
+    )
+
+
+def get_backend():
+    """The configured backend, created on first use."""
+    global _backend
+    if _backend is None:
+        _backend = load_backend(settings.STORAGE_BACKEND)
+    return _backend
+
+
+async def _run(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_pool, fn, *args)
+
+
+async def upload_image(
+    contents: bytes, folder: str = "dermoai", content_hash: str | None = None
+) -> dict[str, str | int]:
+    """
+    Store an image.
+
+    Returns:
+        Dict with url, storage_key, file_size and deduplicated (the local
+        backend already held these bytes and only added a reference).
+    """
+    with _upload_seconds.time():
+        result = await _run(get_backend().upload, contents, folder, content_hash)
+    _stats["uploads"] += 1
+    if result["deduplicated"]:
+        _stats["deduplicated"] += 1
+    else:
+        _stats["bytes_stored"] += result["file_size"]
+    return result
+
+
+async def delete_image(storage_key: str) -> bool:
+    """Delete a stored image (with the local backend, one reference to it)."""
+    _stats["deletes"] += 1
+    return await _run(get_backend().delete, storage_key)
+
+
+async def fetch_image(url: str) -> bytes:
+    """Bytes of a stored image: straight from disk for local storage, else over HTTP."""
+    path = get_backend().local_path(url)
+    if path is None:
+        return await http_client.fetch_image(url)
+    start = time.perf_counter()
+    try:
+        data = await _run(path.read_bytes)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stored image not found")
+    _stats["local_reads"] += 1
+    _fetch_seconds.observe(time.perf_counter() - start)
+    return data
+
+
+def stats() -> dict[str, int | str]:
+    backend = _backend.name if _backend is not None else settings.STORAGE_BACKEND
+    return {"backend": backend, **_stats}
+
+
+async def shutdown() -> None:
+    """Let in-flight uploads finish and stop the pool (called on app shutdown)."""
+    await asyncio.to_thread(_pool.shutdown, wait=True)
@@ -0,0 +1,204 @@
+"""
+Bounded, streaming reads of uploaded images.
+
+`await file.read()` pulls a whole upload into memory with no limit, so a few
+large concurrent uploads can spike a worker's RSS. Here uploads are read in
+UPLOAD_CHUNK_BYTES chunks, rejected with 413 as soon as they exceed
+UPLOAD_MAX_BYTES, and hashed (SHA-256) in the same pass. The resulting bytes
+object is the one buffer handed to both storage and inference; the hash is
+passed along so the prediction cache does not re-hash it.
+
+Requests whose declared body is larger than UPLOAD_MAX_FILES x UPLOAD_MAX_BYTES
+are refused by UploadLimitMiddleware before the multipart body is parsed.
+
+Bytes held by in-flight uploads are counted, so peak upload memory per
+request and per process is reported by upload_stats() (see GET /api/models/stats).
+"""
+
+import hashlib
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+
+# Allowance for multipart boundaries, part headers and plain form fields
+_FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class UploadedImage:
+    """One upload read into memory: the bytes, their SHA-256 and size."""
+
+    data: bytes
+    content_hash: str
+    filename: str | None = None
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+class _UploadMemory:
+    """Bytes currently buffered by upload reads, with per-process and per-request peaks."""
+
+    def __init__(self):
+        self.buffered_bytes = 0
+        self.peak_buffered_bytes = 0
+        self.peak_request_bytes = 0
+        self.uploads = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def add(self, n: int) -> None:
+        with self._lock:
+            self.buffered_bytes += n
+            self.peak_buffered_bytes = max(self.peak_buffered_bytes, self.buffered_bytes)
+
+    def release(self, n: int) -> None:
+        with self._lock:
+            self.buffered_bytes -= n
+
+    def finish_request(self, request_bytes: int, files: int) -> None:
+        with self._lock:
+            self.peak_request_bytes = max(self.peak_request_bytes, request_bytes)
+            self.uploads += files
+
+    def reject(self) -> None:
+        with self._lock:
+            self.rejected += 1
+
+
+_memory = _UploadMemory()
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    _memory.reject()
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Image exceeds {max_bytes} bytes",
+    )
+
+
+async def read_upload(file: UploadFile, max_bytes: int | None = None) -> UploadedImage:
+    """
+    Read an upload in chunks, hashing as it goes; 413 past max_bytes.
+
+    Args:
+        file: Uploaded file (already spooled by the multipart parser).
+        max_bytes: Size limit; defaults to UPLOAD_MAX_BYTES.
+
+    Returns:
+        UploadedImage with the bytes and their SHA-256 hex digest.
+    """
+    max_bytes = max_bytes or settings.UPLOAD_MAX_BYTES
+    # The parser records the size, so most oversized files never get read
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+    digest = hashlib.sha256()
+    chunks: list[bytes] = []
+    total = 0
+    try:
+        while True:
+            chunk = await file.read(settings.UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > max_bytes:
+                raise _too_large(max_bytes)
+            _memory.add(len(chunk))
+            digest.update(chunk)
+            chunks.append(chunk)
+        # One copy into the final buffer (none for single-chunk files)
+        data = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+    except BaseException:
+        _memory.release(sum(len(c) for c in chunks))
+        raise
+    return UploadedImage(data=data, content_hash=digest.hexdigest(), filename=file.filename)
+
+
+@asynccontextmanager
+async def read_uploads(files: list[UploadFile]) -> AsyncIterator[list[UploadedImage]]:
+    """
+    Read a request's uploads one after another; their bytes count as buffered
+    until the block exits.
+
+    Files are read sequentially so a request never holds more than the
+    accepted files plus one chunk.
+    """
+    uploads: list[UploadedImage] = []
+    try:
+        for file in files:
+            uploads.append(await read_upload(file))
+        _memory.finish_request(sum(u.size for u in uploads), len(uploads))
+        yield uploads
+    finally:
+        _memory.release(sum(u.size for u in uploads))
+
+
+def upload_stats() -> dict:
+    return {
+        "max_bytes": settings.UPLOAD_MAX_BYTES,
+        "chunk_bytes": settings.UPLOAD_CHUNK_BYTES,
+        "buffered_bytes": _memory.buffered_bytes,
+        "peak_buffered_bytes": _memory.peak_buffered_bytes,
+        "peak_request_bytes": _memory.peak_request_bytes,
+        "uploads": _memory.uploads,
+        "rejected": _memory.rejected,
+    }
+
+
+class UploadLimitMiddleware:
+    """
+    Refuse multipart requests whose body exceeds what the upload endpoints accept.
+
+    Checked against Content-Length before the body is read; bodies without one
+    (chunked transfer) are counted as they arrive and cut off at the limit.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def limit() -> int:
+        return settings.UPLOAD_MAX_FILES * settings.UPLOAD_MAX_BYTES + _FORM_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/"):
+            await self.app(scope, receive, send)
+            return
+        limit = self.limit()
+        declared = headers.get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            _memory.reject()
+            response = JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": f"Request body exceeds {limit} bytes"},
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    _memory.reject()
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Request body exceeds {limit} bytes",
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
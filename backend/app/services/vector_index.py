@@ -0,0 +1,311 @@
+"""
+In-process approximate nearest-neighbour index for lesion embeddings.
+
+Vectors are L2-normalized and stored as float16 (2 bytes per dimension, so
+100k MobileNetV2 embeddings take ~250 MB), and scored by cosine similarity.
+
+Below `train_min` vectors a query is an exact scan. Above it the index is an
+inverted file (IVF): k-means centroids partition the vectors into ~2*sqrt(n)
+lists and a query only scores the `nprobe` lists whose centroids are closest,
+i.e. ~1-2k vectors instead of all of them. New vectors are appended
+to their nearest list immediately; the centroids are retrained in the
+background once the index has grown well past the size they were fitted on.
+
+Removing a vector only marks its row dead. Once more than `compact_fraction`
+of the rows are dead, the live rows are packed together and the lists
+rebuilt, so re-labelled and deleted cases don't accumulate in memory.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def kmeans(
+    vectors: np.ndarray, k: int, iterations: int = 10, seed: int = 0
+) -> np.ndarray:
+    """Spherical k-means on normalized float32 vectors; returns (k, dim) unit centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        counts = np.bincount(assign, minlength=k)
+        empty = counts == 0
+        # Re-seed empty clusters from random points so every list is used
+        sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids
+
+
+class VectorIndex:
+    """Cosine-similarity IVF index keyed by string ids, with a label per vector."""
+
+    # Dead rows tolerated before compacting, regardless of the fraction
+    COMPACT_MIN_DEAD = 64
+
+    def __init__(
+        self, dim: int, nprobe: int = 8, train_min: int = 2048, compact_fraction: float = 0.25
+    ):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.train_min = train_min
+        self.compact_fraction = compact_fraction
+        self._vectors = np.empty((1024, dim), dtype=np.float16)
+        self._size = 0  # rows used, including removed ones
+        self._keys: list[str] = []
+        self._labels: list[str | None] = []
+        self._alive = np.zeros(1024, dtype=bool)
+        self._rows: dict[str, int] = {}
+        self.centroids: np.ndarray | None = None
+        self._assign = np.full(1024, -1, dtype=np.int32)
+        self._lists: list[list[int]] = []
+        self._list_arrays: dict[int, np.ndarray] = {}
+        self.trained_size = 0
+        self.compactions = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def label(self, key: str) -> str | None:
+        row = self._rows.get(key)
+        return self._labels[row] if row is not None else None
+
+    def keys(self) -> list[str]:
+        with self._lock:
+            return list(self._rows)
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._vectors)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        vectors = np.empty((capacity, self.dim), dtype=np.float16)
+        vectors[: self._size] = self._vectors[: self._size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[: self._size] = self._alive[: self._size]
+        assign = np.full(capacity, -1, dtype=np.int32)
+        assign[: self._size] = self._assign[: self._size]
+        self._vectors, self._alive, self._assign = vectors, alive, assign
+
+    def _add_to_list(self, row: int, cluster: int) -> None:
+        self._assign[row] = cluster
+        self._lists[cluster].append(row)
+        self._list_arrays.pop(cluster, None)
+
+    def add(self, key: str, vector: np.ndarray, label: str | None = None) -> None:
+        """Insert or replace the vector for key."""
+        unit = _normalize(vector.reshape(-1))
+        if unit.shape[0] != self.dim:
+            raise ValueError(f"Expected a {self.dim}-d vector, got {unit.shape[0]}")
+        with self._lock:
+            self.remove(key)
+            row = self._size
+            self._grow(row + 1)
+            self._vectors[row] = unit
+            self._alive[row] = True
+            self._keys.append(key)
+            self._labels.append(label)
+            self._rows[key] = row
+            self._size += 1
+            if self.centroids is not None:
+                self._add_to_list(row, int(np.argmax(self.centroids @ unit)))
+
+    def set_label(self, key: str, label: str | None) -> None:
+        with self._lock:
+            row = self._rows.get(key)
+            if row is not None:
+                self._labels[row] = label
+
+    def remove(self, key: str) -> bool:
+        with self._lock:
+            row = self._rows.pop(key, None)
+            if row is None:
+                return False
+            # Tombstone; the row is dropped from disk at the next save and
+            # from memory at the next compaction
+            self._alive[row] = False
+            dead = self._size - len(self._rows)
+            if dead >= self.COMPACT_MIN_DEAD and dead > self.compact_fraction * self._size:
+                self.compact()
+            return True
+
+    def compact(self) -> None:
+        """Drop dead rows: renumber the live ones and rebuild the inverted lists."""
+        with self._lock:
+            live = np.flatnonzero(self._alive[: self._size])
+            n = len(live)
+            capacity = max(1024, len(self._vectors))
+            while capacity // 2 >= max(1024, 2 * n):
+                capacity //= 2
+            vectors = np.empty((capacity, self.dim), dtype=np.float16)
+            vectors[:n] = self._vectors[live]
+            alive = np.zeros(capacity, dtype=bool)
+            alive[:n] = True
+            assign = np.full(capacity, -1, dtype=np.int32)
+            assign[:n] = self._assign[live]
+            self._vectors, self._alive, self._assign = vectors, alive, assign
+            self._keys = [self._keys[i] for i in live]
+            self._labels = [self._labels[i] for i in live]
+            self._rows = {key: row for row, key in enumerate(self._keys)}
+            self._size = n
+            if self.centroids is not None:
+                self._lists = [[] for _ in range(len(self.centroids))]
+                for row, cluster in enumerate(assign[:n].tolist()):
+                    self._lists[cluster].append(row)
+                self._list_arrays = {}
+            self.compactions += 1
+
+    def needs_training(self) -> bool:
+        n = len(self._rows)
+        if self.centroids is None:
+            return n >= self.train_min
+        return n >= 4 * self.trained_size
+
+    def train(self, iterations: int = 10, sample_per_list: int = 32) -> None:
+        """
+        Fit ~2*sqrt(n) centroids on a sample and rebuild the inverted lists.
+
+        The expensive part runs without the lock; searches keep using the old
+        lists meanwhile, and rows added during training are assigned at the swap.
+        """
+        with self._lock:
+            size = self._size
+            compactions = self.compactions
+            live = np.flatnonzero(self._alive[:size])
+            vectors = self._vectors[:size]
+        if len(live) == 0:
+            return
+        # Scoring float16 rows is dominated by the float32 conversion, so
+        # favour more, smaller lists over a cheaper k-means
+        k = max(1, min(len(live), int(2 * np.sqrt(len(live)))))
+        rng = np.random.default_rng(0)
+        sample = rng.choice(live, size=min(len(live), k * sample_per_list), replace=False)
+        centroids = kmeans(vectors[sample].astype(np.float32), k, iterations=iterations)
+        assign = np.full(size, -1, dtype=np.int32)
+        for start in range(0, size, 8192):
+            chunk = vectors[start : start + 8192].astype(np.float32)
+            assign[start : start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+
+        with self._lock:
+            if self.compactions != compactions:
+                # Rows were renumbered meanwhile; needs_training() still holds, so
+                # the next insert schedules a fresh run
+                return
+            lists: list[list[int]] = [[] for _ in range(k)]
+            for row in live:
+                lists[assign[row]].append(int(row))
+            self._assign[:size] = assign
+            self.centroids = centroids
+            self._lists = lists
+            self._list_arrays = {}
+            self.trained_size = len(live)
+            for row in range(size, self._size):
+                self._add_to_list(row, int(np.argmax(centroids @ self._vectors[row].astype(np.float32))))
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        if self.centroids is None:
+            return np.arange(self._size)
+        nprobe = min(self.nprobe, len(self.centroids))
+        nearest = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        arrays = []
+        for cluster in nearest:
+            arr = self._list_arrays.get(cluster)
+            if arr is None:
+                arr = self._list_arrays[cluster] = np.array(self._lists[cluster], dtype=np.int64)
+            arrays.append(arr)
+        return np.concatenate(arrays)
+
+    def search(
+        self, vector: np.ndarray, k: int = 5, exclude: str | None = None
+    ) -> list[tuple[str, str | None, float]]:
+        """Top-k (key, label, cosine similarity) pairs, most similar first."""
+        query = _normalize(vector.reshape(-1))
+        with self._lock:
+            rows = self._candidates(query)
+            rows = rows[self._alive[rows]]
+            if exclude is not None and exclude in self._rows:
+                rows = rows[rows != self._rows[exclude]]
+            if len(rows) == 0:
+                return []
+            scores = self._vectors[rows].astype(np.float32) @ query
+            top = np.argpartition(-scores, min(k, len(rows)) - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (self._keys[rows[i]], self._labels[rows[i]], round(float(scores[i]), 4))
+                for i in top
+            ]
+
+    def save(self, path: Path, **meta) -> None:
+        """Write live vectors, labels and IVF state to path (atomic replace)."""
+        with self._lock:
+            live = np.flatnonzero(self._alive[: self._size])
+            arrays = {
+                "vectors": self._vectors[live],
+                "keys": np.array([self._keys[i] for i in live], dtype=str),
+                "labels": np.array([self._labels[i] or "" for i in live], dtype=str),
+                "assign": self._assign[live],
+                "centroids": (
+                    self.centroids if self.centroids is not None else np.empty((0, self.dim), np.float32)
+                ),
+                "meta": np.array(json.dumps({
+                    **meta, "nprobe": self.nprobe, "train_min": self.train_min,
+                    "trained_size": self.trained_size,
+                })),
+            }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> tuple["VectorIndex", dict]:
+        """Load an index written by save(); returns (index, meta)."""
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            vectors = data["vectors"]
+            index = cls(vectors.shape[1], nprobe=meta["nprobe"], train_min=meta["train_min"])
+            n = len(vectors)
+            index._grow(n)
+            index._vectors[:n] = vectors
+            index._alive[:n] = True
+            index._keys = data["keys"].tolist()
+            index._labels = [label or None for label in data["labels"].tolist()]
+            index._rows = {key: i for i, key in enumerate(index._keys)}
+            index._size = n
+            if len(data["centroids"]):
+                index.centroids = data["centroids"]
+                index._assign[:n] = data["assign"]
+                index._lists = [[] for _ in range(len(index.centroids))]
+                for row, cluster in enumerate(data["assign"].tolist()):
+                    index._lists[cluster].append(row)
+                index.trained_size = meta["trained_size"]
+        return index, meta
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._rows),
+            "dim": self.dim,
+            "lists": len(self.centroids) if self.centroids is not None else 0,
+            "nprobe": self.nprobe,
+            "trained_size": self.trained_size,
+            "removed": self._size - len(self._rows),
+            "compactions": self.compactions,
+            "memory_mb": round(self._vectors[: self._size].nbytes / 1e6, 1),
+        }
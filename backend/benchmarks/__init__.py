@@ -0,0 +1 @@
+"""Inference benchmarks. Run from backend/: python -m benchmarks.<name> --help"""
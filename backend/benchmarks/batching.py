@@ -0,0 +1,86 @@
+"""
+Compare per-image inference against the micro-batching scheduler.
+
+Simulates a burst of concurrent scans (e.g. a screening camp) and reports
+throughput and p50/p99 latency for both paths.
+
+    python -m benchmarks.batching --requests 30 --max-batch-size 8 --max-wait-ms 10
+    python -m benchmarks.batching --model real
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.services.inference_scheduler import BatchScheduler
+from benchmarks.standin import load_model, percentile_ms, random_images
+
+
+async def _per_image(model, images) -> list[float]:
+    """Current path: each request runs its own (1, 224, 224, 3) forward pass inline."""
+    latencies = []
+    start = time.perf_counter()
+
+    async def one(x):
+        model.predict(x[None, ...])
+        latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(x) for x in images))
+    return latencies
+
+
+async def _batched(model, images, max_batch_size: int, max_wait_ms: float) -> list[float]:
+    scheduler = BatchScheduler(
+        lambda batch: model.predict(batch),
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms,
+    )
+    latencies = []
+    start = time.perf_counter()
+
+    async def one(x):
+        await scheduler.submit(x)
+        latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(x) for x in images))
+    await scheduler.close()
+    return latencies
+
+
+def _summary(latencies: list[float]) -> dict:
+    total = max(latencies)
+    return {
+        "images_per_sec": round(len(latencies) / total, 1),
+        "p50_ms": percentile_ms(latencies, 50),
+        "p99_ms": percentile_ms(latencies, 99),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="standin", choices=["standin", "real"])
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--fixed-ms", type=float, default=15.0, help="Stand-in per-call overhead")
+    parser.add_argument("--per-image-ms", type=float, default=3.0, help="Stand-in per-image cost")
+    args = parser.parse_args()
+
+    model = load_model(args.model, args.fixed_ms, args.per_image_ms)
+    images = random_images(args.requests)
+    # One untimed call so graph tracing / lazy init is not attributed to either path
+    model.predict(images[:1])
+
+    report = {
+        "requests": args.requests,
+        "per_image": _summary(asyncio.run(_per_image(model, images))),
+        "batched": _summary(
+            asyncio.run(_batched(model, images, args.max_batch_size, args.max_wait_ms))
+        ),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
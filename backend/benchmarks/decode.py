@@ -0,0 +1,112 @@
+"""
+Fast reduced-resolution JPEG decode vs full decode: time, memory, parity.
+
+For each image, decodes + preprocesses with and without draft mode and
+reports decode time, decoded buffer size (the per-request peak) and
+prediction parity (top-1 / urgency agreement, max |Δp|). Exits non-zero if
+agreement falls below --min-agreement, so it doubles as the parity check
+for the fast path.
+
+    python -m benchmarks.decode --images ../data/processed/fitzpatrick17k/test --model real
+    python -m benchmarks.decode --synthetic 10 --width 4032 --height 3024
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from app.services import ml_service
+from benchmarks.standin import load_model, percentile_ms
+
+IMAGE_EXTS = {".jpg", ".jpeg"}
+
+
+def synthetic_jpegs(n: int, width: int, height: int, seed: int = 0) -> list[bytes]:
+    """Smooth colour fields with noise, JPEG-encoded like a phone photo."""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    out = []
+    for _ in range(n):
+        base = rng.uniform(60, 200, size=3)
+        freq = rng.uniform(1, 6, size=3) / max(width, height)
+        img = np.stack(
+            [base[c] + 50 * np.sin(2 * np.pi * freq[c] * (xx + yy * (c + 1))) for c in range(3)],
+            axis=-1,
+        )
+        img += rng.normal(0, 8, size=img.shape).astype(np.float32)
+        buf = io.BytesIO()
+        Image.fromarray(np.clip(img, 0, 255).astype(np.uint8)).save(buf, "JPEG", quality=90)
+        out.append(buf.getvalue())
+    return out
+
+
+def _decode(data: bytes, fast: bool) -> tuple[np.ndarray, float, int]:
+    start = time.perf_counter()
+    img = ml_service._load_image(data, fast_decode=fast)
+    decoded_bytes = img.size[0] * img.size[1] * 3
+    x = ml_service._preprocess(img)
+    return x, time.perf_counter() - start, decoded_bytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="standin", choices=["standin", "real"])
+    parser.add_argument("--images", default=None, help="Directory of JPEGs (searched recursively)")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--synthetic", type=int, default=10, help="Synthetic JPEGs if --images is not given")
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--min-agreement", type=float, default=0.98)
+    args = parser.parse_args()
+
+    if args.images:
+        paths = sorted(p for p in Path(args.images).rglob("*") if p.suffix.lower() in IMAGE_EXTS)
+        blobs = [p.read_bytes() for p in paths[: args.count]]
+    else:
+        blobs = synthetic_jpegs(args.synthetic, args.width, args.height)
+
+    model = load_model(args.model)
+    results = {}
+    inputs = {}
+    for fast in (False, True):
+        times, sizes, xs = [], [], []
+        for data in blobs:
+            x, elapsed, decoded = _decode(data, fast)
+            times.append(elapsed)
+            sizes.append(decoded)
+            xs.append(x)
+        inputs[fast] = np.concatenate(xs)
+        results["fast" if fast else "full"] = {
+            "decode_p50_ms": percentile_ms(times, 50),
+            "decode_p99_ms": percentile_ms(times, 99),
+            "decoded_rgb_mb_mean": round(float(np.mean(sizes)) / 1e6, 2),
+        }
+
+    full = model.predict(ml_service._normalize(inputs[False])).copy()
+    fast = model.predict(ml_service._normalize(inputs[True]))
+    served = np.array([ml_service._served_index(p) for p in full])
+    served_fast = np.array([ml_service._served_index(p) for p in fast])
+    urgency = [ml_service.PredictionResult.from_probabilities(p, "").urgency for p in full]
+    urgency_fast = [ml_service.PredictionResult.from_probabilities(p, "").urgency for p in fast]
+    agreement = float((served == served_fast).mean())
+    results["parity"] = {
+        "images": len(blobs),
+        "top1_agreement": round(agreement, 4),
+        "urgency_agreement": round(float(np.mean([a == b for a, b in zip(urgency, urgency_fast)])), 4),
+        "max_abs_prob_diff": round(float(np.abs(full - fast).max()), 5),
+        "mean_pixel_abs_diff": round(float(np.abs(inputs[False].astype(np.int16) - inputs[True]).mean()), 3),
+    }
+    print(json.dumps(results, indent=2))
+    if agreement < args.min_agreement:
+        print(f"Top-1 agreement {agreement:.4f} below {args.min_agreement}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Thumbnail/preview derivatives: render cost and bytes per list page.
+
+Encodes synthetic skin photos at phone-camera resolutions as JPEG. Each one
+is rendered into the derivatives that derivative_service stores, with JPEG
+draft decoding on (as served) and off (full decode, then downscale). The
+report gives the median render time and the size of a --page-size list page
+as full originals, previews and thumbnails.
+
+    python -m benchmarks.derivatives --sides 2000,3000,4000 --page-size 20
+"""
+
+import argparse
+import io
+import json
+import statistics
+import time
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+from app.services import derivative_service
+from benchmarks.quality import _skin_photo
+
+
+def _ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def _full_decode(data: bytes) -> dict[str, bytes]:
+    """render() without draft mode, for comparison."""
+    img = ImageOps.exif_transpose(Image.open(io.BytesIO(data))).convert("RGB")
+    out = {}
+    for name, size in sorted(derivative_service.SIZES.items(), key=lambda item: -item[1]):
+        img.thumbnail((size, size), Image.LANCZOS)
+        buf = io.BytesIO()
+        img.save(
+            buf, format="JPEG", quality=settings.IMAGE_DERIVATIVE_QUALITY, optimize=True, progressive=True
+        )
+        out[name] = buf.getvalue()
+    return out
+
+
+def _median_ms(fn, data: bytes, repeats: int) -> float:
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(data)
+        runs.append(time.perf_counter() - start)
+    return round(statistics.median(runs) * 1000.0, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sides", type=_ints, default=[2000, 3000, 4000])
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    def served(data: bytes) -> dict[str, bytes]:
+        return derivative_service.render(
+            data, derivative_service.SIZES, settings.IMAGE_DERIVATIVE_QUALITY
+        )
+
+    report = {"sizes_px": derivative_service.SIZES, "page_size": args.page_size, "photos": []}
+    for side in args.sides:
+        buf = io.BytesIO()
+        _skin_photo(side).resize((side, side * 3 // 4)).save(buf, format="JPEG", quality=92)
+        data = buf.getvalue()
+        rendered = served(data)
+        page_kb = {"original": round(len(data) * args.page_size / 1024, 1)}
+        for name, jpeg in rendered.items():
+            page_kb[name] = round(len(jpeg) * args.page_size / 1024, 1)
+        report["photos"].append({
+            "resolution": f"{side}x{side * 3 // 4}",
+            "render_ms": _median_ms(served, data, args.repeats),
+            "render_ms_full_decode": _median_ms(_full_decode, data, args.repeats),
+            "page_kb": page_kb,
+            "page_reduction": {
+                name: round(page_kb["original"] / page_kb[name], 1) for name in rendered
+            },
+        })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Measure event-loop responsiveness while inference runs.
+
+A heartbeat coroutine stands in for other API traffic (logins, websocket
+pings) and records how late each tick fires, first with inference called
+inline on the loop and then through the InferenceExecutor pool.
+
+    python -m benchmarks.event_loop --requests 30 --workers 2
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.services.inference_executor import InferenceExecutor
+from benchmarks.standin import load_model, percentile_ms, random_images
+
+TICK_S = 0.005
+
+
+async def _heartbeat(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK_S
+        await asyncio.sleep(TICK_S)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def _measure(model, images, executor: InferenceExecutor | None) -> dict:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(_heartbeat(lags, stop))
+    await asyncio.sleep(TICK_S * 2)
+
+    async def one(x):
+        if executor is None:
+            model.predict(x[None, ...])
+        else:
+            await executor.run(model.predict, x[None, ...])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(x) for x in images))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "loop_lag_p50_ms": percentile_ms(lags, 50),
+        "loop_lag_p99_ms": percentile_ms(lags, 99),
+        "loop_lag_max_ms": round(max(lags) * 1000.0, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="standin", choices=["standin", "real"])
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    images = random_images(args.requests)
+    model.predict(images[:1])
+
+    executor = InferenceExecutor(max_workers=args.workers, max_queue=args.requests)
+    report = {
+        "inline": asyncio.run(_measure(model, images, None)),
+        "executor": asyncio.run(_measure(model, images, executor)),
+    }
+    executor.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Compare per-call urlopen against the pooled async client for remote images.
+
+Serves JPEGs from a local stand-in HTTP server (keep-alive, configurable
+latency) and fetches them the old way — a fresh urlopen connection per image
+on one of the INFERENCE_WORKERS threads — and through RemoteImageClient.
+Reports throughput, p50/p95/p99 latency and TCP connections opened, and
+checks that an oversized image is rejected without being read in full.
+
+    python -m benchmarks.http_fetch --images 200 --latency-ms 20 --per-host 8
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import urlopen
+
+import numpy as np
+from fastapi import HTTPException
+from PIL import Image
+
+from app.services.http_client import RemoteImageClient
+from benchmarks.standin import percentile_ms
+
+
+class _StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, image: bytes, oversized: bytes, latency_ms: float):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.image = image
+        self.oversized = oversized
+        self.latency_ms = latency_ms
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        time.sleep(self.server.latency_ms / 1000.0)
+        body = self.server.oversized if self.path.startswith("/large") else self.server.image
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        if not self.path.startswith("/large"):
+            # The oversized response omits Content-Length so the streaming cap is exercised
+            self.send_header("Content-Length", str(len(body)))
+        else:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def _jpeg(size: int, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 255, size=(size, size, 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, "JPEG", quality=85)
+    return buf.getvalue()
+
+
+def _summary(latencies: list[float], connections: int) -> dict:
+    return {
+        "images_per_sec": round(len(latencies) / max(latencies), 1),
+        "p50_ms": percentile_ms(latencies, 50),
+        "p95_ms": percentile_ms(latencies, 95),
+        "p99_ms": percentile_ms(latencies, 99),
+        "connections": connections,
+    }
+
+
+async def _urlopen(urls: list[str], workers: int) -> list[float]:
+    """Old path: blocking urlopen per image, on the (small) inference thread pool."""
+    loop = asyncio.get_running_loop()
+    latencies = []
+    start = time.perf_counter()
+
+    def fetch(url):
+        with urlopen(url, timeout=30) as resp:
+            return resp.read()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+
+        async def one(url):
+            await loop.run_in_executor(pool, fetch, url)
+            latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(one(url) for url in urls))
+    return latencies
+
+
+async def _pooled(client: RemoteImageClient, urls: list[str]) -> list[float]:
+    latencies = []
+    start = time.perf_counter()
+
+    async def one(url):
+        await client.fetch(url)
+        latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(url) for url in urls))
+    return latencies
+
+
+async def _size_cap(client: RemoteImageClient, url: str) -> dict:
+    start = time.perf_counter()
+    try:
+        await client.fetch(url)
+        status_code = 200
+    except HTTPException as e:
+        status_code = e.status_code
+    return {"status": status_code, "ms": round((time.perf_counter() - start) * 1000.0, 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--image-size", type=int, default=512, help="Served JPEG side in pixels")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stand-in server latency")
+    parser.add_argument("--workers", type=int, default=2, help="Threads for the urlopen path")
+    parser.add_argument("--per-host", type=int, default=8, help="Pooled client per-host limit")
+    parser.add_argument("--max-mb", type=float, default=2.0, help="Pooled client size cap")
+    args = parser.parse_args()
+
+    max_bytes = int(args.max_mb * 1024 * 1024)
+    server = _StandInServer(_jpeg(args.image_size), b"\0" * (max_bytes * 4), args.latency_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/img/{i}.jpg" for i in range(args.images)]
+
+    async def run() -> dict:
+        report = {"images": args.images, "image_bytes": len(server.image)}
+        server.connections = 0
+        report["urlopen"] = _summary(await _urlopen(urls, args.workers), server.connections)
+
+        client = RemoteImageClient(max_per_host=args.per_host, max_bytes=max_bytes)
+        await client.fetch(urls[0])  # untimed: establish the pool's first connection
+        server.connections = 0
+        report["pooled"] = _summary(await _pooled(client, urls), server.connections)
+        report["oversized"] = await _size_cap(client, f"{base}/large.jpg")
+        await client.aclose()
+        return report
+
+    report = asyncio.run(run())
+    server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Model memory: one copy per API process vs the shared inference worker pool.
+
+Baseline: --processes independent processes each load their own stand-in
+model of --weights-mb (what `uvicorn --workers N` does when every worker
+loads the model). Pool: app.services.inference_server preloads one stand-in
+and forks --processes workers. The benchmark then drives the pool from
+--clients threads (standing in for API processes) and reports throughput,
+latency, and RSS / PSS per process for both setups. PSS splits shared pages
+between the processes that map them, so its sum is the real memory used.
+
+    python -m benchmarks.processes --processes 4 --weights-mb 300 --clients 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from app.services.inference_server import InferenceWorkerClient, process_memory, serve
+from app.services.model_registry import LoadedModel
+from benchmarks.standin import StandInModel, percentile_ms
+
+
+def _hold_model(weights_mb: float, ready, stop) -> None:
+    model = StandInModel(weights_mb=weights_mb)
+    model.predict_with_embeddings(np.zeros((1, 224, 224, 3), dtype=np.float32))
+    ready.set()
+    stop.wait()
+
+
+def _serve(socket_path: str, processes: int, args) -> None:
+    model = StandInModel(args.fixed_ms, args.per_image_ms, weights_mb=args.weights_mb)
+    loaded = LoadedModel(
+        version="standin", path=Path("standin"), backend=model, loaded_at=datetime.now(timezone.utc)
+    )
+    serve(socket_path, processes, model=loaded)
+
+
+def _summarize(processes: list[dict]) -> dict:
+    return {
+        "processes": processes,
+        "total_rss_mb": round(sum(p["rss_mb"] or 0 for p in processes), 1),
+        "total_pss_mb": round(sum(p["pss_mb"] or 0 for p in processes), 1),
+    }
+
+
+def _baseline(args) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    stop = ctx.Event()
+    procs, readies = [], []
+    for _ in range(args.processes):
+        ready = ctx.Event()
+        proc = ctx.Process(target=_hold_model, args=(args.weights_mb, ready, stop))
+        proc.start()
+        procs.append(proc)
+        readies.append(ready)
+    for ready in readies:
+        ready.wait()
+    report = _summarize([process_memory(p.pid, "api-with-model") for p in procs])
+    stop.set()
+    for proc in procs:
+        proc.join()
+    return report
+
+
+def _pool(args) -> dict:
+    socket_path = os.path.join(tempfile.mkdtemp(), "inference.sock")
+    server = multiprocessing.get_context("fork").Process(
+        target=_serve, args=(socket_path, args.processes, args)
+    )
+    server.start()
+    client = InferenceWorkerClient(socket_path)
+    while True:
+        try:
+            client.ping()
+            break
+        except Exception:
+            time.sleep(0.2)
+
+    batch = np.random.default_rng(0).integers(0, 255, (args.batch_size, 224, 224, 3), dtype=np.uint8)
+    latencies = []
+
+    def one(_):
+        start = time.perf_counter()
+        client.predict(batch)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        list(pool.map(one, range(args.requests)))
+    wall = time.perf_counter() - start
+    report = _summarize(client.stats())
+    report["throughput"] = {
+        "requests": args.requests,
+        "batch_size": args.batch_size,
+        "clients": args.clients,
+        "images_per_sec": round(args.requests * args.batch_size / wall, 1),
+        "p50_ms": percentile_ms(latencies, 50),
+        "p99_ms": percentile_ms(latencies, 99),
+    }
+    server.terminate()
+    server.join()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--weights-mb", type=float, default=300.0, help="Stand-in model size")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent API-side callers")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--fixed-ms", type=float, default=15.0, help="Stand-in per-call overhead")
+    parser.add_argument("--per-image-ms", type=float, default=3.0, help="Stand-in per-image cost")
+    args = parser.parse_args()
+
+    report = {"per_process_copies": _baseline(args), "shared_pool": _pool(args)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Image-quality gate: per-check cost and verdicts on synthetic photos.
+
+Builds a sharp skin-toned photo with lesion-like spots, plus blurred,
+overexposed, underexposed and mostly-background variants. Each variant is
+preprocessed the way the API does (decode + resize to 224x224), and the gate
+runs on the result. The report gives the median cost of every check in
+microseconds, the metrics and the issues found. For comparison it also gives
+the cost of the same checks at --full-res, i.e. without downscaling first.
+
+    python -m benchmarks.quality --repeats 200 --full-res 3000
+"""
+
+import argparse
+import json
+import statistics
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from app.core.config import settings
+from app.services import quality_gate
+
+SIZE = (224, 224)
+
+
+def _skin_photo(size: int, seed: int = 0) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    base = np.array([198, 150, 120], dtype=np.float32)  # medium skin tone
+    img = np.tile(base, (size, size, 1)) + rng.normal(0, 8, (size, size, 3))
+    yy, xx = np.mgrid[:size, :size]
+    for _ in range(12):
+        cy, cx, r = rng.integers(0, size, 2).tolist() + [int(rng.integers(size // 40, size // 12))]
+        spot = (yy - cy) ** 2 + (xx - cx) ** 2 < r * r
+        img[spot] = np.array([120, 70, 55]) + rng.normal(0, 6, (int(spot.sum()), 3))
+    return Image.fromarray(np.clip(img, 0, 255).astype(np.uint8))
+
+
+def _variants(size: int) -> dict[str, Image.Image]:
+    photo = _skin_photo(size)
+    arr = np.asarray(photo, dtype=np.float32)
+    background = arr.copy()
+    background[:, size // 8 :] = np.array([40, 90, 160])  # wall / sky
+    return {
+        "good": photo,
+        "blurred": photo.filter(ImageFilter.GaussianBlur(radius=size / 60)),
+        "overexposed": Image.fromarray(np.clip(arr * 2.2, 0, 255).astype(np.uint8)),
+        "underexposed": Image.fromarray(np.clip(arr * 0.04, 0, 255).astype(np.uint8)),
+        "background": Image.fromarray(background.astype(np.uint8)),
+    }
+
+
+def _assess(x: np.ndarray) -> quality_gate.QualityReport:
+    return quality_gate.assess(
+        x,
+        min_sharpness=settings.QUALITY_MIN_SHARPNESS,
+        max_clipped_fraction=settings.QUALITY_MAX_CLIPPED_FRACTION,
+        min_skin_fraction=settings.QUALITY_MIN_SKIN_FRACTION,
+        skin_cr=tuple(settings.QUALITY_SKIN_CR),
+        skin_cb=tuple(settings.QUALITY_SKIN_CB),
+    )
+
+
+def _median_cost(x: np.ndarray, repeats: int) -> dict:
+    runs = [_assess(x).cost_us for _ in range(repeats)]
+    return {check: round(statistics.median(run[check] for run in runs), 1) for check in runs[0]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--full-res", type=int, default=3000, help="Side of the full-resolution photo")
+    args = parser.parse_args()
+
+    report = {"thresholds": {
+        "QUALITY_MIN_SHARPNESS": settings.QUALITY_MIN_SHARPNESS,
+        "QUALITY_MAX_CLIPPED_FRACTION": settings.QUALITY_MAX_CLIPPED_FRACTION,
+        "QUALITY_MIN_SKIN_FRACTION": settings.QUALITY_MIN_SKIN_FRACTION,
+        "QUALITY_SKIN_CR": settings.QUALITY_SKIN_CR,
+        "QUALITY_SKIN_CB": settings.QUALITY_SKIN_CB,
+    }}
+    variants = _variants(1024)
+    for name, img in variants.items():
+        x = np.asarray(img.resize(SIZE), dtype=np.uint8)
+        result = _assess(x)
+        report[name] = {
+            "issues": list(result.issues),
+            "metrics": result.metrics,
+            "cost_us_224": _median_cost(x, args.repeats),
+        }
+    full = np.asarray(_skin_photo(args.full_res), dtype=np.uint8)
+    report["good"][f"cost_us_{args.full_res}"] = _median_cost(full, max(3, args.repeats // 50))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Similar-case index: IVF search vs an exact scan over float16 embeddings.
+
+Generates clustered 1280-d vectors (MobileNetV2 pooled-feature size), adds
+them incrementally, trains the IVF lists, and reports query latency
+p50/p95/p99, recall@k against the exact top-k, memory, and save/load time.
+
+    python -m benchmarks.similar_cases --vectors 100000 --queries 200 --nprobe 8
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.services.vector_index import VectorIndex
+from benchmarks.standin import percentile_ms
+
+
+def _clustered(n: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    # ReLU-like non-negative features, as after global average pooling
+    vectors = centres[rng.integers(0, clusters, size=n)] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+    return np.maximum(vectors, 0).astype(np.float16)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=1280)
+    parser.add_argument("--clusters", type=int, default=200, help="Synthetic lesion 'types'")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    args = parser.parse_args()
+
+    vectors = _clustered(args.vectors + args.queries, args.dim, args.clusters)
+    data, queries = vectors[: args.vectors], vectors[args.vectors :]
+
+    index = VectorIndex(args.dim, nprobe=args.nprobe)
+    start = time.perf_counter()
+    for i, vector in enumerate(data):
+        index.add(str(i), vector, "label")
+    add_s = time.perf_counter() - start
+    start = time.perf_counter()
+    index.train()
+    train_s = time.perf_counter() - start
+
+    unit = data.astype(np.float32)
+    unit /= np.linalg.norm(unit, axis=1, keepdims=True)
+    stored = unit.astype(np.float16)  # what the index keeps in memory
+    ivf_latencies, exact_latencies, recalls = [], [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = index.search(query, k=args.k)
+        ivf_latencies.append(time.perf_counter() - start)
+
+        q = query.astype(np.float32)
+        q /= np.linalg.norm(q)
+        start = time.perf_counter()
+        # Exact scan over the same float16 storage, in cache-sized chunks
+        scores = np.concatenate([
+            stored[i : i + 4096].astype(np.float32) @ q for i in range(0, len(stored), 4096)
+        ])
+        np.argpartition(-scores, args.k)[: args.k]
+        exact_latencies.append(time.perf_counter() - start)
+        exact = np.argpartition(-(unit @ q), args.k)[: args.k]  # float32 ground truth
+        recalls.append(len({int(key) for key, _, _ in hits} & set(exact.tolist())) / args.k)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "index.npz"
+        start = time.perf_counter()
+        index.save(path)
+        save_s = time.perf_counter() - start
+        start = time.perf_counter()
+        VectorIndex.load(path)
+        load_s = time.perf_counter() - start
+        file_mb = path.stat().st_size / 1e6
+
+    report = {
+        "index": index.stats(),
+        "add_us_per_vector": round(add_s / args.vectors * 1e6, 1),
+        "train_s": round(train_s, 2),
+        "ivf": {
+            "p50_ms": percentile_ms(ivf_latencies, 50),
+            "p95_ms": percentile_ms(ivf_latencies, 95),
+            "p99_ms": percentile_ms(ivf_latencies, 99),
+            f"recall_at_{args.k}": round(float(np.mean(recalls)), 3),
+        },
+        "exact_scan": {
+            "p50_ms": percentile_ms(exact_latencies, 50),
+            "p99_ms": percentile_ms(exact_latencies, 99),
+        },
+        "disk": {"file_mb": round(file_mb, 1), "save_s": round(save_s, 2), "load_s": round(load_s, 2)},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Same-shape stand-in for the triage model.
+
+Takes (N, 224, 224, 3) float32 input and returns (N, 8) softmax probabilities.
+Cost is modelled as a fixed per-call overhead plus a per-image cost, and the
+wait releases the GIL like a real TensorFlow forward pass does.
+"""
+
+import time
+
+import numpy as np
+
+NUM_CLASSES = 8
+EMBEDDING_DIM = 1280
+INPUT_SHAPE = (224, 224, 3)
+
+
+class StandInModel:
+    """Drop-in for an inference backend's predict() with a configurable cost model."""
+
+    def __init__(
+        self,
+        fixed_ms: float = 15.0,
+        per_image_ms: float = 3.0,
+        seed: int = 0,
+        weights_mb: float = 0.0,
+    ):
+        self.fixed_ms = fixed_ms
+        self.per_image_ms = per_image_ms
+        rng = np.random.default_rng(seed)
+        self._proj = rng.normal(size=(INPUT_SHAPE[2], NUM_CLASSES)).astype(np.float32)
+        # Optional resident "weights" so memory benchmarks see a realistic footprint
+        self.weights = rng.random(int(weights_mb * 1024 * 1024 / 4), dtype=np.float32)
+        self.calls = 0
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        self.calls += 1
+        time.sleep((self.fixed_ms + self.per_image_ms * len(x)) / 1000.0)
+        # Deterministic logits from per-channel means so outputs depend on input
+        logits = x.mean(axis=(1, 2)) @ self._proj * 8.0
+        logits -= logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict_with_embeddings(self, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # Read (never write) the weights, like a forward pass does
+        if self.weights.size:
+            float(self.weights[::1024].sum())
+        embeddings = np.tile(x.mean(axis=(1, 2)), (1, EMBEDDING_DIM // INPUT_SHAPE[2] + 1))
+        return self.predict(x), embeddings[:, :EMBEDDING_DIM]
+
+
+def random_images(n: int, seed: int = 0) -> np.ndarray:
+    """Random preprocessed inputs of shape (n, 224, 224, 3) in [0, 1]."""
+    rng = np.random.default_rng(seed)
+    # Per-image colour cast so the stand-in's predictions (and confidences) vary
+    gain = rng.uniform(0.2, 1.0, size=(n, 1, 1, INPUT_SHAPE[2])).astype(np.float32)
+    return rng.random((n, *INPUT_SHAPE), dtype=np.float32) * gain
+
+
+def load_model(name: str, fixed_ms: float = 15.0, per_image_ms: float = 3.0):
+    """Return the stand-in, or the configured ml_service backend when name == "real"."""
+    if name == "real":
+        from app.services import ml_service
+
+        return ml_service._get_model()
+    return StandInModel(fixed_ms=fixed_ms, per_image_ms=per_image_ms)
+
+
+def percentile_ms(latencies: list[float], q: float) -> float:
+    return round(float(np.percentile(latencies, q)) * 1000.0, 2)
@@ -0,0 +1,183 @@
+"""
+Scan latency with the storage upload before vs alongside inference.
+
+Storage is the local backend in a temp directory, with --upload-ms of
+simulated network time added to each (blocking) upload, as a remote store
+would have. The model is the stand-in model (--fixed-ms, --per-image-ms).
+Predictions use a fresh hash each time, so the prediction cache never
+answers. Scans run --concurrency at a time, two ways:
+
+- sequential: predict, then upload (the old path);
+- concurrent: image_service._store_while_predicting, i.e. the upload runs on
+  the storage pool while the model predicts from the same bytes.
+
+The report gives p50/p95 per-scan latency for both, next to the sum and the
+max of the two stages measured alone. It also counts event-loop stalls
+(heartbeat ticks that fired more than 20 ms late). Every phase stores the
+same photos, so "storage" shows the local backend's dedupe: one file per
+photo however often it was uploaded.
+
+    python -m benchmarks.storage --scans 40 --upload-ms 120
+    python -m benchmarks.storage --scans 40 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from app.services import image_service, ml_service, storage_service
+from app.services.model_registry import LoadedModel
+from app.services.prediction_cache import image_hash
+from app.services.storage_backends import LocalStorage
+from app.services.upload_service import UploadedImage
+from benchmarks.quality import _skin_photo
+from benchmarks.standin import StandInModel, percentile_ms
+
+TICK_S = 0.005
+STALL_S = 0.020
+
+
+class SlowLocalStorage(LocalStorage):
+    """Local storage with a fixed network-like delay per call."""
+
+    def __init__(self, root: Path, latency_ms: float):
+        super().__init__(root, "http://localhost:8000/media")
+        self.latency_s = latency_ms / 1000.0
+
+    def upload(self, *args, **kwargs) -> dict:
+        time.sleep(self.latency_s)
+        return super().upload(*args, **kwargs)
+
+    def delete(self, storage_key: str) -> bool:
+        time.sleep(self.latency_s / 4)
+        return super().delete(storage_key)
+
+
+def _photos(n: int, size: int) -> list[UploadedImage]:
+    """n distinct JPEGs of one photo (a dark block moves), so none dedupe with another."""
+    base = np.asarray(_skin_photo(size))
+    per_row = size // 16
+    out = []
+    for i in range(n):
+        photo = base.copy()
+        y, x = i // per_row * 16, i % per_row * 16
+        photo[y : y + 16, x : x + 16] = 0
+        buf = io.BytesIO()
+        Image.fromarray(photo).save(buf, "JPEG", quality=90)
+        data = buf.getvalue()
+        out.append(UploadedImage(data=data, content_hash=image_hash(data)))
+    return out
+
+
+async def _sequential(upload: UploadedImage) -> None:
+    await ml_service.predict_async(upload.data, uuid.uuid4().hex)
+    await storage_service.upload_image(upload.data, content_hash=upload.content_hash)
+
+
+async def _concurrent(upload: UploadedImage) -> None:
+    await image_service._store_while_predicting(
+        [upload], ml_service.predict_async(upload.data, uuid.uuid4().hex)
+    )
+
+
+async def _upload_only(upload: UploadedImage) -> None:
+    await storage_service.upload_image(upload.data, content_hash=upload.content_hash)
+
+
+async def _predict_only(upload: UploadedImage) -> None:
+    await ml_service.predict_async(upload.data, uuid.uuid4().hex)
+
+
+async def _heartbeat(stalls: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK_S
+        await asyncio.sleep(TICK_S)
+        late = time.perf_counter() - expected
+        if late > STALL_S:
+            stalls.append(late)
+
+
+async def _measure(scan, photos: list[UploadedImage], concurrency: int) -> dict:
+    latencies: list[float] = []
+    stalls: list[float] = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(_heartbeat(stalls, stop))
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(upload: UploadedImage) -> None:
+        async with gate:
+            start = time.perf_counter()
+            await scan(upload)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(upload) for upload in photos))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return {
+        "p50_ms": percentile_ms(latencies, 50),
+        "p95_ms": percentile_ms(latencies, 95),
+        "scans_per_sec": round(len(photos) / elapsed, 1),
+        "loop_stalls": len(stalls),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scans", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--upload-ms", type=float, default=120.0)
+    parser.add_argument("--fixed-ms", type=float, default=60.0)
+    parser.add_argument("--per-image-ms", type=float, default=10.0)
+    parser.add_argument("--size", type=int, default=1600, help="Side of the photo in pixels")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="storage-bench-"))
+    storage_service._backend = SlowLocalStorage(root, args.upload_ms)
+    ml_service._registry.install(LoadedModel(
+        version="standin",
+        path=Path("standin"),
+        backend=StandInModel(args.fixed_ms, args.per_image_ms),
+        loaded_at=datetime.now(timezone.utc),
+    ))
+    photos = _photos(args.scans, args.size)
+    try:
+        await _measure(_predict_only, photos[:2], 1)  # warm the pool threads
+        report = {
+            "scans": args.scans,
+            "concurrency": args.concurrency,
+            "photo_kb": round(photos[0].size / 1024, 1),
+            "upload_only": await _measure(_upload_only, photos, args.concurrency),
+            "predict_only": await _measure(_predict_only, photos, args.concurrency),
+            "sequential": await _measure(_sequential, photos, args.concurrency),
+            "concurrent": await _measure(_concurrent, photos, args.concurrency),
+        }
+        for q in ("p50_ms", "p95_ms"):
+            stages = (report["upload_only"][q], report["predict_only"][q])
+            report[f"{q}_sum_of_stages"] = round(sum(stages), 2)
+            report[f"{q}_max_of_stages"] = max(stages)
+        report["speedup_p50"] = round(report["sequential"]["p50_ms"] / report["concurrent"]["p50_ms"], 2)
+        report["storage"] = {
+            **storage_service.stats(),
+            "files": sum(1 for p in storage_service.get_backend().images_dir.rglob("*") if p.is_file()),
+        }
+        print(json.dumps(report, indent=2))
+    finally:
+        await ml_service.shutdown()
+        await storage_service.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
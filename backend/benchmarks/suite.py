@@ -0,0 +1,238 @@
+"""
+Inference benchmark suite: per-stage latency/throughput curves and regression check.
+
+`run` times the three stages of a scan separately — JPEG decode, preprocess
+(resize to 224x224 + normalize) and the forward pass — and sweeps the forward
+pass over backends, runtime threads, concurrent callers (INFERENCE_WORKERS)
+and batch sizes. Every measurement reports p50/p95/p99 latency and images/sec;
+the report is written as JSON together with the machine it ran on.
+
+`compare` diffs two reports and exits non-zero if any shared measurement got
+worse than --threshold (relative), so it can gate a change in CI.
+
+    python -m benchmarks.suite run --output base.json
+    python -m benchmarks.suite run --model real --backends keras,tflite,onnx --threads 1,2,4 --output new.json
+    python -m benchmarks.suite compare base.json new.json --threshold 0.10
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.services import inference_backends, ml_service
+from benchmarks.decode import synthetic_jpegs
+from benchmarks.standin import StandInModel, percentile_ms
+
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms")  # every other metric is higher-is-better
+
+
+def _ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def _stats(latencies: list[float], images_per_call: int, wall: float | None = None) -> dict:
+    """Latency percentiles per call and throughput (from wall time when calls overlap)."""
+    elapsed = wall if wall is not None else sum(latencies)
+    return {
+        "p50_ms": percentile_ms(latencies, 50),
+        "p95_ms": percentile_ms(latencies, 95),
+        "p99_ms": percentile_ms(latencies, 99),
+        "images_per_sec": round(len(latencies) * images_per_call / elapsed, 1),
+    }
+
+
+def _time_stages(blobs: list[bytes], repeats: int) -> tuple[dict, np.ndarray]:
+    decode, preprocess = [], []
+    inputs = []
+    for _ in range(repeats):
+        for data in blobs:
+            start = time.perf_counter()
+            img = ml_service._load_image(data)
+            decoded = time.perf_counter()
+            x = ml_service._preprocess(img)
+            ml_service._normalize(x)
+            done = time.perf_counter()
+            decode.append(decoded - start)
+            preprocess.append(done - decoded)
+            inputs.append(x)
+    stages = {"decode": _stats(decode, 1), "preprocess": _stats(preprocess, 1)}
+    return stages, np.concatenate(inputs[: len(blobs)])
+
+
+def _load(backend: str, threads: int, args):
+    """Forward-pass function for a backend, or None if its model file is missing."""
+    if args.model == "standin":
+        model = StandInModel(fixed_ms=args.fixed_ms, per_image_ms=args.per_image_ms)
+        return model.predict
+    try:
+        path = inference_backends.model_path(
+            backend, ml_service._MODEL_DIR, args.tflite_quantization
+        )
+    except FileNotFoundError as e:
+        print(f"Skipping {backend}: {e}", file=sys.stderr)
+        return None
+    model = inference_backends.load_backend(
+        backend, path, num_threads=threads or None, batch_sizes=args.batch_sizes
+    )
+    # Same call the service makes: probabilities and embeddings in one pass
+    return model.predict_with_embeddings
+
+
+def _time_forward(predict, pool: np.ndarray, batch_size: int, workers: int, calls: int) -> dict:
+    """`calls` forward passes of `batch_size` images from `workers` concurrent threads."""
+    batch = ml_service._normalize(np.resize(pool, (batch_size, *pool.shape[1:]))).copy()
+    predict(batch)  # untimed: graph tracing / tensor allocation for this shape
+    latencies = []
+    lock = threading.Lock()
+
+    def one(_):
+        start = time.perf_counter()
+        predict(batch)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool_:
+        list(pool_.map(one, range(calls)))
+    return _stats(latencies, batch_size, wall=time.perf_counter() - start)
+
+
+def run(args) -> dict:
+    blobs = synthetic_jpegs(args.images, args.width, args.height)
+    stages, inputs = _time_stages(blobs, args.repeats)
+    backends = ["standin"] if args.model == "standin" else args.backends.split(",")
+    forward = []
+    for backend in backends:
+        # Runtime thread count only applies to TFLite / ONNX Runtime
+        thread_counts = args.threads if backend in ("tflite", "onnx") else [0]
+        for threads in thread_counts:
+            predict = _load(backend, threads, args)
+            if predict is None:
+                continue
+            for workers in args.workers:
+                for batch_size in args.batch_sizes:
+                    result = _time_forward(predict, inputs, batch_size, workers, args.calls)
+                    forward.append({
+                        "backend": backend,
+                        "threads": threads,
+                        "workers": workers,
+                        "batch_size": batch_size,
+                        **result,
+                    })
+                    print(json.dumps(forward[-1]), file=sys.stderr)
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "model": args.model,
+            "tflite_quantization": args.tflite_quantization,
+            "image_size": [args.width, args.height],
+            "images": args.images,
+            "repeats": args.repeats,
+            "calls": args.calls,
+            "fast_decode": ml_service.settings.INFERENCE_FAST_DECODE,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "stages": stages,
+        "forward": forward,
+    }
+
+
+def _flatten(report: dict) -> dict[str, dict]:
+    rows = {f"stage/{name}": stats for name, stats in report["stages"].items()}
+    for row in report["forward"]:
+        key = "forward/{backend}/threads={threads}/workers={workers}/batch={batch_size}".format(**row)
+        rows[key] = row
+    return rows
+
+
+def compare(baseline: dict, candidate: dict, threshold: float, metrics: list[str]) -> list[dict]:
+    """Relative change per shared measurement and metric; `regression` if worse than threshold."""
+    base, cand = _flatten(baseline), _flatten(candidate)
+    changes = []
+    for key in sorted(base.keys() & cand.keys()):
+        for metric in metrics:
+            old, new = base[key].get(metric), cand[key].get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change if metric in LOWER_IS_BETTER else -change
+            changes.append({
+                "measurement": key,
+                "metric": metric,
+                "baseline": old,
+                "candidate": new,
+                "change": round(change, 4),
+                "regression": worse > threshold,
+            })
+    return changes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="Run the suite and write a JSON report")
+    run_p.add_argument("--model", default="standin", choices=["standin", "real"])
+    run_p.add_argument("--backends", default="keras", help="Comma-separated (real model only)")
+    run_p.add_argument("--tflite-quantization", default="float16", choices=["float16", "int8"])
+    run_p.add_argument("--batch-sizes", type=_ints, default=[1, 2, 4, 8, 16])
+    run_p.add_argument("--threads", type=_ints, default=[0], help="TFLite/ONNX threads; 0 = runtime default")
+    run_p.add_argument("--workers", type=_ints, default=[1, 2], help="Concurrent callers (INFERENCE_WORKERS)")
+    run_p.add_argument("--calls", type=int, default=30, help="Timed forward passes per configuration")
+    run_p.add_argument("--images", type=int, default=16, help="Synthetic JPEGs for decode/preprocess")
+    run_p.add_argument("--repeats", type=int, default=2, help="Decode/preprocess passes over the images")
+    run_p.add_argument("--width", type=int, default=4032)
+    run_p.add_argument("--height", type=int, default=3024)
+    run_p.add_argument("--fixed-ms", type=float, default=15.0, help="Stand-in per-call overhead")
+    run_p.add_argument("--per-image-ms", type=float, default=3.0, help="Stand-in per-image cost")
+    run_p.add_argument("--output", default=None, help="Write the report here (default: stdout)")
+
+    cmp_p = sub.add_parser("compare", help="Compare two reports; exit 1 on regressions")
+    cmp_p.add_argument("baseline")
+    cmp_p.add_argument("candidate")
+    cmp_p.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown")
+    cmp_p.add_argument("--metrics", default="p50_ms,p95_ms,images_per_sec")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run(args)
+        text = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text)
+            print(f"Report: {args.output}", file=sys.stderr)
+        else:
+            print(text)
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+    changes = compare(baseline, candidate, args.threshold, args.metrics.split(","))
+    regressions = [c for c in changes if c["regression"]]
+    print(json.dumps({
+        "threshold": args.threshold,
+        "compared": len(changes),
+        "regressions": regressions,
+    }, indent=2))
+    if not changes:
+        print("No shared measurements to compare", file=sys.stderr)
+        sys.exit(2)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Measure test-time augmentation: latency overhead and URGENT flags avoided.
+
+Runs each image through the model once, and for results below the
+low-confidence threshold runs the single batched TTA pass. Reports how many
+images were uncertain, URGENT counts with and without TTA, and the latency
+of the first pass vs the extra TTA call.
+
+    python -m benchmarks.tta --images ../data/processed/fitzpatrick17k/val --model real
+    python -m benchmarks.tta --count 200          # stand-in model, random inputs
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.services import ml_service
+from benchmarks.standin import load_model, percentile_ms, random_images
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def _load_inputs(images_dir: str | None, count: int) -> np.ndarray:
+    """uint8 (N, 224, 224, 3) inputs, as produced by ml_service preprocessing."""
+    if not images_dir:
+        return np.round(random_images(count) * 255.0).astype(np.uint8)
+    paths = sorted(p for p in Path(images_dir).rglob("*") if p.suffix.lower() in IMAGE_EXTS)[:count]
+    return np.concatenate([ml_service._load_and_preprocess(str(p)) for p in paths])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="standin", choices=["standin", "real"])
+    parser.add_argument("--images", default=None, help="Directory of images (searched recursively)")
+    parser.add_argument("--count", type=int, default=200)
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    inputs = _load_inputs(args.images, args.count)
+    def predict(batch: np.ndarray) -> np.ndarray:
+        return model.predict(ml_service._normalize(batch))
+
+    predict(inputs[:1])
+    predict(ml_service._tta_views(inputs[0]))
+
+    first_pass, tta_pass = [], []
+    urgent_before = urgent_after = uncertain = 0
+    for x in inputs:
+        start = time.perf_counter()
+        probs = predict(x[None, ...])[0]
+        first_pass.append(time.perf_counter() - start)
+        before = ml_service.PredictionResult.from_probabilities(probs, "bench")
+        after = before
+        if float(probs[ml_service._served_index(probs)]) < ml_service.LOW_CONFIDENCE_THRESHOLD:
+            uncertain += 1
+            start = time.perf_counter()
+            tta_probs = predict(ml_service._tta_views(x)).mean(axis=0)
+            tta_pass.append(time.perf_counter() - start)
+            after = ml_service.PredictionResult.from_probabilities(tta_probs, "bench", tta_applied=True)
+        urgent_before += before.urgency == "URGENT"
+        urgent_after += after.urgency == "URGENT"
+
+    report = {
+        "images": len(inputs),
+        "tta_views": len(ml_service._tta_views(inputs[0])),
+        "uncertain": uncertain,
+        "urgent_without_tta": urgent_before,
+        "urgent_with_tta": urgent_after,
+        "urgent_flags_avoided": urgent_before - urgent_after,
+        "first_pass_p50_ms": percentile_ms(first_pass, 50),
+        "tta_pass_p50_ms": percentile_ms(tta_pass, 50) if tta_pass else None,
+        "tta_pass_p99_ms": percentile_ms(tta_pass, 99) if tta_pass else None,
+        "mean_overhead_per_image_ms": round(sum(tta_pass) * 1000.0 / len(inputs), 2),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Upload reads: `await file.read()` + hash vs streaming, size-bounded reads.
+
+Builds --concurrency uploads of --size-mb each, spooled the way Starlette's
+multipart parser leaves them (1 MB in memory, the rest on disk). It then
+reads them concurrently both ways and reports peak Python heap
+(tracemalloc), throughput, and the bytes read before an oversized upload of
+--oversized-mb is rejected. The size is left undeclared so the chunked limit
+is exercised rather than the up-front size check.
+
+    python -m benchmarks.uploads --size-mb 12 --concurrency 8 --oversized-mb 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from fastapi import HTTPException, UploadFile
+
+from app.core.config import settings
+from app.services import upload_service
+from app.services.prediction_cache import image_hash
+
+
+def _spooled(size: int, declare_size: bool = True) -> UploadFile:
+    f = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    block = os.urandom(1024 * 1024)
+    written = 0
+    while written < size:
+        n = min(len(block), size - written)
+        f.write(block[:n])
+        written += n
+    f.seek(0)
+    return UploadFile(f, size=size if declare_size else None, filename="lesion.jpg")
+
+
+async def _read_all(file: UploadFile) -> str:
+    data = await file.read()
+    return image_hash(data)
+
+
+async def _streaming(file: UploadFile) -> str:
+    async with upload_service.read_uploads([file]) as (upload,):
+        return upload.content_hash
+
+
+async def _measure(reader, size: int, concurrency: int) -> dict:
+    files = [_spooled(size) for _ in range(concurrency)]
+    tracemalloc.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(reader(f) for f in files))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for f in files:
+        await f.close()
+    return {
+        "peak_heap_mb": round(peak / 1e6, 1),
+        "peak_per_upload_mb": round(peak / concurrency / 1e6, 1),
+        "mb_per_sec": round(size * concurrency / elapsed / 1e6, 1),
+    }
+
+
+async def _oversized(size: int) -> dict:
+    file = _spooled(size, declare_size=False)
+    tracemalloc.start()
+    try:
+        await upload_service.read_upload(file)
+        status = 200
+    except HTTPException as e:
+        status = e.status_code
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    read = file.file.tell()
+    await file.close()
+    return {
+        "upload_mb": round(size / 1e6, 1),
+        "status": status,
+        "bytes_read_before_reject_mb": round(read / 1e6, 1),
+        "peak_heap_mb": round(peak / 1e6, 1),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=12.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--oversized-mb", type=float, default=200.0)
+    args = parser.parse_args()
+
+    size = int(args.size_mb * 1024 * 1024)
+    report = {
+        "settings": {
+            "UPLOAD_MAX_BYTES": settings.UPLOAD_MAX_BYTES,
+            "UPLOAD_CHUNK_BYTES": settings.UPLOAD_CHUNK_BYTES,
+        },
+        "uploads": {"size_mb": args.size_mb, "concurrency": args.concurrency},
+        "read_all": await _measure(_read_all, size, args.concurrency),
+        "streaming": await _measure(_streaming, size, args.concurrency),
+        "oversized_read_all_mb": args.oversized_mb,  # file.read() has no limit
+        "oversized_streaming": await _oversized(int(args.oversized_mb * 1024 * 1024)),
+        "upload_stats": upload_service.upload_stats(),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -66,7 +66,7 @@ export default function AdminImagesPage() {
                 <CardContent className="p-0">
                   <div className="relative aspect-square w-full overflow-hidden rounded-t-xl bg-slate-100">
                     <Image
-                      src={img.image_url}
+                      src={img.preview_url ?? img.image_url}
                       alt="Upload"
                       fill
                       className="object-cover"
@@ -26,7 +26,7 @@ function PendingReviewCard({ image, onReview }: { image: ImageType; onReview: (i
 			<CardContent className='p-0'>
 				<div className='relative h-24 w-full overflow-hidden bg-slate-100'>
 					<Image
-						src={image.image_url}
+						src={image.preview_url ?? image.image_url}
 						alt='Skin condition'
 						fill
 						className='object-cover'
@@ -62,7 +62,7 @@ function ReviewedCard({ image }: { image: ImageType }) {
 			<CardContent className='p-0'>
 				<div className='relative h-24 w-full overflow-hidden bg-slate-100'>
 					<Image
-						src={image.image_url}
+						src={image.preview_url ?? image.image_url}
 						alt='Skin condition'
 						fill
 						className='object-cover'
@@ -88,6 +88,9 @@ export interface Image {
   uploaded_by: string | null;
   image_url: string;
   storage_key: string;
+  // Small JPEG copies for lists; null until generated (fall back to image_url)
+  thumbnail_url: string | null;
+  preview_url: string | null;
   predicted_condition: string | null;
   confidence: number | null;
   reviewed_label: string | null;
@@ -0,0 +1,196 @@
+"""
+Calibrate the API's two-stage inference cascade (INFERENCE_CASCADE_ENABLED).
+
+The screening model is any .keras, .tflite or .onnx file in the model
+directory. It can be a smaller network or the same architecture trained at a
+lower resolution, given by --input-size. Both models are run over the
+calibration split (val), and the escalation thresholds are derived from it
+(see backend/app/services/cascade.py):
+
+- malignant_threshold: below the screening model's lowest P(malignant) on any
+  image the full model serves as malignant, less --margin. Those images are
+  always escalated, so malignant recall cannot drop.
+- confidence_threshold: the lowest value at which the screening model's
+  accepted answers agree with the full model on --target-agreement of the
+  images.
+
+Only NON_URGENT classes are ever answered by the screening model.
+
+The thresholds are then checked on the held-out split (test). The config is
+written only if cascade malignant recall there is at least the full model's.
+The report gives the fraction escalated and the mean latency saved per image
+(batch size 1, as for a quick scan).
+
+Output: models/final/cascade_config.json (or --model-dir, next to the model it
+was calibrated against).
+
+Run from project root:
+    python src/models/cascade.py --screen-model screen_model.tflite --input-size 128
+    python src/models/cascade.py --screen-model best_model_int8.tflite --backend keras
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "backend"))
+
+from app.services import cascade, inference_backends  # noqa: E402
+from app.services.ml_service import (  # noqa: E402
+    LOW_CONFIDENCE_THRESHOLD,
+    MALIGNANT_THRESHOLD,
+    URGENCY_MAP,
+)
+from src.models.export import MODEL_DIR, iter_split, preprocess  # noqa: E402
+from src.models.parity import run_backend, served_class  # noqa: E402
+
+
+def _run_split(split: str, limit: int | None, full, screen, input_size, class_names, batch_size) -> dict:
+    items = iter_split(split, limit=limit)
+    x = np.stack([preprocess(path) for path, _ in items])
+    x_uint8 = np.round(x * 255.0).astype(np.uint8)  # what the API holds after preprocessing
+    full_probs, _ = run_backend(full, [x[i:i + batch_size] for i in range(0, len(x), batch_size)])
+    screen_x = cascade.screen_input(x_uint8, input_size)
+    screen_probs, _ = run_backend(
+        screen, [screen_x[i:i + batch_size] for i in range(0, len(x), batch_size)]
+    )
+    # Quick scans are single images, so per-image latency is timed at batch size 1
+    n = min(len(x), 64)
+    _, full_ms = run_backend(full, [x[i:i + 1] for i in range(n)])
+    _, screen_ms = run_backend(screen, [screen_x[i:i + 1] for i in range(n)])
+    return {
+        "labels": np.array([class_names.index(c) if c in class_names else -1 for _, c in items]),
+        "full_probs": full_probs,
+        "screen_probs": screen_probs,
+        "full_ms": full_ms,
+        "screen_ms": screen_ms,
+    }
+
+
+def _latency(evaluation: dict, full_ms: float, screen_ms: float) -> dict:
+    cascade_ms = screen_ms + evaluation["escalated_fraction"] * full_ms
+    return {
+        "full": round(full_ms, 3),
+        "screen": round(screen_ms, 3),
+        "cascade_mean": round(cascade_ms, 3),
+        "saved_mean": round(full_ms - cascade_ms, 3),
+    }
+
+
+def calibrate_cascade(
+    model_dir: Path,
+    backend: str,
+    quantization: str,
+    screen_model: str,
+    input_size: int,
+    split: str,
+    verify_split: str,
+    limit: int | None,
+    target_agreement: float,
+    margin: float,
+    batch_size: int,
+) -> dict:
+    with open(model_dir / "class_names.json", encoding="utf-8") as f:
+        class_names = json.load(f)
+    malignant_idx = class_names.index("malignant")
+    accept_conditions = [c for c in class_names if URGENCY_MAP.get(c) == "NON_URGENT"]
+    accept_indices = [class_names.index(c) for c in accept_conditions]
+
+    full_path = inference_backends.model_path(backend, model_dir, quantization)
+    full = inference_backends.load_backend(backend, full_path, batch_sizes=[1, batch_size])
+    screen_path = model_dir / screen_model
+    screen = inference_backends.load_backend(
+        cascade.backend_for(screen_path), screen_path, batch_sizes=[1, batch_size]
+    )
+    size = (input_size, input_size)
+
+    runs = {}
+    for name in dict.fromkeys((split, verify_split)):
+        runs[name] = _run_split(name, limit, full, screen, size, class_names, batch_size)
+        runs[name]["full_served"] = served_class(runs[name]["full_probs"], malignant_idx)
+
+    cal = runs[split]
+    thresholds = cascade.calibrate(
+        cal["screen_probs"],
+        cal["full_served"],
+        malignant_idx,
+        accept_indices,
+        max_malignant_threshold=MALIGNANT_THRESHOLD,
+        min_confidence=LOW_CONFIDENCE_THRESHOLD,
+        target_agreement=target_agreement,
+        margin=margin,
+    )
+    config = {
+        "screen_model": screen_model,
+        "input_size": list(size),
+        "class_names": class_names,
+        "accept_conditions": accept_conditions,
+        **thresholds,
+        "full_model": full_path.name,
+    }
+    evaluation = {**config, "accept_indices": accept_indices}
+    report = {}
+    for name, run in runs.items():
+        metrics = cascade.evaluate(
+            run["screen_probs"], run["full_served"], run["labels"], malignant_idx, evaluation
+        )
+        metrics["latency_ms_per_image"] = _latency(metrics, run["full_ms"], run["screen_ms"])
+        report[name] = metrics
+    config["latency_ms_per_image"] = report[verify_split]["latency_ms_per_image"]
+    config["calibration"] = {
+        "split": split,
+        "verify_split": verify_split,
+        "target_agreement": target_agreement,
+        "margin": margin,
+        "report": report,
+    }
+    return config
+
+
+def recall_preserved(metrics: dict) -> bool:
+    if "full_malignant_recall" not in metrics:
+        return metrics["full_malignant_flags_escalated"]
+    return metrics["cascade_malignant_recall"] >= metrics["full_malignant_recall"]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Calibrate the screening cascade's escalation thresholds")
+    parser.add_argument("--model-dir", type=Path, default=MODEL_DIR)
+    parser.add_argument("--backend", choices=["keras", "tflite", "onnx"], default="keras",
+                        help="Full model backend; use the one the API serves (INFERENCE_BACKEND)")
+    parser.add_argument("--quantization", choices=["float16", "int8"], default="float16",
+                        help="TFLite variant of the full model (ignored otherwise)")
+    parser.add_argument("--screen-model", required=True,
+                        help="Screening model file name in --model-dir (.keras, .tflite or .onnx)")
+    parser.add_argument("--input-size", type=int, default=224, help="Screening model input resolution")
+    parser.add_argument("--split", choices=["val", "test"], default="val")
+    parser.add_argument("--verify-split", choices=["val", "test"], default="test")
+    parser.add_argument("--limit", type=int, default=None, help="Random sample of each split")
+    parser.add_argument("--target-agreement", type=float, default=0.98,
+                        help="Min agreement with the full model on images the screening model answers")
+    parser.add_argument("--margin", type=float, default=0.1,
+                        help="Relative safety margin below the lowest P(malignant) that must escalate")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    config = calibrate_cascade(
+        args.model_dir, args.backend, args.quantization, args.screen_model, args.input_size,
+        args.split, args.verify_split, args.limit, args.target_agreement, args.margin, args.batch_size,
+    )
+    verified = config["calibration"]["report"][args.verify_split]
+    print(json.dumps(config["calibration"]["report"], indent=2))
+    if not recall_preserved(verified):
+        print(f"Malignant recall on {args.verify_split} drops with the cascade; "
+              "not writing the config (try a larger --margin)")
+        sys.exit(1)
+    out_path = args.model_dir / cascade.CONFIG_FILE
+    out_path.write_text(json.dumps(config, indent=2))
+    print(f"Escalated {verified['escalated_fraction']:.1%} of {args.verify_split}; "
+          f"latency ms/image: {verified['latency_ms_per_image']}")
+    print(f"Cascade config: {out_path}")
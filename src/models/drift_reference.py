@@ -0,0 +1,73 @@
+"""
+Reference histograms for the API's prediction-drift monitor.
+
+Runs the processed val (or test) split through the served model backend,
+applying the same malignant threshold override as the API. It then writes
+the per-class probability, confidence and predicted-class histograms that
+GET /api/stats/drift compares live traffic against.
+
+Output: models/final/drift_reference.json (or --model-dir, e.g.
+models/versions/<model_version>/, so the reference sits next to the model
+it describes).
+
+Run from project root:
+    python src/models/drift_reference.py
+    python src/models/drift_reference.py --backend tflite --model-dir models/versions/v2
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "backend"))
+
+from app.services import inference_backends  # noqa: E402
+from app.services.drift_monitor import REFERENCE_FILE, reference_from_probabilities  # noqa: E402
+from src.models.export import MODEL_DIR, iter_split, preprocess  # noqa: E402
+from src.models.parity import served_class  # noqa: E402
+
+
+def build_reference(
+    model_dir: Path, backend: str, quantization: str, split: str, bins: int, batch_size: int
+) -> dict:
+    with open(model_dir / "class_names.json", encoding="utf-8") as f:
+        class_names = json.load(f)
+    model_path = inference_backends.model_path(backend, model_dir, quantization)
+    model = inference_backends.load_backend(backend, model_path, batch_sizes=[batch_size])
+    items = iter_split(split)
+    outputs = []
+    for i in range(0, len(items), batch_size):
+        batch = np.stack([preprocess(path) for path, _ in items[i:i + batch_size]])
+        outputs.append(model.predict(batch))
+    probs = np.concatenate(outputs)
+    served = served_class(probs, class_names.index("malignant"))
+    reference = reference_from_probabilities(probs, served, class_names, bins)
+    reference.update({"split": split, "model_file": model_path.name})
+    return reference
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build drift-monitor reference histograms")
+    parser.add_argument("--model-dir", type=Path, default=MODEL_DIR)
+    parser.add_argument("--backend", choices=["keras", "tflite", "onnx"], default="keras",
+                        help="Use the backend the API serves (INFERENCE_BACKEND)")
+    parser.add_argument("--quantization", choices=["float16", "int8"], default="float16",
+                        help="TFLite variant (ignored otherwise)")
+    parser.add_argument("--split", choices=["val", "test"], default="val")
+    parser.add_argument("--bins", type=int, default=10, help="Must match DRIFT_BINS")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    reference = build_reference(
+        args.model_dir, args.backend, args.quantization, args.split, args.bins, args.batch_size
+    )
+    out_path = args.model_dir / REFERENCE_FILE
+    out_path.write_text(json.dumps(reference, indent=2))
+    print(json.dumps(reference["predicted_class"], indent=2))
+    print(f"Reference ({reference['n']} images): {out_path}")
@@ -0,0 +1,141 @@
+"""
+Export the trained Keras triage model to CPU-friendly inference formats.
+
+Outputs (next to the Keras model in models/final/):
+- best_model_float16.tflite  — float16 weights, float32 compute
+- best_model_int8.tflite     — int8 weights/activations, calibrated with a
+                               representative dataset from the processed train split
+- best_model.onnx            — ONNX Runtime (requires tf2onnx)
+
+Exports have two outputs — class probabilities and the pooled penultimate
+features used as lesion embeddings for similar-case search.
+
+The backend API picks one of these with INFERENCE_BACKEND / INFERENCE_TFLITE_QUANTIZATION.
+Check accuracy parity first with src/models/parity.py.
+
+Run from project root: python src/models/export.py --format all
+"""
+
+import csv
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "backend"))
+
+MODEL_DIR = PROJECT_ROOT / "models" / "final"
+SPLITS_DIR = PROJECT_ROOT / "data" / "processed" / "fitzpatrick17k"
+METADATA_PATH = PROJECT_ROOT / "data" / "processed" / "filtered_metadata.csv"
+INPUT_SIZE = (224, 224)
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+
+def keras_model_path() -> Path:
+    for name in ("best_model.keras", "dermoai_final_model.keras"):
+        path = MODEL_DIR / name
+        if path.exists():
+            return path
+    raise FileNotFoundError(f"No Keras model in {MODEL_DIR}; run notebooks/04_model_training.ipynb first")
+
+
+def preprocess(path: Path) -> np.ndarray:
+    """Same preprocessing as the backend: RGB, resize to 224x224, scale to [0, 1]."""
+    img = Image.open(path).convert("RGB").resize(INPUT_SIZE)
+    return np.asarray(img, dtype=np.float32) / 255.0
+
+
+def load_fst_lookup() -> dict[str, str]:
+    """md5hash -> Fitzpatrick skin type from filtered_metadata.csv (empty if absent)."""
+    if not METADATA_PATH.exists():
+        return {}
+    with open(METADATA_PATH, newline="", encoding="utf-8") as f:
+        return {row["md5hash"]: row["fitzpatrick_scale"] for row in csv.DictReader(f)}
+
+
+def iter_split(split: str, limit: int | None = None, seed: int = 42) -> list[tuple[Path, str]]:
+    """
+    List (image_path, class_folder) pairs for a processed split.
+
+    Args:
+        split: "train", "val" or "test".
+        limit: Optional random sample size (stratification is not enforced).
+    """
+    split_dir = SPLITS_DIR / split
+    if not split_dir.exists():
+        raise FileNotFoundError(f"Split not found: {split_dir} (see data/README.md)")
+    items = [
+        (path, class_dir.name)
+        for class_dir in sorted(p for p in split_dir.iterdir() if p.is_dir())
+        for path in sorted(class_dir.iterdir())
+        if path.suffix.lower() in IMAGE_EXTS
+    ]
+    if limit is not None and limit < len(items):
+        items = random.Random(seed).sample(items, limit)
+    return items
+
+
+def export_tflite(model, quantization: str, representative_samples: int = 200) -> Path:
+    """Convert to TFLite with float16 or int8 post-training quantization."""
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        samples = iter_split("train", limit=representative_samples)
+
+        def representative_dataset():
+            for path, _ in samples:
+                yield [preprocess(path)[None, ...]]
+
+        converter.representative_dataset = representative_dataset
+        # Integer kernels inside, float32 input/output so the backend API is unchanged
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    else:
+        raise ValueError(f"Unknown quantization {quantization!r}")
+
+    out_path = MODEL_DIR / f"best_model_{quantization}.tflite"
+    out_path.write_bytes(converter.convert())
+    return out_path
+
+
+def export_onnx(model) -> Path:
+    import tensorflow as tf
+    import tf2onnx
+
+    out_path = MODEL_DIR / "best_model.onnx"
+    spec = (tf.TensorSpec((None, *INPUT_SIZE, 3), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=str(out_path))
+    return out_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export the triage model to TFLite / ONNX")
+    parser.add_argument("--format", choices=["float16", "int8", "onnx", "all"], default="all",
+                        help="Which export to produce (default: all)")
+    parser.add_argument("--representative-samples", type=int, default=200,
+                        help="Train images used to calibrate int8 quantization (default: 200)")
+    args = parser.parse_args()
+
+    import keras
+
+    from app.services.inference_backends import embedding_model
+
+    src = keras_model_path()
+    model = keras.models.load_model(src, compile=False)
+    model = embedding_model(model) or model
+    formats = ["float16", "int8", "onnx"] if args.format == "all" else [args.format]
+    for fmt in formats:
+        if fmt == "onnx":
+            out = export_onnx(model)
+        else:
+            out = export_tflite(model, fmt, args.representative_samples)
+        print(f"{fmt}: {out} ({out.stat().st_size / 1e6:.1f} MB, Keras {src.stat().st_size / 1e6:.1f} MB)")
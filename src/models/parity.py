@@ -0,0 +1,133 @@
+"""
+Accuracy-parity report: candidate inference backend vs the Keras model.
+
+Runs the processed test (or val) split through the Keras backend and a
+candidate (TFLite float16/int8 or ONNX), applying the same malignant
+threshold override as the API, and reports per class and per FST group:
+accuracy of each, top-1 agreement, mean |Δp|, malignant recall and latency.
+
+Output: results/experiments/backend_parity_<candidate>.json
+
+Run from project root:
+    python src/models/parity.py --candidate tflite --quantization int8
+    python src/models/parity.py --candidate onnx --split val
+"""
+
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "backend"))
+
+from app.services import inference_backends  # noqa: E402
+from src.models.export import MODEL_DIR, iter_split, load_fst_lookup, preprocess  # noqa: E402
+
+RESULTS_DIR = PROJECT_ROOT / "results" / "experiments"
+MALIGNANT_THRESHOLD = 0.20  # keep in sync with backend/app/services/ml_service.py
+
+
+def load_class_names() -> list[str]:
+    with open(MODEL_DIR / "class_names.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def served_class(probs: np.ndarray, malignant_idx: int) -> np.ndarray:
+    """Argmax with the API's malignant override applied row-wise."""
+    pred = probs.argmax(axis=1)
+    pred[probs[:, malignant_idx] > MALIGNANT_THRESHOLD] = malignant_idx
+    return pred
+
+
+def run_backend(backend, batches: list[np.ndarray]) -> tuple[np.ndarray, float]:
+    """Predict all batches; returns (probabilities, mean ms per image)."""
+    backend.predict(batches[0][:1])  # warm up
+    outputs, elapsed = [], 0.0
+    for batch in batches:
+        start = time.perf_counter()
+        outputs.append(backend.predict(batch))
+        elapsed += time.perf_counter() - start
+    probs = np.concatenate(outputs)
+    return probs, elapsed * 1000.0 / len(probs)
+
+
+def _group_metrics(idx: np.ndarray, labels, ref_pred, cand_pred, ref_probs, cand_probs, malignant_idx) -> dict:
+    known = idx[labels[idx] >= 0]
+    malignant = known[labels[known] == malignant_idx]
+    metrics = {
+        "n": int(len(idx)),
+        "agreement": round(float((ref_pred[idx] == cand_pred[idx]).mean()), 4),
+        "mean_abs_prob_diff": round(float(np.abs(ref_probs[idx] - cand_probs[idx]).mean()), 5),
+    }
+    if len(known):
+        metrics["keras_accuracy"] = round(float((ref_pred[known] == labels[known]).mean()), 4)
+        metrics["candidate_accuracy"] = round(float((cand_pred[known] == labels[known]).mean()), 4)
+    if len(malignant):
+        metrics["keras_malignant_recall"] = round(float((ref_pred[malignant] == malignant_idx).mean()), 4)
+        metrics["candidate_malignant_recall"] = round(float((cand_pred[malignant] == malignant_idx).mean()), 4)
+    return metrics
+
+
+def parity_report(candidate: str, quantization: str, split: str, limit: int | None, batch_size: int) -> dict:
+    class_names = load_class_names()
+    malignant_idx = class_names.index("malignant")
+    items = iter_split(split, limit=limit)
+    fst_lookup = load_fst_lookup()
+
+    x = np.stack([preprocess(path) for path, _ in items])
+    batches = [x[i:i + batch_size] for i in range(0, len(x), batch_size)]
+    labels = np.array([class_names.index(c) if c in class_names else -1 for _, c in items])
+    fst = np.array([fst_lookup.get(path.stem, "unknown") for path, _ in items])
+
+    ref = inference_backends.load_backend("keras", inference_backends.model_path("keras", MODEL_DIR))
+    cand_path = inference_backends.model_path(candidate, MODEL_DIR, quantization)
+    cand = inference_backends.load_backend(candidate, cand_path, batch_sizes=[1, batch_size])
+    ref_probs, ref_ms = run_backend(ref, batches)
+    cand_probs, cand_ms = run_backend(cand, batches)
+    ref_pred = served_class(ref_probs, malignant_idx)
+    cand_pred = served_class(cand_probs, malignant_idx)
+
+    args = (labels, ref_pred, cand_pred, ref_probs, cand_probs, malignant_idx)
+    by_class = defaultdict(list)
+    for i, (_, folder) in enumerate(items):
+        by_class[folder].append(i)
+    by_fst = defaultdict(list)
+    for i, group in enumerate(fst):
+        by_fst[group].append(i)
+
+    return {
+        "candidate": cand_path.name,
+        "split": split,
+        "batch_size": batch_size,
+        "latency_ms_per_image": {"keras": round(ref_ms, 3), "candidate": round(cand_ms, 3)},
+        "overall": _group_metrics(np.arange(len(items)), *args),
+        "per_class": {k: _group_metrics(np.array(v), *args) for k, v in sorted(by_class.items())},
+        "per_fst": {k: _group_metrics(np.array(v), *args) for k, v in sorted(by_fst.items())},
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare a TFLite/ONNX backend against the Keras model")
+    parser.add_argument("--candidate", choices=["tflite", "onnx"], default="tflite")
+    parser.add_argument("--quantization", choices=["float16", "int8"], default="float16",
+                        help="TFLite variant (ignored for onnx)")
+    parser.add_argument("--split", choices=["val", "test"], default="test")
+    parser.add_argument("--limit", type=int, default=None, help="Random sample of the split")
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    report = parity_report(args.candidate, args.quantization, args.split, args.limit, args.batch_size)
+    name = f"{args.candidate}_{args.quantization}" if args.candidate == "tflite" else args.candidate
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = RESULTS_DIR / f"backend_parity_{name}.json"
+    out_path.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report["overall"], indent=2))
+    print(f"Latency ms/image: {report['latency_ms_per_image']}")
+    print(f"Full report: {out_path}")
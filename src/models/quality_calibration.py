@@ -0,0 +1,205 @@
+"""
+Calibrate the API's image-quality gate (QUALITY_GATE_ENABLED) on a labelled split.
+
+Every image in the split (val by default) is a usable clinical photo, so
+every rejection there is a false reject. The images are preprocessed as the
+API does (224x224 uint8), and the gate's checks run on them (see
+backend/app/services/quality_gate.py). The report gives the false-reject rate
+of each check, overall and per Fitzpatrick skin type, at the current QUALITY_*
+settings and at thresholds derived so that no FST group exceeds
+--target-reject on any check.
+
+Good photos can only show which thresholds are too strict, not where
+unusable photos begin. So a derived threshold is the current one, loosened
+where the data requires it, and never tightened:
+
+- QUALITY_MIN_SHARPNESS: at most the lowest group's --target-reject quantile
+  of sharpness;
+- QUALITY_MAX_CLIPPED_FRACTION: at least the highest group's
+  1 - --target-reject quantile of the clipped-highlight and crushed-shadow
+  fractions;
+- QUALITY_SKIN_CR / QUALITY_SKIN_CB: the current range, widened to the
+  central 1 - 2 * --pixel-quantile of pixel chroma in every group. Lesions
+  are included, and the background is mostly excluded by the trim;
+- QUALITY_MIN_SKIN_FRACTION: at most the lowest group's --target-reject
+  quantile of skin coverage under that range.
+
+Output: results/experiments/quality_calibration_<split>.json, plus the
+settings to copy into backend/.env.
+
+Run from project root:
+    python src/models/quality_calibration.py
+    python src/models/quality_calibration.py --split test --target-reject 0.005
+"""
+
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "backend"))
+
+from app.core.config import settings  # noqa: E402
+from app.services import quality_gate  # noqa: E402
+from src.models.export import iter_split, load_fst_lookup, preprocess  # noqa: E402
+
+RESULTS_DIR = PROJECT_ROOT / "results" / "experiments"
+CHECKS = ("blurry", "overexposed", "underexposed", "low_skin_coverage")
+
+
+def _current() -> dict:
+    return {
+        "QUALITY_MIN_SHARPNESS": settings.QUALITY_MIN_SHARPNESS,
+        "QUALITY_MAX_CLIPPED_FRACTION": settings.QUALITY_MAX_CLIPPED_FRACTION,
+        "QUALITY_MIN_SKIN_FRACTION": settings.QUALITY_MIN_SKIN_FRACTION,
+        "QUALITY_SKIN_CR": list(settings.QUALITY_SKIN_CR),
+        "QUALITY_SKIN_CB": list(settings.QUALITY_SKIN_CB),
+    }
+
+
+def _measure(split: str, limit: int | None) -> dict:
+    """Gate metrics and sampled-grid chroma of every image, with its FST group."""
+    fst_lookup = load_fst_lookup()
+    items = iter_split(split, limit=limit)
+    sharpness, clipped_high, clipped_low, cr, cb, fst = [], [], [], [], [], []
+    for path, _ in items:
+        x = np.round(preprocess(path) * 255.0).astype(np.uint8)  # what the API holds
+        report = quality_gate.assess(x, min_sharpness=0.0, max_clipped_fraction=1.0, min_skin_fraction=0.0)
+        sharpness.append(report.metrics["sharpness"])
+        clipped_high.append(report.metrics["overexposed_fraction"])
+        clipped_low.append(report.metrics["underexposed_fraction"])
+        image_cr, image_cb = quality_gate.chroma(x)
+        cr.append(image_cr.astype(np.float16))
+        cb.append(image_cb.astype(np.float16))
+        fst.append(fst_lookup.get(path.stem, "unknown"))
+    return {
+        "sharpness": np.array(sharpness),
+        "overexposed": np.array(clipped_high),
+        "underexposed": np.array(clipped_low),
+        "cr": np.stack(cr),  # float16: ~50 kB per image for both planes
+        "cb": np.stack(cb),
+        "fst": np.array(fst),
+    }
+
+
+def _skin_fraction(data: dict, skin_cr, skin_cb) -> np.ndarray:
+    cr, cb = data["cr"], data["cb"]
+    skin = (cr >= skin_cr[0]) & (cr <= skin_cr[1]) & (cb >= skin_cb[0]) & (cb <= skin_cb[1])
+    return skin.reshape(len(skin), -1).mean(axis=1)
+
+
+def _rejections(data: dict, thresholds: dict) -> dict[str, np.ndarray]:
+    """Per-check boolean reject masks under a set of QUALITY_* thresholds."""
+    skin = _skin_fraction(data, thresholds["QUALITY_SKIN_CR"], thresholds["QUALITY_SKIN_CB"])
+    return {
+        "blurry": data["sharpness"] < thresholds["QUALITY_MIN_SHARPNESS"],
+        "overexposed": data["overexposed"] > thresholds["QUALITY_MAX_CLIPPED_FRACTION"],
+        "underexposed": data["underexposed"] > thresholds["QUALITY_MAX_CLIPPED_FRACTION"],
+        "low_skin_coverage": skin < thresholds["QUALITY_MIN_SKIN_FRACTION"],
+    }
+
+
+def _groups(fst: np.ndarray) -> dict[str, np.ndarray]:
+    by_fst = defaultdict(list)
+    for i, group in enumerate(fst):
+        by_fst[str(group)].append(i)
+    return {group: np.array(idx) for group, idx in sorted(by_fst.items())}
+
+
+def _reject_rates(data: dict, thresholds: dict) -> dict:
+    rejected = _rejections(data, thresholds)
+    rejected["any"] = np.any(np.stack([rejected[check] for check in CHECKS]), axis=0)
+
+    def rates(idx: np.ndarray) -> dict:
+        return {"n": int(len(idx)), **{k: round(float(v[idx].mean()), 4) for k, v in rejected.items()}}
+
+    report = {"overall": rates(np.arange(len(data["fst"])))}
+    report["per_fst"] = {group: rates(idx) for group, idx in _groups(data["fst"]).items()}
+    return report
+
+
+def _floor(value: float, decimals: int) -> float:
+    return float(np.floor(value * 10**decimals) / 10**decimals)
+
+
+def _ceil(value: float, decimals: int) -> float:
+    return float(np.ceil(value * 10**decimals) / 10**decimals)
+
+
+def derive_thresholds(data: dict, current: dict, target_reject: float, pixel_quantile: float) -> dict:
+    """Current QUALITY_* values, loosened until no FST group's false-reject rate per check exceeds target."""
+    groups = _groups(data["fst"])
+    clipped = np.maximum(data["overexposed"], data["underexposed"])
+    low, high = pixel_quantile * 100.0, (1.0 - pixel_quantile) * 100.0
+    # Rounded outwards, so rounding never tightens a threshold
+    skin_cr = [
+        min(current["QUALITY_SKIN_CR"][0],
+            _floor(min(float(np.percentile(data["cr"][idx], low)) for idx in groups.values()), 0)),
+        max(current["QUALITY_SKIN_CR"][1],
+            _ceil(max(float(np.percentile(data["cr"][idx], high)) for idx in groups.values()), 0)),
+    ]
+    skin_cb = [
+        min(current["QUALITY_SKIN_CB"][0],
+            _floor(min(float(np.percentile(data["cb"][idx], low)) for idx in groups.values()), 0)),
+        max(current["QUALITY_SKIN_CB"][1],
+            _ceil(max(float(np.percentile(data["cb"][idx], high)) for idx in groups.values()), 0)),
+    ]
+    skin = _skin_fraction(data, skin_cr, skin_cb)
+    return {
+        "QUALITY_MIN_SHARPNESS": min(current["QUALITY_MIN_SHARPNESS"], _floor(
+            min(float(np.quantile(data["sharpness"][idx], target_reject)) for idx in groups.values()), 1
+        )),
+        "QUALITY_MAX_CLIPPED_FRACTION": max(current["QUALITY_MAX_CLIPPED_FRACTION"], _ceil(
+            max(float(np.quantile(clipped[idx], 1.0 - target_reject)) for idx in groups.values()), 2
+        )),
+        "QUALITY_MIN_SKIN_FRACTION": min(current["QUALITY_MIN_SKIN_FRACTION"], _floor(
+            min(float(np.quantile(skin[idx], target_reject)) for idx in groups.values()), 2
+        )),
+        "QUALITY_SKIN_CR": skin_cr,
+        "QUALITY_SKIN_CB": skin_cb,
+    }
+
+
+def calibrate_quality(split: str, limit: int | None, target_reject: float, pixel_quantile: float) -> dict:
+    data = _measure(split, limit)
+    current = _current()
+    derived = derive_thresholds(data, current, target_reject, pixel_quantile)
+    return {
+        "split": split,
+        "images": int(len(data["fst"])),
+        "target_reject": target_reject,
+        "pixel_quantile": pixel_quantile,
+        "current": {"thresholds": current, "false_reject": _reject_rates(data, current)},
+        "derived": {"thresholds": derived, "false_reject": _reject_rates(data, derived)},
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Calibrate the image-quality gate's thresholds")
+    parser.add_argument("--split", choices=["val", "test"], default="val")
+    parser.add_argument("--limit", type=int, default=None, help="Random sample of the split")
+    parser.add_argument("--target-reject", type=float, default=0.01,
+                        help="Max false-reject rate per check in every FST group")
+    parser.add_argument("--pixel-quantile", type=float, default=0.02,
+                        help="Chroma trimmed from each end, per FST group, for the skin range")
+    args = parser.parse_args()
+
+    report = calibrate_quality(args.split, args.limit, args.target_reject, args.pixel_quantile)
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = RESULTS_DIR / f"quality_calibration_{args.split}.json"
+    out_path.write_text(json.dumps(report, indent=2))
+    for name in ("current", "derived"):
+        rates = report[name]["false_reject"]
+        worst = max(rates["per_fst"].items(), key=lambda item: item[1]["any"])
+        print(f"{name}: false-reject {rates['overall']['any']:.1%} overall, "
+              f"worst FST {worst[0]} {worst[1]['any']:.1%}")
+    print("Settings for backend/.env:")
+    for key, value in report["derived"]["thresholds"].items():
+        print(f"{key}={json.dumps(value)}")
+    print(f"Report: {out_path}")